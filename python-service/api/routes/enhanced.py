@@ -15,12 +15,14 @@ from pydantic.v1 import BaseModel, Field, root_validator
 from app.persona_registry import (
     MODEL_CATEGORIES,
     get_persona_categories,
+    persona_catalog_version,
     persona_payload,
     persona_metadata_dict,
     refresh_persona_cache,
     remove_persona,
     upsert_persona,
 )
+from app.catalog_cache import cached_catalog_response
 from app.config import get_settings
 import openai
 from core.enhanced_chat_engine import get_enhanced_chat_engine
@@ -31,7 +33,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-
 class ChatMessagePayload(BaseModel):
     role: str
     content: str
@@ -366,11 +367,16 @@ async def proxy_chat(request: EnhancedChatRequest):
 async def proxy_chat_models():
     try:
         pytorch_manager = get_pytorch_manager()
-        models = await asyncio.to_thread(pytorch_manager.list_available_models)
-        return ModelCatalogResponse(
-            models=models,
-            categories=MODEL_CATEGORIES,
-            model_categories=MODEL_CATEGORIES,
+
+        def build() -> Dict[str, Any]:
+            return ModelCatalogResponse(
+                models=pytorch_manager.list_available_models(),
+                categories=MODEL_CATEGORIES,
+                model_categories=MODEL_CATEGORIES,
+            ).dict()
+
+        return await cached_catalog_response(
+            "chat_models", (pytorch_manager.models_version(),), build
         )
     except Exception:
         logger.exception("Proxy chat models error")
@@ -381,14 +387,18 @@ async def proxy_chat_models():
 async def proxy_personas():
     try:
         pytorch_manager = get_pytorch_manager()
-        models = await asyncio.to_thread(pytorch_manager.list_available_models)
-        personas = await asyncio.to_thread(persona_payload, models)
-        return PersonaCatalogResponse(
-            personas=personas,
-            models=models,
-            persona_categories=get_persona_categories(),
-            model_categories=MODEL_CATEGORIES,
-        )
+
+        def build() -> Dict[str, Any]:
+            models = pytorch_manager.list_available_models()
+            return PersonaCatalogResponse(
+                personas=persona_payload(models),
+                models=models,
+                persona_categories=get_persona_categories(),
+                model_categories=MODEL_CATEGORIES,
+            ).dict()
+
+        version = (pytorch_manager.models_version(), persona_catalog_version())
+        return await cached_catalog_response("personas", version, build)
     except Exception:
         logger.exception("Proxy personas error")
         raise _http_error(500, "PERSONA_CATALOG_FAILED", "Unable to retrieve personas.")
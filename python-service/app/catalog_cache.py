@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+"""
+Serialized model and persona catalogue payloads.
+
+Each endpoint's body is built once per (model registry, persona catalogue)
+version and served as cached bytes until either version changes.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Tuple
+
+import orjson
+from fastapi import Response
+
+# Serialized catalogue payloads keyed by endpoint, tagged with the
+# (model registry, persona catalogue) versions they were built from.
+_catalog_bodies: Dict[str, Tuple[Tuple[int, ...], bytes]] = {}
+
+
+async def cached_catalog_response(
+    name: str,
+    version: Tuple[int, ...],
+    build: Callable[[], Any],
+) -> Response:
+    """Return ``name``'s cached JSON body, rebuilding it with ``build`` when ``version`` changed."""
+    cached = _catalog_bodies.get(name)
+    if cached is None or cached[0] != version:
+        payload = await asyncio.to_thread(build)
+        cached = (version, orjson.dumps(payload))
+        _catalog_bodies[name] = cached
+    return Response(content=cached[1], media_type="application/json")
+
+
+__all__ = ["cached_catalog_response"]
@@ -134,6 +134,9 @@ class Settings(BaseSettings):
     hf_dataset_repo: Optional[str] = Field(default=None, env="HF_DATASET_REPO")
     tavily_api_key: Optional[str] = Field(default=None, env="TAVILY_API_KEY")
     serpapi_api_key: Optional[str] = Field(default=None, env="SERPAPI_API_KEY")
+    # Seconds a paid search provider gets before the free fallback is raced against it;
+    # unset means the fallback only runs once the provider fails or finds nothing.
+    search_hedge_delay: Optional[float] = Field(default=None, env="SEARCH_HEDGE_DELAY")
 
     # Translation API keys
     microsoft_translator_key: Optional[str] = Field(default=None, env="MICROSOFT_TRANSLATOR_KEY")
@@ -1,3 +0,0 @@
-from __future__ import annotations
-
-
@@ -49,6 +49,7 @@ logger = logging.getLogger(__name__)
 
 _catalog_lock = threading.Lock()
 _catalog_cache: Optional[_PersonaCatalog] = None
+_catalog_version = 0
 
 
 # ---------------------------------------------------------------------------
@@ -56,6 +57,13 @@ _catalog_cache: Optional[_PersonaCatalog] = None
 # ---------------------------------------------------------------------------
 
 
+def _replace_catalog(catalog: _PersonaCatalog) -> None:
+    """Swap in a new catalogue and bump its version. Caller holds ``_catalog_lock``."""
+    global _catalog_cache, _catalog_version
+    _catalog_cache = catalog
+    _catalog_version += 1
+
+
 def _invalidate_persona_loader_cache() -> None:
     """Try to clear cached persona bundles after catalogue changes."""
     try:
@@ -154,7 +162,6 @@ def _write_catalog_to_disk(personas: Dict[str, PersonaMetadata], categories: Dic
 
 
 def _get_catalog(force_reload: bool = False) -> _PersonaCatalog:
-    global _catalog_cache
     path = _catalog_path()
     mtime = path.stat().st_mtime if path.exists() else 0
 
@@ -164,10 +171,16 @@ def _get_catalog(force_reload: bool = False) -> _PersonaCatalog:
             or _catalog_cache is None
             or _catalog_cache.mtime != mtime
         ):
-            _catalog_cache = _load_catalog_from_disk()
+            _replace_catalog(_load_catalog_from_disk())
         return _catalog_cache
 
 
+def persona_catalog_version() -> int:
+    """Return a counter that changes whenever the persona catalogue is reloaded or edited."""
+    _get_catalog()
+    return _catalog_version
+
+
 def refresh_persona_cache(force: bool = True) -> None:
     """Reload persona definitions from disk."""
     _get_catalog(force_reload=force)
@@ -356,11 +369,12 @@ def upsert_persona(definition: Dict[str, object], persist: bool = True) -> Perso
             _write_catalog_to_disk(personas, categories)
             refresh_persona_cache(force=True)
         else:
-            global _catalog_cache
-            _catalog_cache = _PersonaCatalog(
-                personas=personas,
-                categories=categories,
-                mtime=_catalog_path().stat().st_mtime,
+            _replace_catalog(
+                _PersonaCatalog(
+                    personas=personas,
+                    categories=categories,
+                    mtime=_catalog_path().stat().st_mtime,
+                )
             )
     _invalidate_persona_loader_cache()
     return new_meta
@@ -380,11 +394,12 @@ def remove_persona(persona_id: str, persist: bool = True) -> None:
             _write_catalog_to_disk(personas, categories)
             refresh_persona_cache(force=True)
         else:
-            global _catalog_cache
-            _catalog_cache = _PersonaCatalog(
-                personas=personas,
-                categories=categories,
-                mtime=_catalog_path().stat().st_mtime,
+            _replace_catalog(
+                _PersonaCatalog(
+                    personas=personas,
+                    categories=categories,
+                    mtime=_catalog_path().stat().st_mtime,
+                )
             )
 
     # Optionally clean up empty categories (only when persisting)
@@ -413,6 +428,7 @@ __all__ = [
     "persona_metadata_dict",
     "resolve_allowed_model_ids",
     "persona_payload",
+    "persona_catalog_version",
     "refresh_persona_cache",
     "upsert_persona",
     "remove_persona",
@@ -127,12 +127,23 @@ class ContextBuilder:
         history_plain.append({"role": "user", "content": user_text})
         truncated = safe_truncate_messages(history_plain, model, max_prompt_tokens)
 
+        # The static persona prompt and the history form a prefix that repeats from
+        # turn to turn (and hits OpenAI's prompt cache); per-turn context goes last.
         formatted: List[Dict] = [
             {
                 "role": "system",
                 "content": [{"type": "input_text", "text": persona_context}],
             }
         ]
+        for message in truncated:
+            role = message.get("role", "user")
+            content_type = "output_text" if role == "assistant" else "input_text"
+            formatted.append(
+                {
+                    "role": role,
+                    "content": [{"type": content_type, "text": message.get("content", "")}],
+                }
+            )
         if context_text:
             formatted.append(
                 {
@@ -147,15 +158,6 @@ class ContextBuilder:
                     "content": [{"type": "input_text", "text": memory_text}],
                 }
             )
-        for message in truncated:
-            role = message.get("role", "user")
-            content_type = "output_text" if role == "assistant" else "input_text"
-            formatted.append(
-                {
-                    "role": role,
-                    "content": [{"type": content_type, "text": message.get("content", "")}],
-                }
-            )
         return formatted
 
 
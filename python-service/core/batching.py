@@ -0,0 +1,170 @@
+"""
+Dynamic request batching for local PyTorch generation
+
+Concurrent chat requests are collected for a short window and forwarded to
+the model manager as a single batched ``generate()`` call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from operator import itemgetter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from core.pytorch_manager import get_pytorch_manager
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = int(os.getenv("GENERATION_MAX_BATCH", "32"))
+MAX_BATCH_DELAY = float(os.getenv("GENERATION_BATCH_DELAY_MS", "10")) / 1000.0
+
+# (prompt, model id, generation kwargs, future)
+_PendingItem = Tuple[str, Optional[str], Dict[str, Any], "asyncio.Future[str]"]
+
+
+def _group_key(model_id: Optional[str], generation_kwargs: Dict[str, Any]) -> Hashable:
+    """Key of the requests that may share a forward pass: same model, same parameters."""
+    items = tuple(sorted(generation_kwargs.items(), key=itemgetter(0)))
+    try:
+        hash(items)
+    except TypeError:
+        # e.g. a list of stop sequences; equal parameters still repr the same
+        items = repr(items)
+    return model_id, items
+
+
+def _fail(items: Iterable[_PendingItem], exc: BaseException) -> None:
+    for *_, future in items:
+        if not future.done():
+            future.set_exception(exc)
+
+
+class GenerationBatcher:
+    """Queue prompts and run them through the model manager in batches."""
+
+    def __init__(self, max_batch: int = MAX_BATCH, max_delay: float = MAX_BATCH_DELAY):
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.pytorch_manager = get_pytorch_manager()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Requests taken off the queue and not yet answered, so stop() can fail them.
+        self._in_flight: List[_PendingItem] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the batching loop on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            "Generation batcher started (max_batch=%s, delay=%.0fms)",
+            self.max_batch,
+            self.max_delay * 1000,
+        )
+
+    async def stop(self) -> None:
+        """Cancel the batching loop and fail any requests still queued or in flight."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        stopped = RuntimeError("Generation batcher stopped")
+        _fail(self._in_flight, stopped)
+        self._in_flight = []
+        while self._queue is not None and not self._queue.empty():
+            _fail([self._queue.get_nowait()], stopped)
+        self._queue = None
+
+    async def submit(self, prompt: str, model_id: Optional[str] = None, **generation_kwargs: Any) -> str:
+        """Generate a response for ``prompt``, batched with concurrent callers.
+
+        ``model_id`` pins generation to that loaded model; without it the
+        manager's current model is used when the batch runs.
+        """
+        if not self.running:
+            return await asyncio.to_thread(
+                self.pytorch_manager.generate_response, prompt, model_id=model_id, **generation_kwargs
+            )
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, model_id, generation_kwargs, future))
+        return await future
+
+    async def _collect(self, batch: List[_PendingItem]) -> None:
+        batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self) -> None:
+        while True:
+            # Left in place on cancellation so stop() can fail these requests.
+            batch: List[_PendingItem] = []
+            self._in_flight = batch
+            try:
+                await self._collect(batch)
+                await self._run_batch(batch)
+            except Exception as exc:
+                # Never let one bad batch end the loop and strand later requests.
+                logger.exception("Generation batch failed")
+                _fail(batch, exc)
+            self._in_flight = []
+
+    async def _run_batch(self, batch: List[_PendingItem]) -> None:
+        # Only prompts for the same model and generation parameters can share a forward pass.
+        groups: Dict[Hashable, List[_PendingItem]] = {}
+        for item in batch:
+            try:
+                key = _group_key(item[1], item[2])
+            except Exception as exc:
+                _fail([item], exc)
+                continue
+            groups.setdefault(key, []).append(item)
+
+        for items in groups.values():
+            prompts = [prompt for prompt, _, _, _ in items]
+            _, model_id, generation_kwargs, _ = items[0]
+            try:
+                responses = await asyncio.to_thread(
+                    self.pytorch_manager.generate_batch,
+                    prompts,
+                    model_id=model_id,
+                    **generation_kwargs,
+                )
+            except Exception as exc:
+                _fail(items, exc)
+                continue
+            for (*_, future), response in zip(items, responses):
+                if not future.done():
+                    future.set_result(response)
+
+
+_batcher: Optional[GenerationBatcher] = None
+
+
+def get_generation_batcher() -> GenerationBatcher:
+    """Get the global generation batcher"""
+    global _batcher
+    if _batcher is None:
+        _batcher = GenerationBatcher()
+    return _batcher
+
+
+__all__ = ["GenerationBatcher", "get_generation_batcher", "MAX_BATCH", "MAX_BATCH_DELAY"]
@@ -15,6 +15,7 @@ from app.persona_registry import (
     resolve_allowed_model_ids,
 )
 from app.personas import load_persona_bundle
+from core.batching import get_generation_batcher
 from core.pytorch_manager import get_pytorch_manager
 from tools.internet_access import get_internet_manager
 
@@ -50,10 +51,10 @@ class EnhancedChatEngine:
                 with open(mapping_file, 'r') as f:
                     return json.load(f)
             else:
-                logger.warning(f"Persona model mapping file not found: {mapping_file}")
+                logger.warning("Persona model mapping file not found: %s", mapping_file)
                 return {"mappings": {}, "fallback_chain": ["local_pytorch", "local_gguf", "api"]}
         except Exception as e:
-            logger.error(f"Error loading persona model mapping: {e}")
+            logger.error("Error loading persona model mapping: %s", e)
             return {"mappings": {}, "fallback_chain": ["local_pytorch", "local_gguf", "api"]}
 
     def _select_model_for_persona(self, persona_id: str, requested_model_id: Optional[str] = None) -> str:
@@ -69,7 +70,7 @@ class EnhancedChatEngine:
         """
         # If model explicitly requested, use it
         if requested_model_id and requested_model_id != "auto":
-            logger.info(f"Using explicitly requested model: {requested_model_id}")
+            logger.info("Using explicitly requested model: %s", requested_model_id)
             return requested_model_id
 
         # Get persona mapping
@@ -78,24 +79,24 @@ class EnhancedChatEngine:
         if not persona_mapping:
             # Use default model from environment
             default_model = os.getenv("DEFAULT_MODEL", "nous-hermes-2-mistral-7b-gptq")
-            logger.info(f"No mapping for persona {persona_id}, using default: {default_model}")
+            logger.info("No mapping for persona %s, using default: %s", persona_id, default_model)
             return default_model
 
         # Try primary model first
         primary_model = persona_mapping.get("primary")
         if primary_model and self._is_model_available(primary_model):
-            logger.info(f"Using primary model for {persona_id}: {primary_model}")
+            logger.info("Using primary model for %s: %s", persona_id, primary_model)
             return primary_model
 
         # Try alternatives
         for alt_model in persona_mapping.get("alternatives", []):
             if self._is_model_available(alt_model):
-                logger.info(f"Using alternative model for {persona_id}: {alt_model}")
+                logger.info("Using alternative model for %s: %s", persona_id, alt_model)
                 return alt_model
 
         # Use fallback (API model)
         fallback = persona_mapping.get("fallback", "openai")
-        logger.info(f"Using fallback model for {persona_id}: {fallback}")
+        logger.info("Using fallback model for %s: %s", persona_id, fallback)
         return fallback
 
     def _is_model_available(self, model_id: str) -> bool:
@@ -103,10 +104,29 @@ class EnhancedChatEngine:
         # Check if model exists in config (not just loaded models)
         return model_id in self.pytorch_manager.config.get("models", {})
 
-    def preload_models(self, model_ids: List[str]):
+    def preload_model(self, model_id: str) -> bool:
+        """Load a single model, logging rather than raising on failure"""
+        try:
+            logger.info("Preloading model: %s", model_id)
+            # Compile only here: the warmup below pays for it before any request does.
+            loaded = self.pytorch_manager.load_model(model_id, compile=True)
+            if loaded:
+                self.pytorch_manager.warmup(model_id)
+                logger.info("Successfully preloaded model: %s", model_id)
+            return loaded
+        except Exception as e:
+            logger.error("Failed to preload model %s: %s", model_id, e)
+            return False
+
+    async def preload_models(self, model_ids: List[str]):
         """
         Preload specified PyTorch models at startup
 
+        Models load one at a time, in the listed order, on a worker thread so the
+        event loop stays free. PyTorchModelManager.load_model is not thread-safe:
+        it swaps ``current_model`` and moves weights onto the device with no
+        memory check between concurrent loads.
+
         Args:
             model_ids: List of model IDs to preload (e.g., ['openhermes-2.5-mistral-7b-gptq'])
         """
@@ -114,14 +134,12 @@ class EnhancedChatEngine:
             logger.info("No models configured for preloading")
             return
 
-        logger.info(f"Preloading {len(model_ids)} model(s): {', '.join(model_ids)}")
+        logger.info("Preloading %s model(s): %s", len(model_ids), ', '.join(model_ids))
+        await asyncio.to_thread(self._preload_in_order, model_ids)
+
+    def _preload_in_order(self, model_ids: List[str]) -> None:
         for model_id in model_ids:
-            try:
-                logger.info(f"Preloading model: {model_id}")
-                self.pytorch_manager.load_model(model_id)
-                logger.info(f"Successfully preloaded model: {model_id}")
-            except Exception as e:
-                logger.error(f"Failed to preload model {model_id}: {e}")
+            self.preload_model(model_id)
     
     def _detect_internet_need(self, message: str) -> bool:
         """Detect if message requires internet search"""
@@ -164,7 +182,7 @@ class EnhancedChatEngine:
         for candidate in fallback_priority:
             if candidate != failed_model and candidate in allowed_models:
                 if self._is_model_available(candidate):
-                    logger.info(f"Found fallback model: {candidate}")
+                    logger.info("Found fallback model: %s", candidate)
                     return candidate
 
         logger.warning("No fallback model available")
@@ -200,18 +218,18 @@ class EnhancedChatEngine:
 
         # Verify selected model is allowed
         if selected in allowed_models:
-            logger.info(f"✓ Selected LOCAL model '{selected}' for persona '{persona_meta.id}'")
+            logger.info("✓ Selected LOCAL model '%s' for persona '%s'", selected, persona_meta.id)
             return selected, allowed_models
 
         # If not in allowed list, try to find first available local model (not API)
         for candidate in allowed_models:
             if candidate != "auto" and candidate != "openai":
-                logger.info(f"✓ Fallback to available LOCAL model: '{candidate}'")
+                logger.info("✓ Fallback to available LOCAL model: '%s'", candidate)
                 return candidate, allowed_models
 
         # Last resort: use API model if no local models available
         if "openai" in allowed_models:
-            logger.warning(f"⚠ No local models available, using API fallback: openai")
+            logger.warning("⚠ No local models available, using API fallback: openai")
             return "openai", allowed_models
 
         # Fallback to global default
@@ -225,7 +243,7 @@ class EnhancedChatEngine:
                 persona_context = f"You are {persona_name}. {persona_bundle}\n\n"
                 return persona_context + message
         except Exception as e:
-            logger.error(f"Error loading persona {persona_name}: {e}")
+            logger.error("Error loading persona %s: %s", persona_name, e)
         
         return message
     
@@ -248,7 +266,7 @@ class EnhancedChatEngine:
             if persona_bundle:
                 prompt_parts.append(f"PERSONA CONTEXT:\n{persona_bundle}\n")
         except Exception as e:
-            logger.error(f"Error loading persona: {e}")
+            logger.error("Error loading persona: %s", e)
         
         # Add current time information
         time_info = self.internet_manager.get_current_time_info()
@@ -371,7 +389,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
                     )
                     response_data["sources"] = self._extract_sources(internet_results)
                 except Exception as e:
-                    logger.warning(f"Internet search failed: {e}")
+                    logger.warning("Internet search failed: %s", e)
                     # Continue without internet
             
             # Create enhanced prompt
@@ -384,28 +402,29 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
             )
             
             # Generate response using PyTorch or OpenAI API model
+            openai_entry = self.pytorch_manager.models.get("openai")
             if self.pytorch_manager.current_model:
                 try:
-                    response_text = await asyncio.to_thread(
-                        self.pytorch_manager.generate_response,
+                    response_text = await get_generation_batcher().submit(
                         enhanced_prompt,
+                        model_id=selected_model_id,
                         **generation_kwargs,
                     )
                     response_data["response"] = response_text
                     response_data["model_used"] = selected_model_id or "pytorch"
                 except Exception as e:
-                    logger.error(f"PyTorch generation failed: {e}")
+                    logger.error("PyTorch generation failed: %s", e)
                     response_data["response"] = self._generate_fallback_response(message, persona_meta)
                     response_data["model_used"] = "fallback"
                     response_data["error"] = f"PyTorch error: {str(e)}"
-            elif self.pytorch_manager.models.get("openai", {}).get("loaded", False):
+            elif openai_entry is not None and openai_entry.loaded:
                 # Use OpenAI API for response (OpenAI 1.0+ API)
                 try:
                     from openai import OpenAI
                     client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
                     completion = await asyncio.to_thread(
                         client.chat.completions.create,
-                        model=self.pytorch_manager.models['openai']['config']['model_name'],
+                        model=openai_entry.config['model_name'],
                         messages=[{"role": "user", "content": enhanced_prompt}],
                         max_tokens=generation_kwargs.get('max_new_tokens', 1024),
                         temperature=generation_kwargs.get('temperature', 0.7),
@@ -415,15 +434,15 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
                     response_data["response"] = response_text
                     response_data["model_used"] = selected_model_id or "openai"
                 except Exception as e:
-                    logger.error(f"OpenAI API generation failed: {e}")
+                    logger.error("OpenAI API generation failed: %s", e)
                     # Check if it's a token/quota error and try fallback
                     if self._is_token_limit_error(str(e)):
-                        logger.warning(f"Token limit error detected for OpenAI, attempting fallback...")
+                        logger.warning("Token limit error detected for OpenAI, attempting fallback...")
                         fallback_model = self._get_fallback_model("openai", allowed_models)
                         if fallback_model:
                             response_data["model_switched"] = True
                             response_data["fallback_reason"] = "OpenAI token/quota limit exceeded"
-                            logger.info(f"Switching to fallback model: {fallback_model}")
+                            logger.info("Switching to fallback model: %s", fallback_model)
                             # Recursive call with fallback model
                             fallback_result = await self.generate_response(
                                 message, persona_name, use_internet, fallback_model, history, **generation_kwargs
@@ -449,7 +468,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
                     model_config = self.pytorch_manager.config.get("models", {}).get(selected_model_id, {})
                     openrouter_model_name = model_config.get("model_name", "mistralai/mistral-7b-instruct:free")
 
-                    logger.info(f"Using OpenRouter free model: {openrouter_model_name}")
+                    logger.info("Using OpenRouter free model: %s", openrouter_model_name)
 
                     headers = {
                         "Authorization": f"Bearer {openrouter_api_key}",
@@ -478,17 +497,17 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
                     response_text = result["choices"][0]["message"]["content"]
                     response_data["response"] = response_text
                     response_data["model_used"] = selected_model_id
-                    logger.info(f"✓ OpenRouter response generated successfully with {openrouter_model_name}")
+                    logger.info("✓ OpenRouter response generated successfully with %s", openrouter_model_name)
                 except Exception as e:
-                    logger.error(f"OpenRouter API generation failed: {e}")
+                    logger.error("OpenRouter API generation failed: %s", e)
                     # Check if it's a token/quota error and try fallback
                     if self._is_token_limit_error(str(e)):
-                        logger.warning(f"Token limit error detected for {selected_model_id}, attempting fallback...")
+                        logger.warning("Token limit error detected for %s, attempting fallback...", selected_model_id)
                         fallback_model = self._get_fallback_model(selected_model_id, allowed_models)
                         if fallback_model:
                             response_data["model_switched"] = True
                             response_data["fallback_reason"] = f"{selected_model_id} rate limit exceeded"
-                            logger.info(f"Switching to fallback model: {fallback_model}")
+                            logger.info("Switching to fallback model: %s", fallback_model)
                             # Recursive call with fallback model
                             fallback_result = await self.generate_response(
                                 message, persona_name, use_internet, fallback_model, history, **generation_kwargs
@@ -559,13 +578,13 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
             persona_bundle = load_persona_bundle([persona_name])
             if persona_bundle:
                 self.current_persona = persona_name
-                logger.info(f"Persona set to: {persona_name}")
+                logger.info("Persona set to: %s", persona_name)
                 return True
             else:
-                logger.error(f"Persona {persona_name} not found")
+                logger.error("Persona %s not found", persona_name)
                 return False
         except Exception as e:
-            logger.error(f"Error setting persona: {e}")
+            logger.error("Error setting persona: %s", e)
             return False
     
     def switch_model(self, model_id: str) -> bool:
@@ -573,7 +592,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
         try:
             return self.pytorch_manager.load_model(model_id)
         except Exception as e:
-            logger.error(f"Error switching model: {e}")
+            logger.error("Error switching model: %s", e)
             return False
     
     def get_system_status(self) -> Dict[str, Any]:
@@ -590,7 +609,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
                 'system_time': datetime.now().isoformat()
             }
         except Exception as e:
-            logger.error(f"Error getting system status: {e}")
+            logger.error("Error getting system status: %s", e)
             return {'error': str(e)}
     
     def clear_context(self):
@@ -603,7 +622,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
         try:
             return await asyncio.to_thread(self.internet_manager.comprehensive_search, query)
         except Exception as e:
-            logger.error(f"Manual internet search failed: {e}")
+            logger.error("Manual internet search failed: %s", e)
             return {'error': str(e)}
     
     @staticmethod
@@ -639,7 +658,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
         try:
             return self.pytorch_manager.list_available_models()
         except Exception as e:
-            logger.error(f"Error getting available models: {e}")
+            logger.error("Error getting available models: %s", e)
             return []
     
     def prepare_model_for_training(self, model_id: str) -> bool:
@@ -647,7 +666,7 @@ Be helpful, engaging, and maintain the personality characteristics of {persona_l
         try:
             return self.pytorch_manager.prepare_for_finetuning(model_id)
         except Exception as e:
-            logger.error(f"Error preparing model for training: {e}")
+            logger.error("Error preparing model for training: %s", e)
             return False
 
 # Global instance
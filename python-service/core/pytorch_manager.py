@@ -7,10 +7,13 @@ import os
 import json
 import logging
 import signal
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 
 try:
     import torch
@@ -36,9 +39,36 @@ except ImportError:  # pragma: no cover - optional runtime dependency
     AutoModelForCausalLM = None  # type: ignore[assignment]
     AutoConfig = None  # type: ignore[assignment]
     BitsAndBytesConfig = None  # type: ignore[assignment]
+try:
+    from torchao.quantization import int8_dynamic_activation_int8_weight, quantize_
+except ImportError:  # pragma: no cover - optional runtime dependency
+    int8_dynamic_activation_int8_weight = None  # type: ignore[assignment]
+    quantize_ = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+# Loads tokenizers while load_model deserialises the weights on the calling thread.
+_TOKENIZER_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tokenizer-load")
+
+
+@dataclass(slots=True)
+class LoadedModel:
+    """A model registered with the manager (local PyTorch weights or an API-backed entry)."""
+
+    model: Any
+    tokenizer: Any
+    config: Dict[str, Any]
+    loaded: bool = False
+    load_time: str = ""
+    path: Optional[str] = None
+    api: bool = False
+    capabilities: List[str] = field(default_factory=list)
+    modalities: List[str] = field(default_factory=lambda: ["text"])
+    peft_model: Any = None
+    peft_config: Any = None
+    finetuning_ready: bool = False
+
+
 class PyTorchModelManager:
     """
     Manages PyTorch models for Ashley AI with support for:
@@ -47,7 +77,7 @@ class PyTorchModelManager:
     - Fine-tuning preparation
     - Memory optimization
     """
-    
+
     def __init__(self, config_path: str = "pytorch_models.json"):
         self.repo_regular = os.getenv("HF_REPO_REGULAR")
         self.repo_nsfw = os.getenv("HF_REPO_NSFW")
@@ -55,7 +85,8 @@ class PyTorchModelManager:
         self.repo_gguf_nsfw = os.getenv("HF_REPO_GGUF_NSFW")
         self.config_path = config_path
         self.config = {"models": {}}  # Initialize config as a dict
-        self.models: Dict[str, Dict] = {}
+        self.models: Dict[str, LoadedModel] = {}
+        self._models_version = 0
         self.current_model = None
         self.current_tokenizer = None
         self.torch_available = torch is not None
@@ -76,7 +107,17 @@ class PyTorchModelManager:
         cache_dir = self.config.get("cache_dir") or "./.cache/models"
         self.cache_dir = Path(cache_dir).expanduser().resolve()
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Inductor artifacts persist here so torch.compile is not paid again after a restart.
+        compile_cache_dir = self.config.get("compile_cache_dir") or self.cache_dir.parent / "torch_compile"
+        self.compile_cache_dir = Path(compile_cache_dir).expanduser().resolve()
     
+    @cached_property
+    def gpu_total_memory_bytes(self) -> Optional[int]:
+        """Total memory of CUDA device 0 (queried once; ``None`` without CUDA)."""
+        if torch is None or not torch.cuda.is_available():
+            return None
+        return torch.cuda.get_device_properties(0).total_memory
+
     def _get_optimal_device(self) -> str:
         """Determine the best device for inference"""
         if torch is None:
@@ -88,8 +129,8 @@ class PyTorchModelManager:
             logger.info("FORCE_CPU enabled - using CPU")
             return "cpu"
 
-        if torch.cuda.is_available():
-            gpu_memory = torch.cuda.get_device_properties(0).total_memory / 1024**3
+        if self.gpu_total_memory_bytes is not None:
+            gpu_memory = self.gpu_total_memory_bytes / 1024**3
             logger.info(f"CUDA available - GPU memory: {gpu_memory:.1f}GB")
             return "cuda"
         elif hasattr(torch.backends, 'mps') and torch.backends.mps.is_available():
@@ -164,7 +205,7 @@ class PyTorchModelManager:
                 self.config = default_config
                 self.save_config()
         except Exception as e:
-            logger.error(f"Error loading config: {e}")
+            logger.error("Error loading config: %s", e)
             self.config = default_config
 
         self.config.setdefault("models", {})
@@ -231,7 +272,7 @@ class PyTorchModelManager:
             with open(self.config_path, 'w') as f:
                 json.dump(self.config, f, indent=2)
         except Exception as e:
-            logger.error(f"Error saving config: {e}")
+            logger.error("Error saving config: %s", e)
     
     def get_quantization_config(self, quantization: str) -> Optional[BitsAndBytesConfig]:
         """Get quantization configuration"""
@@ -252,24 +293,91 @@ class PyTorchModelManager:
             )
         return None
     
-    def load_model(self, model_id: str, force_reload: bool = False) -> bool:
+    def _quant_mode(self) -> str:
+        """Resolve QUANT_MODE (auto|bf16|int8|none); auto is bf16 on CUDA and int8 on CPU."""
+        mode = os.getenv("QUANT_MODE", "auto").strip().lower()
+        if mode not in {"auto", "bf16", "int8", "none"}:
+            logger.warning("Unknown QUANT_MODE '%s'; falling back to auto", mode)
+            mode = "auto"
+        if mode == "auto":
+            if self.device == "cuda" and torch.cuda.is_bf16_supported():
+                return "bf16"
+            if self.device == "cpu":
+                return "int8"
+            return "none"
+        return mode
+
+    def _quantize_int8(self, model):
+        """Apply int8 dynamic activation/weight quantization to Linear layers."""
+        if quantize_ is None or int8_dynamic_activation_int8_weight is None:
+            logger.debug("torchao not installed; serving model without int8 quantization.")
+            return model
+        try:
+            quantize_(model, int8_dynamic_activation_int8_weight())
+            logger.info("Applied torchao int8 dynamic quantization")
+        except Exception as exc:
+            logger.warning("int8 quantization failed; continuing with unquantized weights: %s", exc)
+        return model
+
+    def _compile_model(self, model):
+        """Compile the model's forward pass with torch.compile unless disabled via TORCH_COMPILE=0."""
+        if os.getenv("TORCH_COMPILE", "1") != "1" or not hasattr(torch, "compile"):
+            return model
+        # Inductor reads its cache location from the environment when it compiles;
+        # an explicit TORCHINDUCTOR_CACHE_DIR still wins.
+        os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(self.compile_cache_dir))
+        if self.device == "mps":
+            logger.debug("Skipping torch.compile on MPS")
+            return model
+        # Models load on demand, so the default keeps cold loads fast; "max-autotune"
+        # spends minutes benchmarking kernels and is opt-in via TORCH_COMPILE_MODE.
+        mode = os.getenv("TORCH_COMPILE_MODE", "default")
+        try:
+            # Compile forward only so generate(), PEFT wrapping and attribute access keep working.
+            model.forward = torch.compile(model.forward, mode=mode, dynamic=True)
+            logger.info("Compiled model forward with torch.compile (mode=%s)", mode)
+        except Exception as exc:
+            logger.warning("torch.compile failed; continuing in eager mode: %s", exc)
+        return model
+
+    def warmup(self, model_id: str) -> None:
+        """Run a one-token generation so compilation happens before the first real request."""
+        entry = self.models.get(model_id)
+        if entry is None or entry.api or entry.model is None or torch is None:
+            return
+        try:
+            encoded = entry.tokenizer("Hello", return_tensors="pt")
+            inputs = {name: tensor.to(entry.model.device) for name, tensor in encoded.items()}
+            with torch.no_grad():
+                entry.model.generate(
+                    **inputs,
+                    max_new_tokens=1,
+                    pad_token_id=entry.tokenizer.eos_token_id,
+                )
+            logger.info("Warmed up model %s", model_id)
+        except Exception as exc:
+            logger.warning("Warmup for model %s failed: %s", model_id, exc)
+
+    def load_model(self, model_id: str, force_reload: bool = False, compile: bool = False) -> bool:
         """
         Load a PyTorch model with optimizations
         
         Args:
             model_id: Model identifier from config
             force_reload: Force reload even if already loaded
+            compile: Compile the forward pass with torch.compile; meant for preloads,
+                since compiling stalls the first generation for a while
             
         Returns:
             bool: Success status
         """
         if not force_reload and self.current_model and model_id in self.models:
-            if self.models[model_id].get("loaded", False):
-                logger.info(f"Model {model_id} already loaded")
+            if self.models[model_id].loaded:
+                logger.info("Model %s already loaded", model_id)
                 return True
         
         if model_id not in self.config["models"]:
-            logger.error(f"Model {model_id} not found in config")
+            logger.error("Model %s not found in config", model_id)
             return False
         
         model_config = self.config["models"][model_id]
@@ -279,17 +387,18 @@ class PyTorchModelManager:
         if model_id == "openai" or model_id.startswith("openrouter-"):
             provider = "OpenRouter" if model_id.startswith("openrouter-") else "OpenAI"
             model_type = "Image Generation" if model_config.get("format") == "openrouter-image" else "Chat"
-            logger.info(f"Configuring {provider} API-based {model_type} model (no local loading): {model_id}")
-            self.models[model_id] = {
-                "model": None,
-                "tokenizer": None,
-                "config": model_config,
-                "loaded": True,
-                "load_time": datetime.now().isoformat(),
-                "api": True,
-                "capabilities": model_config.get("capabilities", []),
-                "modalities": model_config.get("modalities", ["text"])
-            }
+            logger.info("Configuring %s API-based %s model (no local loading): %s", provider, model_type, model_id)
+            self.models[model_id] = LoadedModel(
+                model=None,
+                tokenizer=None,
+                config=model_config,
+                loaded=True,
+                load_time=datetime.now().isoformat(),
+                api=True,
+                capabilities=model_config.get("capabilities", []),
+                modalities=model_config.get("modalities", ["text"]),
+            )
+            self._models_version += 1
             self.current_model = None
             self.current_tokenizer = None
             return True
@@ -308,13 +417,13 @@ class PyTorchModelManager:
             return False
 
         try:
-            logger.info(f"Loading model: {model_name}")
+            logger.info("Loading model: %s", model_name)
 
             local_dir = self._resolve_model_artifacts(model_id, model_config)
 
-            tokenizer = AutoTokenizer.from_pretrained(local_dir)
-            if tokenizer.pad_token is None:
-                tokenizer.pad_token = tokenizer.eos_token
+            # The tokenizer is independent of the weights, so load it on a
+            # worker thread while the (much slower) model deserialises.
+            tokenizer_future = _TOKENIZER_EXECUTOR.submit(AutoTokenizer.from_pretrained, local_dir)
 
             quantization_config = self.get_quantization_config(
                 model_config.get("quantization", "none")
@@ -322,11 +431,17 @@ class PyTorchModelManager:
 
             if torch is None:
                 raise RuntimeError("PyTorch is required for loading local models but is not available.")
-            # Use float16 for CUDA and MPS, float32 for CPU only
-            use_float16 = torch.cuda.is_available() or (hasattr(torch.backends, 'mps') and torch.backends.mps.is_available())
-            preferred_dtype = torch.float16 if use_float16 else torch.float32
+            quant_mode = "none" if quantization_config else self._quant_mode()
+            # Use float16 for CUDA and MPS, float32 for CPU only, unless bf16 is selected.
+            # Placement follows self.device, so FORCE_CPU keeps weights off a present GPU.
+            on_cuda = self.device == "cuda"
+            use_float16 = self.device in ("cuda", "mps")
+            if quant_mode == "bf16":
+                preferred_dtype = torch.bfloat16
+            else:
+                preferred_dtype = torch.float16 if use_float16 else torch.float32
             base_kwargs = {
-                "device_map": "auto" if torch.cuda.is_available() else None,
+                "device_map": "auto" if on_cuda else None,
                 "trust_remote_code": True,
                 "low_cpu_mem_usage": True,  # Optimize memory usage
             }
@@ -354,17 +469,26 @@ class PyTorchModelManager:
                 else:
                     raise
 
-            if not torch.cuda.is_available():
+            if not on_cuda:
                 model = model.to(self.device)
+            if quant_mode == "int8":
+                model = self._quantize_int8(model)
+            if compile and not quantization_config:
+                model = self._compile_model(model)
 
-            self.models[model_id] = {
-                "model": model,
-                "tokenizer": tokenizer,
-                "config": model_config,
-                "loaded": True,
-                "load_time": datetime.now().isoformat(),
-                "path": local_dir,
-            }
+            tokenizer = tokenizer_future.result()
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+
+            self.models[model_id] = LoadedModel(
+                model=model,
+                tokenizer=tokenizer,
+                config=model_config,
+                loaded=True,
+                load_time=datetime.now().isoformat(),
+                path=local_dir,
+            )
+            self._models_version += 1
 
             self.current_model = model
             self.current_tokenizer = tokenizer
@@ -373,15 +497,32 @@ class PyTorchModelManager:
             return True
 
         except Exception as e:
-            logger.error(f"Error loading model {model_id}: {e}")
+            logger.error("Error loading model %s: %s", model_id, e)
             return False
     
+    def _generation_target(self, model_id: Optional[str]) -> Tuple[Any, Any]:
+        """Model and tokenizer to generate with: ``model_id``'s when given, else the current pair.
+
+        Naming the model keeps a request on the weights it loaded even if another
+        request switches ``current_model`` before this one runs.
+        """
+        if model_id is None:
+            model, tokenizer = self.current_model, self.current_tokenizer
+            if model is None or tokenizer is None:
+                raise ValueError("No model loaded. Call load_model() first.")
+            return model, tokenizer
+        entry = self.models.get(model_id)
+        if entry is None or entry.model is None or entry.tokenizer is None:
+            raise ValueError(f"Model {model_id} is not loaded. Call load_model() first.")
+        return entry.model, entry.tokenizer
+
     def generate_response(
         self, 
         prompt: str, 
         max_new_tokens: int = None,
         temperature: float = None,
         top_p: float = None,
+        model_id: Optional[str] = None,
         **kwargs
     ) -> str:
         """
@@ -392,13 +533,13 @@ class PyTorchModelManager:
             max_new_tokens: Maximum tokens to generate
             temperature: Sampling temperature
             top_p: Top-p sampling
+            model_id: Loaded model to use instead of the current one
             **kwargs: Additional generation parameters
             
         Returns:
             str: Generated response
         """
-        if not self.current_model or not self.current_tokenizer:
-            raise ValueError("No model loaded. Call load_model() first.")
+        model, tokenizer = self._generation_target(model_id)
         if torch is None:
             raise RuntimeError("PyTorch is not available; cannot generate responses.")
         
@@ -414,11 +555,13 @@ class PyTorchModelManager:
 
         # Set pad_token_id if not already set
         if gen_config.get("pad_token_id") is None:
-            gen_config["pad_token_id"] = self.current_tokenizer.eos_token_id
+            gen_config["pad_token_id"] = tokenizer.eos_token_id
 
         try:
             # Tokenize input
-            inputs = self.current_tokenizer(
+            # Device copies come from the CUDA caching allocator, which already
+            # reuses freed blocks across prompt lengths.
+            inputs = tokenizer(
                 prompt,
                 return_tensors="pt",
                 truncation=True,
@@ -429,30 +572,112 @@ class PyTorchModelManager:
             if torch is None:
                 raise RuntimeError("PyTorch is not available; cannot run inference.")
 
-            logger.info(f"Starting generation with model on device: {self.device}")
+            prompt_length = inputs["input_ids"].shape[1]
+
+            logger.debug("Starting generation with model on device: %s", self.device)
             with torch.no_grad():
                 try:
-                    outputs = self.current_model.generate(
+                    outputs = model.generate(
                         **inputs,
                         **gen_config
                     )
-                    logger.info("Generation completed successfully")
+                    logger.debug("Generation completed successfully")
                 except Exception as gen_error:
-                    logger.error(f"Model.generate() failed: {gen_error}")
+                    logger.error("Model.generate() failed: %s", gen_error)
                     raise RuntimeError(f"Model generation failed: {str(gen_error)}")
 
             # Decode response
-            response = self.current_tokenizer.decode(
-                outputs[0][inputs['input_ids'].shape[1]:],
+            response = tokenizer.decode(
+                outputs[0][prompt_length:],
                 skip_special_tokens=True
             )
 
             return response.strip()
 
         except Exception as e:
-            logger.error(f"Error generating response: {e}")
+            logger.error("Error generating response: %s", e)
             raise RuntimeError(f"PyTorch generation error: {str(e)}")
-    
+
+    def generate_batch(
+        self,
+        prompts: List[str],
+        max_new_tokens: int = None,
+        temperature: float = None,
+        top_p: float = None,
+        model_id: Optional[str] = None,
+        **kwargs
+    ) -> List[str]:
+        """
+        Generate responses for several prompts in a single forward pass
+
+        Prompts are left-padded so every sequence ends at the same position
+        and generation continues directly after each prompt.
+
+        Args:
+            prompts: Input texts sharing the same generation parameters
+            max_new_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            top_p: Top-p sampling
+            model_id: Loaded model to use instead of the current one
+            **kwargs: Additional generation parameters
+
+        Returns:
+            List[str]: Generated responses, in the same order as ``prompts``
+        """
+        if not prompts:
+            return []
+        if len(prompts) == 1:
+            return [
+                self.generate_response(
+                    prompts[0], max_new_tokens, temperature, top_p, model_id=model_id, **kwargs
+                )
+            ]
+        model, tokenizer = self._generation_target(model_id)
+        if torch is None:
+            raise RuntimeError("PyTorch is not available; cannot generate responses.")
+
+        gen_config = self.config["inference_config"].copy()
+        if max_new_tokens:
+            gen_config["max_new_tokens"] = max_new_tokens
+        if temperature:
+            gen_config["temperature"] = temperature
+        if top_p:
+            gen_config["top_p"] = top_p
+        gen_config.update(kwargs)
+        if gen_config.get("pad_token_id") is None:
+            gen_config["pad_token_id"] = tokenizer.eos_token_id
+
+        padding_side = tokenizer.padding_side
+        try:
+            tokenizer.padding_side = "left"
+            encoded = tokenizer(
+                prompts,
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=2048
+            )
+        finally:
+            tokenizer.padding_side = padding_side
+
+        try:
+            inputs = {name: tensor.to(self.device) for name, tensor in encoded.items()}
+            prompt_length = inputs["input_ids"].shape[1]
+
+            logger.debug("Starting batched generation of %s prompts on device: %s", len(prompts), self.device)
+            with torch.no_grad():
+                outputs = model.generate(**inputs, **gen_config)
+
+            responses = tokenizer.batch_decode(
+                outputs[:, prompt_length:],
+                skip_special_tokens=True
+            )
+            return [response.strip() for response in responses]
+
+        except Exception as e:
+            logger.error("Error generating batched response: %s", e)
+            raise RuntimeError(f"PyTorch generation error: {str(e)}")
+
     def prepare_for_finetuning(
         self, 
         model_id: str,
@@ -478,10 +703,11 @@ class PyTorchModelManager:
             raise RuntimeError(
                 "peft is not installed; install the 'peft' package to enable fine-tuning features."
             )
-        if model_id not in self.models or not self.models[model_id].get("loaded"):
+        entry = self.models.get(model_id)
+        if entry is None or not entry.loaded:
             raise ValueError(f"Model {model_id} must be loaded before fine-tuning")
 
-        base_model = self.models[model_id]["model"]
+        base_model = entry.model
         if base_model is None:
             raise ValueError("Selected model does not have a PyTorch instance loaded")
 
@@ -509,9 +735,9 @@ class PyTorchModelManager:
         peft_config = LoraConfig(**cfg)
         peft_model = get_peft_model(base_model, peft_config)
 
-        self.models[model_id]["peft_model"] = peft_model
-        self.models[model_id]["peft_config"] = peft_config
-        self.models[model_id]["finetuning_ready"] = True
+        entry.peft_model = peft_model
+        entry.peft_config = peft_config
+        entry.finetuning_ready = True
 
         logger.info("Model %s prepared for LoRA fine-tuning", model_id)
         return True
@@ -528,19 +754,21 @@ class PyTorchModelManager:
         
         # Get loaded model info
         for model_id, model_data in self.models.items():
-            if model_data.get("loaded", False):
+            if model_data.loaded:
                 info["loaded_models"][model_id] = {
-                    "config": model_data["config"],
-                    "load_time": model_data.get("load_time"),
-                    "finetuning_ready": model_data.get("finetuning_ready", False)
+                    "config": model_data.config,
+                    "load_time": model_data.load_time,
+                    "finetuning_ready": model_data.finetuning_ready,
                 }
         
         # Get memory info
-        if torch is not None and torch.cuda.is_available():
+        # Total memory is static and cached; only allocation stats are queried per call.
+        total_memory = self.gpu_total_memory_bytes
+        if total_memory is not None:
             info["memory_info"]["cuda"] = {
                 "allocated": f"{torch.cuda.memory_allocated() / 1024**3:.2f}GB",
                 "cached": f"{torch.cuda.memory_reserved() / 1024**3:.2f}GB",
-                "total": f"{torch.cuda.get_device_properties(0).total_memory / 1024**3:.2f}GB"
+                "total": f"{total_memory / 1024**3:.2f}GB"
             }
         
         return info
@@ -557,9 +785,10 @@ class PyTorchModelManager:
         elif model_id in self.models:
             # Unload specific model
             del self.models[model_id]
+            self._models_version += 1
             if torch is not None and torch.cuda.is_available():
                 torch.cuda.empty_cache()
-            logger.info(f"Unloaded model {model_id}")
+            logger.info("Unloaded model %s", model_id)
 
     def reload_model(self, model_id: str) -> bool:
         """Convenience helper to reload a model from scratch."""
@@ -569,11 +798,26 @@ class PyTorchModelManager:
             self.current_tokenizer = None
         return self.load_model(model_id, force_reload=True)
     
+    def share_memory(self) -> None:
+        """Move CPU-resident weights into shared memory so forked workers reuse the same pages."""
+        for model_id, entry in self.models.items():
+            if entry.api or entry.model is None:
+                continue
+            if next(entry.model.parameters()).device.type != "cpu":
+                continue
+            entry.model.share_memory()
+            logger.info("Moved weights of %s into shared memory", model_id)
+
+    def models_version(self) -> int:
+        """Counter bumped whenever a model is registered or unloaded."""
+        return self._models_version
+
     def list_available_models(self) -> List[Dict]:
         """List all available models from config"""
         models_list = []
         for model_id, config in self.config["models"].items():
-            is_loaded = model_id in self.models and self.models[model_id].get("loaded", False)
+            entry = self.models.get(model_id)
+            is_loaded = entry is not None and entry.loaded
             display_name = config.get("display_name") or config.get("model_name") or model_id
             quantization = config.get("quantization", "pytorch")
             model_entry = {
@@ -6,9 +6,14 @@ Enhanced with PyTorch models and Internet access
 """
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
 import os
 import sys
 import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 from huggingface_hub import login as hf_login
@@ -16,7 +21,7 @@ from huggingface_hub import login as hf_login
 from app.logging import configure_logging
 
 load_dotenv()
-configure_logging()
+configure_logging(os.getenv("LOG_LEVEL", "WARNING"))
 logger = logging.getLogger(__name__)
 HF_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
 if HF_TOKEN:
@@ -24,53 +29,132 @@ if HF_TOKEN:
         hf_login(token=HF_TOKEN)
         logger.info("Authenticated with Hugging Face Hub using token from .env")
     except Exception as e:
-        logger.warning(f"Failed to authenticate with Hugging Face Hub: {e}")
+        logger.warning("Failed to authenticate with Hugging Face Hub: %s", e)
 else:
     logger.warning("No Hugging Face token found in environment. Private/gated models may not be accessible.")
 sys.path.append(str(Path(__file__).parent))
 
+import bcrypt
 import uvicorn
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
-from fastapi.responses import JSONResponse
+from typing import Any, AsyncGenerator, Dict, Optional
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic.v1 import BaseModel, Extra
 
 # Import your existing backend logic
 from app.orchestrator import ChatOrchestrator
-from app.persona_registry import MODEL_CATEGORIES, persona_payload
+from app.catalog_cache import cached_catalog_response
+from app.persona_registry import MODEL_CATEGORIES, persona_catalog_version, persona_payload
 from core.pytorch_manager import get_pytorch_manager
+from storage.database import close_connections
+from storage.user_store import get_user_store
+from tools.tokenizer import start_encoder_warmup
 
 # Import enhanced API routes
 try:
     from api.routes.enhanced import router as enhanced_router
+    from core.batching import get_generation_batcher
+    from core.enhanced_chat_engine import get_enhanced_chat_engine
     ENHANCED_FEATURES_AVAILABLE = True
     logger.info("Enhanced features (PyTorch + Internet) available")
 except ImportError as e:
-    logger.warning(f"Enhanced features not available: {e}")
+    logger.warning("Enhanced features not available: %s", e)
     ENHANCED_FEATURES_AVAILABLE = False
 
+# Worker processes for CPU-bound request work (password hashing), created on first use.
+_CPU_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    global _CPU_POOL
+    if _CPU_POOL is None:
+        workers = int(os.getenv("CPU_POOL_WORKERS", str(os.cpu_count() or 1)))
+        _CPU_POOL = ProcessPoolExecutor(max_workers=workers)
+    return _CPU_POOL
+
+
+class AuthPayload(BaseModel):
+    email: str
+    password: str
+
+    class Config:
+        extra = Extra.forbid
+
+
+_MODELS_PRELOADED = False
+
+
+async def personas_response() -> Response:
+    """/personas payload, served from the shared catalogue cache."""
+    manager = get_pytorch_manager()
+
+    def build() -> Dict[str, Any]:
+        models = manager.list_available_models()
+        return {
+            "personas": persona_payload(models),
+            "models": models,
+            "categories": MODEL_CATEGORIES,
+        }
+
+    version = (manager.models_version(), persona_catalog_version())
+    return await cached_catalog_response("root_personas", version, build)
+
+
+async def preload_configured_models() -> None:
+    """Load the models listed in PRELOAD_MODELS."""
+    global _MODELS_PRELOADED
+    preload_models = os.getenv("PRELOAD_MODELS", "").strip()
+    model_list = [m.strip() for m in preload_models.split(",") if m.strip()]
+    if model_list:
+        logger.info("Preloading %s models from PRELOAD_MODELS environment variable", len(model_list))
+        await get_enhanced_chat_engine().preload_models(model_list)
+    else:
+        logger.info("No models configured for preloading (PRELOAD_MODELS is empty)")
+    _MODELS_PRELOADED = True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan management"""
     logger.info("Starting Ashley AI Python Microservice")
+    start_encoder_warmup()
+    batcher = None
     if ENHANCED_FEATURES_AVAILABLE:
         logger.info("Enhanced features enabled")
+        batcher = get_generation_batcher()
+        batcher.start()
+
+        if not _MODELS_PRELOADED:
+            await preload_configured_models()
+    await personas_response()
     logger.info("Ashley AI Python Microservice startup complete")
     yield
     logger.info("Shutting down Ashley AI Python Microservice")
+    if batcher is not None:
+        await batcher.stop()
+    close_connections()
+    global _CPU_POOL
+    if _CPU_POOL is not None:
+        _CPU_POOL.shutdown(wait=False)
+        _CPU_POOL = None
 
 
+@functools.lru_cache(maxsize=1)
 def create_app() -> FastAPI:
-    # Configure logging
-    """Create and configure the FastAPI microservice"""
+    """Create and configure the FastAPI microservice.
+
+    Cached so repeated imports (and test clients) reuse a single app and
+    orchestrator instead of re-running startup work.
+    """
     app = FastAPI(
         title="Ashley AI Python Microservice",
         description="Internal AI service with Enhanced PyTorch + Internet capabilities",
         version="2.0.0",
         lifespan=lifespan,
         docs_url="/docs",  # Available at http://127.0.0.1:8001/docs
+        default_response_class=ORJSONResponse,
     )
     
     # Hugging Face authentication using .env token
@@ -90,35 +174,23 @@ def create_app() -> FastAPI:
     
     # Initialize the orchestrator at module level
     try:
-        from app.orchestrator import ChatOrchestrator
         orchestrator = ChatOrchestrator()
         logger.info("ChatOrchestrator initialized successfully")
-
-        # Preload models if configured
-        preload_models = os.getenv("PRELOAD_MODELS", "").strip()
-        if preload_models:
-            model_list = [m.strip() for m in preload_models.split(",") if m.strip()]
-            if model_list and ENHANCED_FEATURES_AVAILABLE:
-                logger.info(f"Preloading {len(model_list)} models from PRELOAD_MODELS environment variable")
-                from core.enhanced_chat_engine import get_enhanced_chat_engine
-                chat_engine = get_enhanced_chat_engine()
-                chat_engine.preload_models(model_list)
-        else:
-            logger.info("No models configured for preloading (PRELOAD_MODELS is empty)")
     except Exception as e:
-        logger.error(f"Failed to initialize ChatOrchestrator: {e}")
+        logger.error("Failed to initialize ChatOrchestrator: %s", e)
         orchestrator = None
 
     # Health check
-    @app.get("/health")
+    health_status = {
+        "status": "healthy",
+        "service": "ashley-ai-python-microservice",
+        "version": "2.0.0",
+        "enhanced_features": ENHANCED_FEATURES_AVAILABLE
+    }
+
+    @app.get("/health", response_model=None)
     async def health_check():
-        status = {
-            "status": "healthy", 
-            "service": "ashley-ai-python-microservice",
-            "version": "2.0.0",
-            "enhanced_features": ENHANCED_FEATURES_AVAILABLE
-        }
-        return status
+        return ORJSONResponse(health_status)
     
     @app.post("/chat/stream")
     async def deprecated_stream_chat():
@@ -134,68 +206,71 @@ def create_app() -> FastAPI:
             content={"error": "Deprecated. Use /api/chat/models for model listing."}
         )
     
-    import bcrypt
-    import json
-    from pathlib import Path
+    user_store = get_user_store()
+    VERIFIED_LOGIN_TTL = 60.0
+    # email -> (blake2b of password, bcrypt hash it was checked against, expiry)
+    verified_logins: Dict[str, tuple] = {}
 
-    USERS_FILE = Path(__file__).parent / "storage" / "users.json"
-
-    def hash_password(password: str) -> str:
+    async def hash_password(password: str) -> str:
         """Hash password using bcrypt with salt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        loop = asyncio.get_running_loop()
+        hashed = await loop.run_in_executor(
+            get_cpu_pool(), bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt()
+        )
+        return hashed.decode('utf-8')
 
-    def verify_password(password: str, hashed: str) -> bool:
+    async def verify_password(password: str, hashed: str) -> bool:
         """Verify password against bcrypt hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
-    def load_users():
-        if USERS_FILE.exists():
-            with open(USERS_FILE, "r") as f:
-                return json.load(f)
-        return {}
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_cpu_pool(), bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8')
+        )
 
-    def save_users(users):
-        USERS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(USERS_FILE, "w") as f:
-            json.dump(users, f, indent=2)
+    async def verify_password_cached(email: str, password: str, hashed: str) -> bool:
+        """Verify a login, skipping bcrypt for a recently verified password"""
+        digest = hashlib.blake2b(password.encode('utf-8'), digest_size=32).digest()
+        now = time.monotonic()
+        cached = verified_logins.get(email)
+        if cached is not None and cached[0] == digest and cached[1] == hashed and cached[2] > now:
+            return True
+        if not await verify_password(password, hashed):
+            return False
+        if len(verified_logins) >= 1024:
+            verified_logins.clear()
+        verified_logins[email] = (digest, hashed, now + VERIFIED_LOGIN_TTL)
+        return True
 
     @app.post("/auth/register")
-    async def register_user(request: Request):
-        data = await request.json()
-        email = data.get("email")
-        password = data.get("password")
+    async def register_user(payload: AuthPayload):
+        email = payload.email
+        password = payload.password
         if not email or not password:
             raise HTTPException(status_code=400, detail="Email and password required")
-        users = load_users()
-        if email in users:
+        if await asyncio.to_thread(user_store.get, email) is not None:
+            raise HTTPException(status_code=400, detail="User already exists")
+        password_hash = await hash_password(password)
+        if not await asyncio.to_thread(user_store.create, email, password_hash):
             raise HTTPException(status_code=400, detail="User already exists")
-        users[email] = {
-            "password": hash_password(password),
-            "role": "user"
-        }
-        save_users(users)
         return {"success": True, "user": {"id": email, "role": "user"}}
 
     @app.post("/auth/validate")
-    async def validate_auth(request: Request):
-        data = await request.json()
-        email = data.get("email")
-        password = data.get("password")
-        users = load_users()
-        user = users.get(email)
-        if not user or not verify_password(password, user["password"]):
+    async def validate_auth(payload: AuthPayload):
+        email = payload.email
+        password = payload.password
+        user = await asyncio.to_thread(user_store.get, email) if email else None
+        # Only bcrypt hashes are accepted; anything else is not a credential we issued.
+        if (
+            not user
+            or not password
+            or not user.password.startswith("$2")
+            or not await verify_password_cached(email, password, user.password)
+        ):
             raise HTTPException(status_code=401, detail="Invalid credentials")
-        return {"valid": True, "user": {"id": email, "role": user["role"]}}
+        return {"valid": True, "user": {"id": email, "role": user.role}}
     
     @app.get("/personas")
     async def get_personas():
-        manager = get_pytorch_manager()
-        models = manager.list_available_models()
-        return {
-            "personas": persona_payload(models),
-            "models": models,
-            "categories": MODEL_CATEGORIES,
-        }
+        return await personas_response()
     
     return app
 
@@ -203,13 +278,44 @@ def create_app() -> FastAPI:
 # Create the app
 app = create_app()
 
+# CPU-only deployments under a pre-forking server can load models before workers
+# fork, so they share the weights copy-on-write instead of each loading a copy:
+#   FORCE_CPU=true PRELOAD_ON_IMPORT=1 gunicorn main:app -k uvicorn.workers.UvicornWorker \
+#       -w ${WORKERS} --preload --bind 127.0.0.1:8001
+# It is refused unless models are placed on the CPU: forked workers cannot use a
+# CUDA context initialised in the parent. GPU deployments preload in each worker.
+if ENHANCED_FEATURES_AVAILABLE and os.getenv("PRELOAD_ON_IMPORT", "0") == "1":
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        device = get_pytorch_manager().device
+        if device != "cpu":
+            logger.warning(
+                "PRELOAD_ON_IMPORT ignored: models would be placed on %s; it is only for "
+                "CPU deployments (set FORCE_CPU=true)",
+                device,
+            )
+        else:
+            asyncio.run(preload_configured_models())
+            get_pytorch_manager().share_memory()
+    else:
+        logger.warning("PRELOAD_ON_IMPORT ignored: imported inside a running event loop")
+
 
 if __name__ == "__main__":
-    # Run the microservice on port 8001 (internal)
+    # Run the microservice on port 8001 (internal). Auto-reload is dev-only
+    # (RELOAD=1): it adds a polling file-watcher and forces a single worker.
+    reload_enabled = os.getenv("RELOAD", os.getenv("DEBUG_MODE", "0")) == "1"
     uvicorn.run(
         "main:app",
         host="127.0.0.1",  # Only accessible locally
         port=8001,
-        reload=True,
-        log_level="info",
+        # "auto" picks uvloop/httptools when installed (uvloop is skipped on Windows).
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        # Each worker holds its own copy of any loaded model, so scale out explicitly.
+        workers=1 if reload_enabled else int(os.getenv("UVICORN_WORKERS", "1")),
+        reload=reload_enabled,
+        log_level=os.getenv("LOG_LEVEL", "warning").lower(),
     )
@@ -1,36 +1,96 @@
 from __future__ import annotations
 
 import json
+import logging
 import sqlite3
 import threading
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 from app.config import get_settings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional runtime dependency
+    orjson = None  # type: ignore[assignment]
 
-_DB_LOCK = threading.RLock()
-_CONNECTION: Optional[sqlite3.Connection] = None
+logger = logging.getLogger(__name__)
+
+# One connection per thread: under WAL, readers on different threads no longer
+# queue behind a single shared connection, and SQLite's busy_timeout
+# serialises concurrent writers.
+_TLS = threading.local()
+_SCHEMA_LOCK = threading.Lock()
+_SCHEMA_READY = False
+# Every open connection, so close_connections() can reach the other threads' too.
+# Bumping _GENERATION makes threads open a fresh connection after a close.
+_CONNECTIONS: List[sqlite3.Connection] = []
+_GENERATION = 0
+
+
+_DATABASE_PATH: Optional[Path] = None
 
 
 def _database_path() -> Path:
-    settings = get_settings()
-    db_path = settings.data_dir / "ashley_ai.db"
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    return db_path
+    global _DATABASE_PATH
+    if _DATABASE_PATH is None:
+        settings = get_settings()
+        db_path = settings.data_dir / "ashley_ai.db"
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        _DATABASE_PATH = db_path
+    return _DATABASE_PATH
 
 
 def _ensure_connection() -> sqlite3.Connection:
-    global _CONNECTION
-    if _CONNECTION is None:
+    global _SCHEMA_READY
+    conn = getattr(_TLS, "conn", None)
+    if conn is None or _TLS.generation != _GENERATION:
         path = _database_path()
-        _CONNECTION = sqlite3.connect(str(path), check_same_thread=False)
-        _CONNECTION.row_factory = sqlite3.Row
-        _CONNECTION.execute("PRAGMA journal_mode=WAL;")
-        _CONNECTION.execute("PRAGMA foreign_keys=ON;")
-        _initialise_schema(_CONNECTION)
-    return _CONNECTION
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        # Plain tuple rows: callers unpack columns positionally, which skips the
+        # per-row Row object and its name lookups.
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA cache_size=-65536;
+            PRAGMA wal_autocheckpoint=1000;
+            PRAGMA busy_timeout=5000;
+            PRAGMA foreign_keys=ON;
+            """
+        )
+        with _SCHEMA_LOCK:
+            if not _SCHEMA_READY:
+                _initialise_schema(conn)
+                _SCHEMA_READY = True
+            _CONNECTIONS.append(conn)
+            _TLS.generation = _GENERATION
+        _TLS.conn = conn
+    return conn
+
+
+def close_connections() -> None:
+    """Close every thread's connection; call at shutdown, once no queries are running.
+
+    Each connection first runs ``PRAGMA optimize``, which re-analyses only the tables
+    its queries showed to have stale statistics, with ``analysis_limit`` keeping that
+    cheap on large tables.
+    """
+    global _GENERATION
+    with _SCHEMA_LOCK:
+        connections = list(_CONNECTIONS)
+        _CONNECTIONS.clear()
+        _GENERATION += 1
+    for conn in connections:
+        try:
+            conn.executescript("PRAGMA analysis_limit=400; PRAGMA optimize;")
+        except sqlite3.Error as exc:
+            logger.warning("PRAGMA optimize failed: %s", exc)
+        finally:
+            conn.close()
 
 
 def _initialise_schema(conn: sqlite3.Connection) -> None:
@@ -83,24 +143,65 @@ def _initialise_schema(conn: sqlite3.Connection) -> None:
                 memory_id INTEGER PRIMARY KEY REFERENCES memory_long(id) ON DELETE CASCADE,
                 vector BLOB NOT NULL
             );
+
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key BLOB PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions(created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_sm_sid_id ON session_messages(session_id, id);
+            CREATE INDEX IF NOT EXISTS idx_memshort_sid_id ON memory_short(session_id, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_memlong_sid_id ON memory_long(session_id, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_ml_sid_created ON memory_long(session_id, created_at DESC);
+
+            CREATE TABLE IF NOT EXISTS users (
+                email TEXT PRIMARY KEY,
+                password TEXT NOT NULL,
+                role TEXT NOT NULL DEFAULT 'user'
+            );
+
+            CREATE TABLE IF NOT EXISTS usage_totals (
+                month TEXT PRIMARY KEY,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0
+            );
             """
         )
 
 
 @contextmanager
 def get_connection() -> Iterator[sqlite3.Connection]:
+    """Yield this thread's connection; the outermost block commits (or rolls back) its writes."""
     conn = _ensure_connection()
-    with _DB_LOCK:
+    depth = getattr(_TLS, "depth", 0)
+    _TLS.depth = depth + 1
+    try:
         yield conn
+    except BaseException:
+        if depth == 0 and conn.in_transaction:
+            conn.rollback()
+        raise
+    else:
+        if depth == 0 and conn.in_transaction:
+            conn.commit()
+    finally:
+        _TLS.depth = depth
 
 
 def json_dumps(data: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
     return json.dumps(data, ensure_ascii=False)
 
 
 def json_loads(data: Optional[str]) -> Any:
     if not data:
         return None
+    if orjson is not None:
+        return orjson.loads(data)
     return json.loads(data)
 
 
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .database import get_connection
+
+# Rows looked up / inserted per statement; stays well under SQLite's bound-variable limit.
+_LOOKUP_BATCH = 500
+
+
+def _cache_key(model: str, text: str) -> bytes:
+    return hashlib.blake2b(f"{model}\x00{text}".encode("utf-8"), digest_size=32).digest()
+
+
+class EmbeddingCache:
+    """Content-addressed embeddings: one float32 blob per (model, text), kept in SQLite.
+
+    Vectors are handled as raw little-endian float32 bytes end to end, so nothing
+    is boxed into Python floats between the API response and the returned matrix.
+    """
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, bytes]:
+        found: Dict[bytes, bytes] = {}
+        with get_connection() as conn:
+            for start in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[start : start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})",
+                    batch,
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, model: str, items: Dict[bytes, bytes]) -> None:
+        if not items:
+            return
+        with get_connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, model, vector) VALUES (?, ?, ?)",
+                [(key, model, blob) for key, blob in items.items()],
+            )
+
+    def get_or_compute_many(
+        self,
+        texts: Sequence[str],
+        model: str,
+        embed_batch: Callable[[List[str]], List[bytes]],
+    ) -> np.ndarray:
+        """Embed ``texts`` into an (N, D) float32 matrix, in order.
+
+        ``embed_batch`` is called once for the distinct uncached texts and returns
+        one float32 blob per text.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [_cache_key(model, text) for text in texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            computed = dict(zip(missing, embed_batch(list(missing.values()))))
+            self.put_many(model, computed)
+            found.update(computed)
+        blobs = b"".join(found[key] for key in keys)
+        return np.frombuffer(blobs, dtype="<f4").reshape(len(keys), -1)
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        _cache = EmbeddingCache()
+    return _cache
+
+
+__all__ = ["EmbeddingCache", "get_embedding_cache"]
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from functools import lru_cache
 import hashlib
-from typing import Any, Dict, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -17,7 +19,11 @@ except Exception:  # pragma: no cover
     _FAISS_AVAILABLE = False
 
 
-_VECTOR_DIM = 256
+_VECTOR_SWEEP_INTERVAL = 256
+# Masked (pruned) rows tolerated in the vector cache before it is rebuilt without them.
+_COMPACT_MIN_DEAD = 64
+_VECTOR_DIM = 256  # must stay a power of two; token buckets are masked with _VECTOR_DIM - 1
+_FLOAT_VECTOR_BYTES = _VECTOR_DIM * 4  # legacy float32 blobs
 
 
 @dataclass
@@ -28,7 +34,74 @@ class MemoryEntry:
     tags: List[str]
 
 
+@dataclass
+class _VectorCache:
+    """Long-term rows with their stacked vectors and (with faiss) an HNSW index.
+
+    Rows are never removed in place: pruned ones are cleared in ``alive`` and
+    skipped by searches until enough of them pile up to be worth a compaction.
+    """
+
+    ids: np.ndarray  # memory_long.id per row, ascending
+    rows: List[Tuple[Any, ...]]
+    vectors: np.ndarray
+    alive: np.ndarray
+    index: Any
+    max_id: int
+    live: int
+
+    @classmethod
+    def build(cls, ids: np.ndarray, rows: List[Tuple[Any, ...]], vectors: np.ndarray) -> "_VectorCache":
+        index = None
+        if _FAISS_AVAILABLE:
+            index = faiss.IndexHNSWFlat(_VECTOR_DIM, 32, faiss.METRIC_INNER_PRODUCT)
+            if len(vectors):
+                index.add(vectors)
+        max_id = int(ids[-1]) if len(ids) else 0
+        return cls(ids, rows, vectors, np.ones(len(rows), dtype=bool), index, max_id, len(rows))
+
+    def extended(self, ids: np.ndarray, rows: List[Tuple[Any, ...]], vectors: np.ndarray) -> "_VectorCache":
+        if not rows:
+            return self
+        if self.index is not None:
+            self.index.add(vectors)
+        return _VectorCache(
+            np.concatenate([self.ids, ids]),
+            self.rows + rows,
+            np.vstack([self.vectors, vectors]),
+            np.concatenate([self.alive, np.ones(len(rows), dtype=bool)]),
+            self.index,
+            int(ids[-1]),
+            self.live + len(rows),
+        )
+
+    def without(self, memory_ids: np.ndarray) -> "_VectorCache":
+        alive = self.alive & ~np.isin(self.ids, memory_ids)
+        return replace(self, alive=alive, live=int(alive.sum()))
+
+    def keeping(self, memory_ids: np.ndarray) -> "_VectorCache":
+        alive = self.alive & np.isin(self.ids, memory_ids)
+        return replace(self, alive=alive, live=int(alive.sum()))
+
+    def compacted(self) -> "_VectorCache":
+        keep = np.flatnonzero(self.alive)
+        cache = _VectorCache.build(self.ids[keep], [self.rows[i] for i in keep], self.vectors[keep])
+        cache.max_id = self.max_id
+        return cache
+
+    @property
+    def dead(self) -> int:
+        return len(self.rows) - self.live
+
+
 class MemoryStore:
+    def __init__(self) -> None:
+        # Shared by every session (searches span all of them); synced against the
+        # database before each search, so writes from other workers are seen too.
+        self._vec_cache: Optional[_VectorCache] = None
+        self._vec_lock = threading.Lock()
+        self._inserts_since_sweep = 0
+
     def append_short_term(self, session_id: str, role: str, content: str) -> None:
         with get_connection() as conn:
             conn.execute(
@@ -38,8 +111,8 @@ class MemoryStore:
             conn.execute(
                 """
                 DELETE FROM memory_short
-                WHERE session_id = ? AND id NOT IN (
-                    SELECT id FROM memory_short WHERE session_id = ? ORDER BY id DESC LIMIT 50
+                WHERE session_id = ? AND id <= (
+                    SELECT id FROM memory_short WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET 50
                 )
                 """,
                 (session_id, session_id),
@@ -57,10 +130,13 @@ class MemoryStore:
                 """,
                 (session_id, limit),
             ).fetchall()
-        return [dict(row) for row in reversed(rows)]
+        return [
+            {"session_id": session_id, "role": role, "content": content, "created_at": created_at}
+            for session_id, role, content, created_at in reversed(rows)
+        ]
 
     def add_long_term(self, entry: MemoryEntry) -> None:
-        vector = _embed_text(entry.content)
+        blob = _pack_vector(_embed_text(entry.content))
         with get_connection() as conn:
             cursor = conn.execute(
                 """
@@ -72,66 +148,126 @@ class MemoryStore:
             memory_id = cursor.lastrowid
             conn.execute(
                 "INSERT OR REPLACE INTO memory_vectors (memory_id, vector) VALUES (?, ?)",
-                (memory_id, vector.tobytes()),
+                (memory_id, blob),
             )
-            conn.execute(
-                """
-                DELETE FROM memory_long
-                WHERE session_id = ?
-                AND id NOT IN (
-                    SELECT id FROM memory_long WHERE session_id = ? ORDER BY id DESC LIMIT 200
+            pruned_ids = [
+                row[0]
+                for row in conn.execute(
+                    """
+                    SELECT id FROM memory_long
+                    WHERE session_id = ?
+                    AND id <= (
+                        SELECT id FROM memory_long WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET 200
+                    )
+                    ORDER BY id
+                    """,
+                    (entry.session_id, entry.session_id),
                 )
-                """,
-                (entry.session_id, entry.session_id),
-            )
-            conn.execute(
-                "DELETE FROM memory_vectors WHERE memory_id NOT IN (SELECT id FROM memory_long)"
-            )
+            ]
+            if pruned_ids:
+                conn.execute(
+                    "DELETE FROM memory_long WHERE session_id = ? AND id <= ?",
+                    (entry.session_id, pruned_ids[-1]),
+                )
+            # Pruned vectors go with their rows via ON DELETE CASCADE; the sweep only
+            # catches orphans left by older databases, so run it occasionally.
+            self._inserts_since_sweep += 1
+            if self._inserts_since_sweep >= _VECTOR_SWEEP_INTERVAL:
+                self._inserts_since_sweep = 0
+                conn.execute(
+                    "DELETE FROM memory_vectors WHERE memory_id NOT IN (SELECT id FROM memory_long)"
+                )
+        if pruned_ids:
+            # The new row is picked up by the next search's sync; the pruned ones
+            # are dropped from the cache now so that sync doesn't need an id scan.
+            with self._vec_lock:
+                if self._vec_cache is not None:
+                    self._vec_cache = self._vec_cache.without(np.asarray(pruned_ids, dtype=np.int64))
 
     def search_long_term(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         cleaned = query.strip()
-        if not cleaned:
+        if not cleaned or limit <= 0:
             return []
 
         query_vector = _embed_text(cleaned)
-
-        with get_connection() as conn:
-            rows = conn.execute(
-                """
-                SELECT ml.id, ml.session_id, ml.role, ml.content, ml.tags_json, ml.created_at, mv.vector
-                FROM memory_long AS ml
-                JOIN memory_vectors AS mv ON mv.memory_id = ml.id
-                """,
-            ).fetchall()
-
-        if not rows:
-            return []
-
-        vectors = np.stack([np.frombuffer(row["vector"], dtype=np.float32) for row in rows])
-
-        if _FAISS_AVAILABLE and vectors.size:
-            index = faiss.IndexFlatIP(_VECTOR_DIM)
-            index.add(vectors)
-            scores, indices = index.search(query_vector.reshape(1, -1), min(limit, len(rows)))
-            order = [int(idx) for idx in indices[0] if idx >= 0][:limit]
-        else:
-            sims = vectors @ query_vector
-            order = np.argsort(-sims)[:limit].tolist()
+        with self._vec_lock:
+            cache = self._synced_vectors()
+            if not cache.live:
+                return []
+            limit = min(limit, cache.live)
+            if cache.index is not None:
+                # Over-fetch by the number of masked rows so ``limit`` live ones survive.
+                k = min(limit + cache.dead, len(cache.rows))
+                scores, indices = cache.index.search(query_vector.reshape(1, -1), k)
+                order = [int(idx) for idx in indices[0] if idx >= 0 and cache.alive[idx]][:limit]
+            else:
+                sims = cache.vectors @ query_vector
+                sims[~cache.alive] = -np.inf
+                top = np.arange(len(sims))
+                if limit < len(sims):
+                    # O(N) selection of the best ``limit`` rows; only those get sorted.
+                    top = np.argpartition(-sims, limit - 1)[:limit]
+                order = top[np.argsort(-sims[top])][:limit].tolist()
+            rows = cache.rows
 
         results: List[Dict[str, Any]] = []
         for idx in order:
-            row = rows[int(idx)]
+            session_id, role, content, tags_json, created_at = rows[int(idx)]
             results.append(
                 {
-                    "session_id": row["session_id"],
-                    "role": row["role"],
-                    "content": row["content"],
-                    "tags": json_loads(row["tags_json"]) or [],
-                    "created_at": row["created_at"],
+                    "session_id": session_id,
+                    "role": role,
+                    "content": content,
+                    "tags": json_loads(tags_json) or [],
+                    "created_at": created_at,
                 }
             )
         return results
 
+    def _synced_vectors(self) -> _VectorCache:
+        """Bring the cache up to date with the database; caller holds ``_vec_lock``."""
+        with get_connection() as conn:
+            max_id, count = conn.execute(
+                """
+                SELECT COALESCE(MAX(ml.id), 0), COUNT(*)
+                FROM memory_long AS ml
+                JOIN memory_vectors AS mv ON mv.memory_id = ml.id
+                """
+            ).fetchone()
+            cache = self._vec_cache
+            if cache is None:
+                cache = _VectorCache.build(*_fetch_vectors(conn, 0))
+            else:
+                if max_id > cache.max_id:
+                    cache = cache.extended(*_fetch_vectors(conn, cache.max_id))
+                if count != cache.live:
+                    # Rows pruned by another process: mask whatever is no longer stored.
+                    live_ids = np.fromiter(
+                        (row[0] for row in conn.execute("SELECT id FROM memory_long")),
+                        dtype=np.int64,
+                    )
+                    cache = cache.keeping(live_ids)
+        if cache.dead > max(_COMPACT_MIN_DEAD, len(cache.rows) // 4):
+            cache = cache.compacted()
+        self._vec_cache = cache
+        return cache
+
+
+def _fetch_vectors(conn: Any, after_id: int) -> Tuple[np.ndarray, List[Tuple[Any, ...]], np.ndarray]:
+    db_rows = conn.execute(
+        """
+        SELECT ml.id, ml.session_id, ml.role, ml.content, ml.tags_json, ml.created_at, mv.vector
+        FROM memory_long AS ml
+        JOIN memory_vectors AS mv ON mv.memory_id = ml.id
+        WHERE ml.id > ?
+        ORDER BY ml.id
+        """,
+        (after_id,),
+    ).fetchall()
+    ids = np.fromiter((row[0] for row in db_rows), dtype=np.int64, count=len(db_rows))
+    rows = [row[1:6] for row in db_rows]
+    return ids, rows, _unpack_matrix([row[6] for row in db_rows])
+
 
 _store: Optional[MemoryStore] = None
 
@@ -146,18 +282,54 @@ def get_memory_store() -> MemoryStore:
 __all__ = ["MemoryStore", "MemoryEntry", "get_memory_store"]
 
 
+@lru_cache(maxsize=65536)
+def _token_bucket(token: str) -> int:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:4], "little") & (_VECTOR_DIM - 1)
+
+
+def _pack_vector(vec: np.ndarray) -> bytes:
+    """Quantise a unit vector to int8 plus a float32 scale (260 bytes instead of 1024)."""
+    peak = float(np.max(np.abs(vec))) if vec.size else 0.0
+    scale = np.float32(127.0 / peak if peak > 0 else 1.0)
+    return np.round(vec * scale).astype(np.int8).tobytes() + scale.tobytes()
+
+
+def _unpack_matrix(blobs: List[bytes]) -> np.ndarray:
+    """Decode stored vectors straight into one preallocated, C-contiguous matrix."""
+    matrix = np.empty((len(blobs), _VECTOR_DIM), dtype=np.float32)
+    legacy = [i for i, blob in enumerate(blobs) if len(blob) == _FLOAT_VECTOR_BYTES]
+    packed = [i for i, blob in enumerate(blobs) if len(blob) != _FLOAT_VECTOR_BYTES]
+    if legacy:
+        matrix[legacy] = np.frombuffer(b"".join(blobs[i] for i in legacy), dtype=np.float32).reshape(
+            -1, _VECTOR_DIM
+        )
+    if packed:
+        raw = np.frombuffer(b"".join(blobs[i] for i in packed), dtype=np.uint8).reshape(-1, _VECTOR_DIM + 4)
+        scales = raw[:, _VECTOR_DIM:].copy().view(np.float32)
+        matrix[packed] = raw[:, :_VECTOR_DIM].view(np.int8) / scales
+    return matrix
+
+
 def _embed_text(text: str) -> np.ndarray:
+    """Return the (read-only) embedding of ``text``; repeated texts hit an in-process LRU."""
+    return np.frombuffer(_embed_text_cached(text), dtype=np.float32)
+
+
+# Keyed by the raw text and holding immutable bytes, so cached vectors can't be
+# mutated by callers; the cache is per process and starts empty on restart.
+@lru_cache(maxsize=4096)
+def _embed_text_cached(text: str) -> bytes:
     tokens = text.lower().split()
-    vec = np.zeros(_VECTOR_DIM, dtype=np.float32)
     if not tokens:
-        return vec
+        return np.zeros(_VECTOR_DIM, dtype=np.float32).tobytes()
 
-    for token in tokens:
-        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
-        index = int.from_bytes(digest[:4], "little") % _VECTOR_DIM
-        vec[index] += 1.0
+    # Same buckets as the stored vectors (blake2b % _VECTOR_DIM); bucket lookups
+    # are memoised per token and counted in one pass.
+    indices = np.fromiter((_token_bucket(token) for token in tokens), dtype=np.intp, count=len(tokens))
+    vec = np.bincount(indices, minlength=_VECTOR_DIM).astype(np.float32)
 
     norm = np.linalg.norm(vec)
     if norm > 0:
         vec /= norm
-    return vec
+    return vec.tobytes()
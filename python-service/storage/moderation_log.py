@@ -1,20 +1,27 @@
 from __future__ import annotations
 
 import json
+import os
 import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
 
 from app.config import get_settings
 
 
+_LOG_PATH: Optional[Path] = None
+
+
 def _log_path() -> Path:
-    settings = get_settings()
-    path = settings.data_dir / "moderation_log.jsonl"
-    path.parent.mkdir(parents=True, exist_ok=True)
-    if not path.exists():
-        path.touch()
-    return path
+    global _LOG_PATH
+    if _LOG_PATH is None:
+        settings = get_settings()
+        path = settings.data_dir / "moderation_log.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            path.touch()
+        _LOG_PATH = path
+    return _LOG_PATH
 
 
 def log_event(*, session_id: str, category: str, action: str, text_snippet: str, detail: Dict[str, Any]) -> None:
@@ -37,19 +44,40 @@ class ModerationLog:
 
     def list(self, limit: int = 200) -> List[Dict[str, Any]]:
         rows: List[Dict[str, Any]] = []
+        if limit <= 0:
+            return rows
         try:
-            with self.path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        rows.append(json.loads(line))
-                    except Exception:
-                        continue
+            for line in _iter_lines_reversed(self.path):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except Exception:
+                    continue
+                if len(rows) >= limit:
+                    break
         except FileNotFoundError:
             return []
-        return rows[-limit:]
+        rows.reverse()
+        return rows
+
+
+def _iter_lines_reversed(path: Path, block: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield the lines of ``path`` last-first, reading it backwards in ``block``-sized chunks."""
+    with path.open("rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b""
+        while position > 0:
+            step = min(block, position)
+            position -= step
+            f.seek(position)
+            lines = (f.read(step) + remainder).split(b"\n")
+            # The first piece may be the tail of a line that starts in an earlier block.
+            remainder = lines.pop(0)
+            yield from reversed(lines)
+        if remainder:
+            yield remainder
 
 
 def get_moderation_log() -> ModerationLog:
@@ -1,15 +1,33 @@
 from __future__ import annotations
 
-import json
 import time
 import uuid
-from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
 
 from app.state import ChatState
 from .database import get_connection, json_dumps, json_loads
 
 
+_USAGE_UPSERT = """
+    INSERT INTO session_usage (session_id, prompt_tokens, completion_tokens, total_tokens, cost_usd)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(session_id) DO UPDATE SET
+        prompt_tokens=excluded.prompt_tokens,
+        completion_tokens=excluded.completion_tokens,
+        total_tokens=excluded.total_tokens,
+        cost_usd=excluded.cost_usd
+"""
+
+_MESSAGE_TEXT_QUERY = "SELECT role, content FROM session_messages WHERE session_id = ? ORDER BY id"
+
+_USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens", "cost_usd")
+
+
 @dataclass
 class SessionRecord:
     id: str
@@ -19,6 +37,16 @@ class SessionRecord:
     messages: List[Dict[str, Any]]
     usage: Optional[Dict[str, Any]] = None
     settings: Optional[Dict[str, Any]] = None
+    # Number of leading ``messages`` already stored; save() only inserts the rest.
+    _persisted_count: int = field(default=0, repr=False, compare=False)
+
+
+@dataclass
+class SessionSummary:
+    id: str
+    title: str
+    created_at: float
+    persona_names: List[str]
 
 
 class SessionStore:
@@ -50,26 +78,77 @@ class SessionStore:
                 ),
             )
 
-    def list(self) -> List[SessionRecord]:
+    def list_summaries(self) -> List[SessionSummary]:
+        """Newest-first session headers only; served by idx_sessions_created without touching messages."""
         with get_connection() as conn:
             rows = conn.execute(
-                "SELECT id, title, created_at, persona_names, settings_json FROM sessions ORDER BY created_at DESC"
+                "SELECT id, title, created_at, persona_names FROM sessions ORDER BY created_at DESC"
             ).fetchall()
+        return [
+            SessionSummary(id=session_id, title=title, created_at=created_at, persona_names=json_loads(persona_names))
+            for session_id, title, created_at, persona_names in rows
+        ]
+
+    def list(self, persona: Optional[str] = None) -> List[SessionRecord]:
+        """Return all sessions, newest first, or only those that include ``persona``.
+
+        The persona filter runs inside SQLite over the JSON array in ``persona_names``
+        (JSON1 ``json_each``), so non-matching sessions are never loaded or parsed.
+        """
+        if persona is None:
+            session_filter, message_filter, params = "", "", ()
+        else:
+            session_filter = "WHERE EXISTS (SELECT 1 FROM json_each(sessions.persona_names) WHERE value = ?)"
+            message_filter = f"WHERE session_id IN (SELECT id FROM sessions {session_filter})"
+            params = (persona,)
+        # One query per table for all matching sessions instead of two per session.
+        with get_connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, title, created_at, persona_names, settings_json
+                FROM sessions
+                {session_filter}
+                ORDER BY created_at DESC
+                """,
+                params,
+            ).fetchall()
+            message_rows = conn.execute(
+                f"""
+                SELECT session_id, role, content, metadata_json, created_at
+                FROM session_messages
+                {message_filter}
+                ORDER BY session_id, id
+                """,
+                params,
+            ).fetchall()
+            usage_rows = conn.execute(
+                f"""
+                SELECT session_id, prompt_tokens, completion_tokens, total_tokens, cost_usd
+                FROM session_usage
+                {message_filter}
+                """,
+                params,
+            ).fetchall()
+
+        messages_by_session = {
+            session_id: [self._message_from_row(row[1:]) for row in group]
+            for session_id, group in groupby(message_rows, key=itemgetter(0))
+        }
+        usage_by_session = {row[0]: self._usage_from_row(row[1:]) for row in usage_rows}
 
         records: List[SessionRecord] = []
-        for row in rows:
-            session_id = row["id"]
-            messages = self._load_messages(session_id)
-            usage = self._load_usage(session_id)
+        for session_id, title, created_at, persona_names, settings_json in rows:
+            messages = messages_by_session.get(session_id, [])
             records.append(
                 SessionRecord(
                     id=session_id,
-                    title=row["title"],
-                    created_at=row["created_at"],
-                    persona_names=json.loads(row["persona_names"]),
+                    title=title,
+                    created_at=created_at,
+                    persona_names=json_loads(persona_names),
                     messages=messages,
-                    usage=usage,
-                    settings=json_loads(row["settings_json"]),
+                    usage=usage_by_session.get(session_id),
+                    settings=json_loads(settings_json),
+                    _persisted_count=len(messages),
                 )
             )
         return records
@@ -93,8 +172,20 @@ class SessionStore:
         self.save(record)
         return record
 
-    def save(self, record: SessionRecord) -> None:
+    def save(self, record: SessionRecord, *, replace: bool = False) -> None:
+        """Persist ``record``, appending only messages added since it was last loaded or saved.
+
+        Pass ``replace=True`` after editing or removing earlier messages to rewrite the
+        stored history; records that were never persisted are always written in full.
+        """
+        start = record._persisted_count
+        if replace or start == 0 or start > len(record.messages):
+            start = 0
         with get_connection() as conn:
+            # Take the write lock up front so the whole save is one transaction (one
+            # WAL commit); get_connection() commits it, or rolls it back on error.
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
             conn.execute(
                 """
                 INSERT INTO sessions (id, title, created_at, persona_names, settings_json)
@@ -113,7 +204,8 @@ class SessionStore:
                     json_dumps(record.settings),
                 ),
             )
-            conn.execute("DELETE FROM session_messages WHERE session_id = ?", (record.id,))
+            if start == 0:
+                conn.execute("DELETE FROM session_messages WHERE session_id = ?", (record.id,))
             conn.executemany(
                 """
                 INSERT INTO session_messages (session_id, role, content, metadata_json, created_at)
@@ -127,16 +219,23 @@ class SessionStore:
                         json_dumps(msg.get("metadata")),
                         msg.get("timestamp", time.time()),
                     )
-                    for msg in record.messages
+                    for msg in record.messages[start:]
                 ],
             )
             if record.usage:
-                self.update_usage(
-                    session_id=record.id,
-                    prompt_tokens=record.usage.get("prompt_tokens", 0),
-                    completion_tokens=record.usage.get("completion_tokens", 0),
-                    cost_usd=record.usage.get("cost_usd", 0.0),
+                prompt_tokens = record.usage.get("prompt_tokens", 0)
+                completion_tokens = record.usage.get("completion_tokens", 0)
+                conn.execute(
+                    _USAGE_UPSERT,
+                    (
+                        record.id,
+                        prompt_tokens,
+                        completion_tokens,
+                        prompt_tokens + completion_tokens,
+                        record.usage.get("cost_usd", 0.0),
+                    ),
                 )
+        record._persisted_count = len(record.messages)
 
     def load(self, session_id: str) -> SessionRecord:
         with get_connection() as conn:
@@ -148,16 +247,18 @@ class SessionStore:
         if row is None:
             raise FileNotFoundError(f"Session {session_id} not found")
 
+        _, title, created_at, persona_names, settings_json = row
         messages = self._load_messages(session_id)
         usage = self._load_usage(session_id)
         return SessionRecord(
-            id=row["id"],
-            title=row["title"],
-            created_at=row["created_at"],
-            persona_names=json.loads(row["persona_names"]),
+            id=session_id,
+            title=title,
+            created_at=created_at,
+            persona_names=json_loads(persona_names),
             messages=messages,
             usage=usage,
-            settings=json_loads(row["settings_json"]),
+            settings=json_loads(settings_json),
+            _persisted_count=len(messages),
         )
 
     def append_message(
@@ -188,18 +289,7 @@ class SessionStore:
     ) -> None:
         total = prompt_tokens + completion_tokens
         with get_connection() as conn:
-            conn.execute(
-                """
-                INSERT INTO session_usage (session_id, prompt_tokens, completion_tokens, total_tokens, cost_usd)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(session_id) DO UPDATE SET
-                    prompt_tokens=excluded.prompt_tokens,
-                    completion_tokens=excluded.completion_tokens,
-                    total_tokens=excluded.total_tokens,
-                    cost_usd=excluded.cost_usd
-                """,
-                (session_id, prompt_tokens, completion_tokens, total, cost_usd),
-            )
+            conn.execute(_USAGE_UPSERT, (session_id, prompt_tokens, completion_tokens, total, cost_usd))
 
     def rename(self, session_id: str, new_title: str) -> None:
         with get_connection() as conn:
@@ -210,56 +300,43 @@ class SessionStore:
             conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
 
     def export_markdown(self, session_id: str, out_path) -> None:
-        record = self.load(session_id)
         out_path.parent.mkdir(parents=True, exist_ok=True)
-        lines: List[str] = [f"# {record.title}"]
-        for msg in record.messages:
-            role = msg.get("role", "user").capitalize()
-            content = msg.get("content", "")
-            lines.append(f"\n## {role}\n\n{content}")
-        out_path.write_text("\n".join(lines), encoding="utf-8")
+        with get_connection() as conn:
+            title = self._load_title(conn, session_id)
+            # Write each row straight from the cursor; no message dicts or list of them.
+            with out_path.open("w", encoding="utf-8") as handle:
+                handle.write(f"# {title}")
+                for role, content in conn.execute(_MESSAGE_TEXT_QUERY, (session_id,)):
+                    handle.write(f"\n\n## {role.capitalize()}\n\n{content}")
 
     def export_pdf(self, session_id: str, out_path) -> None:
-        from fpdf import FPDF  # type: ignore
+        """Render the session to ``out_path``.
 
-        record = self.load(session_id)
+        Rendering is CPU-bound; async callers should run this via ``asyncio.to_thread``.
+        The PDF goes through a temporary file, so readers never see a partial one.
+        """
+        with get_connection() as conn:
+            title = self._load_title(conn, session_id)
+            messages = conn.execute(_MESSAGE_TEXT_QUERY, (session_id,)).fetchall()
         out_path.parent.mkdir(parents=True, exist_ok=True)
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        try:
-            pdf.set_font("Arial", size=12)
-        except Exception:
-            pdf.set_font("Helvetica", size=12)
-        page_width = pdf.w - 2 * pdf.l_margin
-        pdf.multi_cell(page_width, 10, txt=record.title)
-        for msg in record.messages:
-            role = msg.get("role", "user").upper()
-            content = msg.get("content", "")
-            text = f"{role}: {content}".strip() or role
-            pdf.multi_cell(page_width, 8, txt=text)
-        pdf.output(str(out_path))
+        _render_pdf(title, messages, out_path)
 
     # Internal helpers -------------------------------------------------
 
+    @staticmethod
+    def _load_title(conn, session_id: str) -> str:
+        row = conn.execute("SELECT title FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Session {session_id} not found")
+        return row[0]
+
     def _load_messages(self, session_id: str) -> List[Dict[str, Any]]:
         with get_connection() as conn:
             rows = conn.execute(
                 "SELECT role, content, metadata_json, created_at FROM session_messages WHERE session_id = ? ORDER BY id",
                 (session_id,),
             ).fetchall()
-        messages: List[Dict[str, Any]] = []
-        for row in rows:
-            metadata = json_loads(row["metadata_json"])
-            message = {
-                "role": row["role"],
-                "content": row["content"],
-                "timestamp": row["created_at"],
-            }
-            if metadata:
-                message["metadata"] = metadata
-            messages.append(message)
-        return messages
+        return [self._message_from_row(row) for row in rows]
 
     def _load_usage(self, session_id: str) -> Optional[Dict[str, Any]]:
         with get_connection() as conn:
@@ -269,12 +346,20 @@ class SessionStore:
             ).fetchone()
         if row is None:
             return None
-        return {
-            "prompt_tokens": row["prompt_tokens"],
-            "completion_tokens": row["completion_tokens"],
-            "total_tokens": row["total_tokens"],
-            "cost_usd": row["cost_usd"],
-        }
+        return self._usage_from_row(row)
+
+    @staticmethod
+    def _message_from_row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        role, content, metadata_json, created_at = row
+        message = {"role": role, "content": content, "timestamp": created_at}
+        metadata = json_loads(metadata_json)
+        if metadata:
+            message["metadata"] = metadata
+        return message
+
+    @staticmethod
+    def _usage_from_row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        return dict(zip(_USAGE_KEYS, row))
 
     def _ensure_session(self, session_id: str) -> None:
         with get_connection() as conn:
@@ -288,4 +373,34 @@ class SessionStore:
             )
 
 
-__all__ = ["SessionStore", "SessionRecord"]
+def _pdf_text(text: str) -> str:
+    return escape(text).replace("\n", "<br/>")
+
+
+def _render_pdf(title: str, messages: List[Tuple[str, str]], out_path: Path) -> None:
+    from reportlab.lib.pagesizes import A4  # type: ignore
+    from reportlab.lib.styles import getSampleStyleSheet  # type: ignore
+    from reportlab.lib.units import mm  # type: ignore
+    from reportlab.platypus import Paragraph, SimpleDocTemplate  # type: ignore
+
+    styles = getSampleStyleSheet()
+    body = styles["BodyText"]
+    story = [Paragraph(_pdf_text(title), styles["Title"])]
+    for role, content in messages:
+        story.append(Paragraph(f"<b>{role.upper()}:</b> {_pdf_text(content)}", body))
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    doc = SimpleDocTemplate(
+        str(tmp_path),
+        pagesize=A4,
+        leftMargin=15 * mm,
+        rightMargin=15 * mm,
+        topMargin=15 * mm,
+        bottomMargin=15 * mm,
+        title=title,
+    )
+    doc.build(story)
+    tmp_path.replace(out_path)
+
+
+__all__ = ["SessionStore", "SessionRecord", "SessionSummary"]
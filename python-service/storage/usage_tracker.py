@@ -2,34 +2,71 @@ from __future__ import annotations
 
 import calendar
 import json
+import logging
 import time
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Optional
 
 from app.config import get_settings
+from .database import get_connection
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional runtime dependency
+    orjson = None  # type: ignore[assignment]
 
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
 def _usage_path() -> Path:
     p = get_settings().data_dir / "usage.json"
     p.parent.mkdir(parents=True, exist_ok=True)
-    if not p.exists():
-        p.write_text("{}", encoding="utf-8")
     return p
 
 
 class UsageTracker:
-    def __init__(self) -> None:
-        self.path = _usage_path()
+    """Monthly token/cost totals, kept in SQLite.
 
-    def _load(self) -> Dict[str, Dict[str, float]]:
-        try:
-            return json.loads(self.path.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
+    Each update is a single UPSERT that adds to the stored counters, so several
+    worker processes can record usage without overwriting each other's totals.
+    """
+
+    def __init__(self, legacy_file: Optional[Path] = None) -> None:
+        self.path = legacy_file or _usage_path()
+        self._import_legacy_totals()
 
-    def _save(self, data: Dict[str, Dict[str, float]]) -> None:
-        self.path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    def _import_legacy_totals(self) -> None:
+        """Copy totals from the old usage.json ledger; months already in SQLite win."""
+        if not self.path.exists():
+            return
+        try:
+            raw = self.path.read_bytes() or b"{}"
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except (OSError, ValueError) as exc:
+            logger.warning("Unable to read legacy usage file %s: %s", self.path, exc)
+            return
+        rows = [
+            (
+                month,
+                int(agg.get("prompt_tokens", 0)),
+                int(agg.get("completion_tokens", 0)),
+                float(agg.get("cost_usd", 0.0)),
+            )
+            for month, agg in data.items()
+            if isinstance(agg, dict)
+        ]
+        if not rows:
+            return
+        with get_connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO usage_totals (month, prompt_tokens, completion_tokens, cost_usd)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
 
     def update(
         self,
@@ -40,20 +77,30 @@ class UsageTracker:
         completion_tokens: int,
         cost_usd: float,
     ) -> None:
-        data = self._load()
         month_key = time.strftime("%Y-%m")
-        agg = data.setdefault(month_key, {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
-        agg["prompt_tokens"] += int(prompt_tokens)
-        agg["completion_tokens"] += int(completion_tokens)
-        agg["cost_usd"] += float(cost_usd)
-        self._save(data)
+        with get_connection() as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO usage_totals (month, prompt_tokens, completion_tokens, cost_usd)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(month) DO UPDATE SET
+                    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                    completion_tokens = completion_tokens + excluded.completion_tokens,
+                    cost_usd = cost_usd + excluded.cost_usd
+                """,
+                (month_key, int(prompt_tokens), int(completion_tokens), float(cost_usd)),
+            )
 
     def get_month_usage(self, month_key: Optional[str] = None) -> str:
-        data = self._load()
         key = month_key or time.strftime("%Y-%m")
-        agg = data.get(key, {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+        with get_connection() as conn:
+            row = conn.execute(
+                "SELECT prompt_tokens, completion_tokens, cost_usd FROM usage_totals WHERE month = ?",
+                (key,),
+            ).fetchone()
+        prompt_tokens, completion_tokens, cost_usd = row or (0, 0, 0.0)
         return (
-            f"Prompt: {int(agg['prompt_tokens'])} | Completion: {int(agg['completion_tokens'])} | Cost: ${float(agg['cost_usd']):.4f}"
+            f"Prompt: {int(prompt_tokens)} | Completion: {int(completion_tokens)} | Cost: ${float(cost_usd):.4f}"
         )
 
 
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .database import get_connection
+
+
+logger = logging.getLogger(__name__)
+
+_LEGACY_USERS_FILE = Path(__file__).parent / "users.json"
+
+
+@dataclass
+class UserRecord:
+    email: str
+    password: str
+    role: str = "user"
+
+
+class UserStore:
+    """SQLite-backed account storage for the auth endpoints."""
+
+    def __init__(self, legacy_file: Path = _LEGACY_USERS_FILE) -> None:
+        self._import_legacy_users(legacy_file)
+
+    def get(self, email: str) -> Optional[UserRecord]:
+        with get_connection() as conn:
+            row = conn.execute(
+                "SELECT email, password, role FROM users WHERE email = ?",
+                (email,),
+            ).fetchone()
+        if row is None:
+            return None
+        email, password, role = row
+        return UserRecord(email=email, password=password, role=role)
+
+    def create(self, email: str, password_hash: str, role: str = "user") -> bool:
+        """Insert a new user; returns False if the email is already registered."""
+        try:
+            with get_connection() as conn, conn:
+                conn.execute(
+                    "INSERT INTO users (email, password, role) VALUES (?, ?, ?)",
+                    (email, password_hash, role),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def _import_legacy_users(self, legacy_file: Path) -> None:
+        """Copy accounts from the old users.json store; existing rows win."""
+        if not legacy_file.exists():
+            return
+        try:
+            users = json.loads(legacy_file.read_text(encoding="utf-8") or "{}")
+        except (OSError, ValueError) as exc:
+            logger.warning("Unable to read legacy users file %s: %s", legacy_file, exc)
+            return
+        rows = [
+            (email, data["password"], data.get("role", "user"))
+            for email, data in users.items()
+            if isinstance(data, dict) and data.get("password")
+        ]
+        if not rows:
+            return
+        with get_connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (email, password, role) VALUES (?, ?, ?)",
+                rows,
+            )
+
+
+_store: Optional[UserStore] = None
+
+
+def get_user_store() -> UserStore:
+    global _store
+    if _store is None:
+        _store = UserStore()
+    return _store
+
+
+__all__ = ["UserRecord", "UserStore", "get_user_store"]
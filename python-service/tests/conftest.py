@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+SERVICE_DIR = Path(__file__).resolve().parents[1]
+if str(SERVICE_DIR) not in sys.path:
+    sys.path.insert(0, str(SERVICE_DIR))
+
+@pytest.fixture
+def storage_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point settings and the SQLite layer at a fresh directory for one test."""
+    from app.config import get_settings
+    from storage import database
+
+    monkeypatch.setenv("STORAGE_DIR", str(tmp_path))
+    monkeypatch.setenv("DATA_DIR", str(tmp_path / "data"))
+    get_settings.cache_clear()
+    monkeypatch.setattr(database, "_DATABASE_PATH", None)
+    monkeypatch.setattr(database, "_SCHEMA_READY", False)
+    monkeypatch.setattr(database, "_TLS", threading.local())
+    monkeypatch.setattr(database, "_CONNECTIONS", [])
+    yield tmp_path
+    database.close_connections()
+    get_settings.cache_clear()
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+from core import batching
+from core.batching import GenerationBatcher
+
+
+class _Manager:
+    def __init__(self, gate=None):
+        self.batches = []
+        self.single = []
+        self.gate = gate
+        self.started = threading.Event()
+        self.broken = 0
+
+    def generate_batch(self, prompts, model_id=None, **kwargs):
+        self.batches.append((list(prompts), model_id, kwargs))
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if kwargs.get("fail"):
+            raise RuntimeError("generation failed")
+        if self.broken:
+            self.broken -= 1
+            return None
+        return [f"{model_id}:{prompt}" for prompt in prompts]
+
+    def generate_response(self, prompt, model_id=None, **kwargs):
+        self.single.append((prompt, model_id, kwargs))
+        return f"{model_id}:{prompt}"
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    fake = _Manager()
+    monkeypatch.setattr(batching, "get_pytorch_manager", lambda: fake)
+    return fake
+
+
+async def _submit_all(batcher, *calls):
+    return await asyncio.gather(
+        *(batcher.submit(prompt, **kwargs) for prompt, kwargs in calls),
+        return_exceptions=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_not_running_generates_directly(manager):
+    batcher = GenerationBatcher()
+    assert await batcher.submit("hi", model_id="m1", temperature=0.5) == "m1:hi"
+    assert manager.single == [("hi", "m1", {"temperature": 0.5})]
+    assert manager.batches == []
+
+
+@pytest.mark.asyncio
+async def test_groups_by_model_and_parameters(manager):
+    batcher = GenerationBatcher(max_delay=0.05)
+    batcher.start()
+    try:
+        results = await _submit_all(
+            batcher,
+            ("a", {"model_id": "m1", "temperature": 0.5}),
+            ("b", {"model_id": "m1", "temperature": 0.5}),
+            ("c", {"model_id": "m2", "temperature": 0.5}),
+            ("d", {"model_id": "m1", "temperature": 0.9}),
+        )
+    finally:
+        await batcher.stop()
+    assert results == ["m1:a", "m1:b", "m2:c", "m1:d"]
+    assert sorted(manager.batches, key=lambda call: call[0]) == [
+        (["a", "b"], "m1", {"temperature": 0.5}),
+        (["c"], "m2", {"temperature": 0.5}),
+        (["d"], "m1", {"temperature": 0.9}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unhashable_parameters_are_batched(manager):
+    batcher = GenerationBatcher(max_delay=0.05)
+    batcher.start()
+    try:
+        results = await _submit_all(
+            batcher,
+            ("a", {"stop": ["\n"], "extra": {"x": 1}}),
+            ("b", {"stop": ["\n"], "extra": {"x": 1}}),
+            ("c", {"stop": ["END"]}),
+        )
+    finally:
+        await batcher.stop()
+    assert results == ["None:a", "None:b", "None:c"]
+    assert sorted(prompts for prompts, _, _ in manager.batches) == [["a", "b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_failures_stay_within_their_group_and_loop_survives(manager):
+    manager.broken = 1
+    batcher = GenerationBatcher(max_delay=0.05)
+    batcher.start()
+    try:
+        # generate_batch returning garbage must fail its callers, not the loop
+        broken = await _submit_all(batcher, ("a", {}))
+        assert isinstance(broken[0], TypeError)
+        results = await _submit_all(batcher, ("b", {"fail": True}), ("c", {}))
+        assert batcher.running
+    finally:
+        await batcher.stop()
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == "None:c"
+
+
+@pytest.mark.asyncio
+async def test_stop_fails_the_batch_in_flight(monkeypatch):
+    gate = threading.Event()
+    fake = _Manager(gate=gate)
+    monkeypatch.setattr(batching, "get_pytorch_manager", lambda: fake)
+    batcher = GenerationBatcher(max_delay=0.0)
+    batcher.start()
+    try:
+        pending = asyncio.ensure_future(batcher.submit("a"))
+        assert await asyncio.to_thread(fake.started.wait, 5)
+        await batcher.stop()
+        with pytest.raises(RuntimeError, match="stopped"):
+            await asyncio.wait_for(pending, timeout=1)
+    finally:
+        gate.set()
+    assert not batcher.running
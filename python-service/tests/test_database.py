@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+
+from storage import database
+
+
+def test_close_connections_closes_every_thread_and_reopens(storage_dir):
+    with database.get_connection() as conn:
+        conn.execute("SELECT count(*) FROM sessions").fetchone()
+    opened = []
+    worker = threading.Thread(target=lambda: opened.append(database._ensure_connection()))
+    worker.start()
+    worker.join()
+
+    database.close_connections()
+
+    for closed in (conn, opened[0]):
+        with pytest.raises(sqlite3.ProgrammingError):
+            closed.execute("SELECT 1")
+    with database.get_connection() as reopened:
+        assert reopened is not conn
+        assert reopened.execute("SELECT count(*) FROM sessions").fetchone() == (0,)
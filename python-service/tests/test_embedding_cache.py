@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import numpy as np
+
+from storage.embedding_cache import EmbeddingCache
+
+
+def _vector(text: str) -> np.ndarray:
+    return np.array([len(text), ord(text[0]), 0.5], dtype="<f4")
+
+
+class _Embedder:
+    def __init__(self) -> None:
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [_vector(text).tobytes() for text in texts]
+
+
+def test_computes_distinct_misses_once_and_keeps_order(storage_dir):
+    cache = EmbeddingCache()
+    embed = _Embedder()
+    texts = ["alpha", "beta", "alpha", "gamma"]
+
+    matrix = cache.get_or_compute_many(texts, "model-a", embed)
+
+    assert embed.calls == [["alpha", "beta", "gamma"]]
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (4, 3)
+    np.testing.assert_array_equal(matrix, np.stack([_vector(t) for t in texts]))
+
+
+def test_second_call_hits_the_cache(storage_dir):
+    cache = EmbeddingCache()
+    embed = _Embedder()
+    cache.get_or_compute_many(["alpha", "beta"], "model-a", embed)
+
+    matrix = cache.get_or_compute_many(["beta", "delta", "alpha"], "model-a", embed)
+
+    assert embed.calls == [["alpha", "beta"], ["delta"]]
+    np.testing.assert_array_equal(matrix, np.stack([_vector(t) for t in ["beta", "delta", "alpha"]]))
+
+
+def test_entries_are_per_model(storage_dir):
+    cache = EmbeddingCache()
+    embed = _Embedder()
+    cache.get_or_compute_many(["alpha"], "model-a", embed)
+    cache.get_or_compute_many(["alpha"], "model-b", embed)
+    assert embed.calls == [["alpha"], ["alpha"]]
+
+
+def test_empty_input(storage_dir):
+    embed = _Embedder()
+    matrix = EmbeddingCache().get_or_compute_many([], "model-a", embed)
+    assert embed.calls == []
+    assert matrix.shape == (0, 0)
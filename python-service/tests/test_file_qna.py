@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import zlib
+
+import numpy as np
+import pytest
+
+for _module in ("fitz", "pandas", "openai", "httpx"):
+    pytest.importorskip(_module)
+
+from tools import file_qna
+from tools.file_qna import FileQAManager, _chunk_text, _chunk_words
+
+_DIM = 16
+
+
+def _fake_embeddings(texts, model=None):
+    rows = np.zeros((len(texts), _DIM), dtype=np.float32)
+    for row, text in zip(rows, texts):
+        for word in text.lower().split():
+            row[zlib.crc32(word.encode()) % _DIM] += 1
+    return rows
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_qna, "create_embeddings", _fake_embeddings)
+    file_qna._query_vector.cache_clear()
+    yield FileQAManager(tmp_path / "qna")
+    file_qna._query_vector.cache_clear()
+
+
+def _ingest(manager, tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return manager.ingest_file("s1", path)
+
+
+def _fresh(manager):
+    # A second manager over the same directory, as another worker would see it.
+    return FileQAManager(manager.storage_dir)
+
+
+def test_chunk_words_matches_chunk_text():
+    for count in (0, 1, 10, 799, 800, 801, 1400, 2500):
+        words = [f"w{i}" for i in range(count)]
+        text = " ".join(words)
+        assert list(_chunk_words(words, 50, 10)) == _chunk_text(text, 50, 10)
+
+
+def test_ingest_writes_sidecar_and_reloads(manager, tmp_path):
+    assert _ingest(manager, tmp_path, "fruit.txt", "apples pears plums") == {"file_name": "fruit.txt", "chunks": 1}
+    _ingest(manager, tmp_path, "cars.txt", "engines wheels brakes")
+
+    assert (manager.storage_dir / "s1.vectors.npz").exists()
+    with np.load(manager.storage_dir / "s1.vectors.npz") as stored:
+        assert stored["doc_ids"].tolist() == ["fruit.txt", "cars.txt"]
+        assert stored["counts"].tolist() == [1, 1]
+        assert stored["matrix"].dtype == np.float32
+
+    other = _fresh(manager)
+    assert other.document_stats("s1") == {"fruit.txt": 1, "cars.txt": 1}
+    assert [chunk.metadata["file_name"] for chunk in other.query("s1", "wheels brakes", top_k=1)] == ["cars.txt"]
+    assert "## fruit.txt" in other.build_context("s1", "apples", top_k=1)
+
+
+def test_session_cache_follows_the_json_mtime(manager, tmp_path):
+    _ingest(manager, tmp_path, "fruit.txt", "apples pears plums")
+    first = manager._load_session("s1")
+    assert manager._load_session("s1") is first
+
+    other = _fresh(manager)
+    _ingest(other, tmp_path, "cars.txt", "engines wheels brakes")
+    assert manager.list_documents("s1") == ["cars.txt", "fruit.txt"]
+
+
+def test_mismatched_vectors_are_excluded_and_logged(manager, tmp_path, caplog):
+    _ingest(manager, tmp_path, "fruit.txt", "apples pears plums")
+    _ingest(manager, tmp_path, "cars.txt", "engines wheels brakes")
+    # Simulate a crash after the JSON gained a chunk the vectors file never got.
+    session = manager.storage_dir / "s1.json"
+    raw = json.loads(session.read_text())
+    raw["cars.txt"].append({**raw["cars.txt"][0], "chunk_id": "cars_chunk_1"})
+    session.write_text(json.dumps(raw))
+
+    other = _fresh(manager)
+    index = other._load_session("s1")
+    assert "cars.txt has 2 chunks but 1 stored vectors" in caplog.text
+    assert [chunk.metadata["file_name"] for chunk in index.chunks] == ["fruit.txt"]
+    assert index.matrix.shape == (1, _DIM)
+    assert other.document_stats("s1") == {"fruit.txt": 1, "cars.txt": 2}
+
+
+def test_legacy_vector_files(manager, tmp_path):
+    _ingest(manager, tmp_path, "fruit.txt", "apples pears plums")
+    with np.load(manager.storage_dir / "s1.vectors.npz") as stored:
+        matrix = stored["matrix"]
+    (manager.storage_dir / "s1.vectors.npz").unlink()
+
+    np.save(manager.storage_dir / "s1.npy", matrix)
+    assert _fresh(manager)._load_session("s1").matrix.shape == (1, _DIM)
+
+    np.save(manager.storage_dir / "s1.npy", np.vstack([matrix, matrix]))
+    assert len(_fresh(manager)._load_session("s1").chunks) == 0
+
+    # Even older sessions kept embeddings inline in the JSON.
+    (manager.storage_dir / "s1.npy").unlink()
+    session = manager.storage_dir / "s1.json"
+    raw = json.loads(session.read_text())
+    raw["fruit.txt"][0]["embedding"] = [3.0] + [0.0] * (_DIM - 1)
+    session.write_text(json.dumps(raw))
+    index = _fresh(manager)._load_session("s1")
+    np.testing.assert_allclose(index.matrix, np.eye(1, _DIM, dtype=np.float32))
+    assert index.chunks[0].embedding is None
+
+
+def test_drop_session_removes_files(manager, tmp_path):
+    _ingest(manager, tmp_path, "fruit.txt", "apples pears plums")
+    np.save(manager.storage_dir / "s1.npy", np.zeros((1, _DIM), dtype=np.float32))
+    manager.drop_session("s1")
+    assert list(manager.storage_dir.iterdir()) == []
+    assert manager.list_documents("s1") == []
+    assert manager.query("s1", "apples") == []
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+import stat
+
+import pytest
+
+from storage.files import atomic_write_bytes
+
+
+def _leftovers(directory):
+    return [p.name for p in directory.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_creates_file_with_default_mode(tmp_path):
+    target = tmp_path / "data.bin"
+    atomic_write_bytes(target, b"hello")
+    assert target.read_bytes() == b"hello"
+    assert stat.S_IMODE(target.stat().st_mode) == 0o644
+    assert _leftovers(tmp_path) == []
+
+
+def test_replace_keeps_existing_mode(tmp_path):
+    target = tmp_path / "data.bin"
+    target.write_bytes(b"old")
+    os.chmod(target, 0o600)
+    atomic_write_bytes(target, b"new", durable=True)
+    assert target.read_bytes() == b"new"
+    assert stat.S_IMODE(target.stat().st_mode) == 0o600
+    assert _leftovers(tmp_path) == []
+
+
+def test_failed_replace_leaves_original_and_no_temp_file(tmp_path, monkeypatch):
+    target = tmp_path / "data.bin"
+    target.write_bytes(b"original")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        atomic_write_bytes(target, b"partial")
+    assert target.read_bytes() == b"original"
+    assert _leftovers(tmp_path) == []
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from tools import internet_access
+from tools.internet_access import InternetAccessManager, SearchResult
+
+
+def _result(source: str) -> SearchResult:
+    return SearchResult(title=f"{source} result", url="", snippet="", source=source, timestamp=None)
+
+
+def _manager(monkeypatch, premium, hedge_delay=None):
+    """A manager without config files or quota tracking; ``premium`` stands in for the paid APIs."""
+    monkeypatch.setattr(internet_access, "_wikipedia", lambda: None)
+    manager = InternetAccessManager.__new__(InternetAccessManager)
+    manager._cache_enabled = False
+    manager.hedge_delay = hedge_delay
+    manager.free_calls = 0
+
+    def search_duckduckgo_free(query):
+        manager.free_calls += 1
+        return [_result("duckduckgo")]
+
+    manager._run_premium_searches = premium
+    manager.search_duckduckgo_free = search_duckduckgo_free
+    return manager
+
+
+def test_free_search_is_skipped_when_premium_suffices(monkeypatch):
+    manager = _manager(monkeypatch, lambda query: ([("google", [_result("google")] * 3)], True))
+    result = manager.comprehensive_search("q")
+    assert result["sources_used"] == ["google"]
+    assert manager.free_calls == 0
+
+
+def test_free_search_runs_after_premium_falls_short(monkeypatch):
+    manager = _manager(monkeypatch, lambda query: ([], False))
+    result = manager.comprehensive_search("q")
+    assert result["sources_used"] == ["duckduckgo"]
+    assert manager.free_calls == 1
+
+
+def test_hedge_delay_starts_free_search_while_premium_is_slow(monkeypatch):
+    free_started = threading.Event()
+
+    def premium(query):
+        # Only finishes once the hedged free search has been started.
+        assert free_started.wait(5)
+        return [], False
+
+    manager = _manager(monkeypatch, premium, hedge_delay=0.05)
+    search_free = manager.search_duckduckgo_free
+
+    def search_duckduckgo_free(query):
+        free_started.set()
+        return search_free(query)
+
+    manager.search_duckduckgo_free = search_duckduckgo_free
+    result = manager.comprehensive_search("q")
+    assert result["sources_used"] == ["duckduckgo"]
+    assert manager.free_calls == 1
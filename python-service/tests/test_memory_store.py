@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from storage import memory_store
+from storage.database import get_connection
+from storage.memory_store import (
+    MemoryEntry,
+    MemoryStore,
+    _VECTOR_DIM,
+    _VectorCache,
+    _embed_text,
+    _pack_vector,
+    _unpack_matrix,
+)
+
+
+@pytest.fixture(autouse=True)
+def numpy_search(monkeypatch):
+    # Exercise the exact numpy ranking whether or not faiss is installed.
+    monkeypatch.setattr(memory_store, "_FAISS_AVAILABLE", False)
+
+
+def _unit(seed: int) -> np.ndarray:
+    vec = np.random.default_rng(seed).standard_normal(_VECTOR_DIM).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def test_pack_vector_round_trip():
+    vec = _unit(1)
+    blob = _pack_vector(vec)
+    assert len(blob) == _VECTOR_DIM + 4
+    restored = _unpack_matrix([blob])[0]
+    assert np.max(np.abs(restored - vec)) <= np.max(np.abs(vec)) / 127
+    assert float(restored @ vec) > 0.999
+
+
+def test_unpack_matrix_mixes_legacy_float_blobs_in_order():
+    vectors = [_unit(1), _unit(2), _unit(3)]
+    blobs = [_pack_vector(vectors[0]), vectors[1].tobytes(), _pack_vector(vectors[2])]
+    matrix = _unpack_matrix(blobs)
+    assert matrix.shape == (3, _VECTOR_DIM) and matrix.flags.c_contiguous
+    np.testing.assert_array_equal(matrix[1], vectors[1])
+    np.testing.assert_allclose(matrix[[0, 2]], np.stack([vectors[0], vectors[2]]), atol=0.01)
+
+
+def test_pack_zero_vector():
+    zero = np.zeros(_VECTOR_DIM, dtype=np.float32)
+    np.testing.assert_array_equal(_unpack_matrix([_pack_vector(zero)])[0], zero)
+
+
+def _cache(ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    rows = [(f"row{i}",) for i in ids]
+    vectors = np.stack([_unit(int(i)) for i in ids]) if len(ids) else np.empty((0, _VECTOR_DIM), np.float32)
+    return ids, rows, vectors
+
+
+def test_vector_cache_extend_mask_and_compact():
+    cache = _VectorCache.build(*_cache([1, 2, 3]))
+    assert (cache.max_id, cache.live, cache.dead) == (3, 3, 0)
+
+    cache = cache.extended(*_cache([5, 8]))
+    assert (cache.max_id, cache.live, len(cache.rows)) == (8, 5, 5)
+    assert cache.extended(*_cache([])) is cache
+
+    cache = cache.without(np.array([2, 5]))
+    assert cache.alive.tolist() == [True, False, True, False, True]
+    assert (cache.live, cache.dead) == (3, 2)
+
+    cache = cache.keeping(np.array([1, 2, 8]))
+    assert cache.alive.tolist() == [True, False, False, False, True]
+
+    compacted = cache.compacted()
+    assert compacted.ids.tolist() == [1, 8]
+    assert compacted.rows == [("row1",), ("row8",)]
+    np.testing.assert_array_equal(compacted.vectors, cache.vectors[[0, 4]])
+    assert (compacted.live, compacted.dead, compacted.max_id) == (2, 0, 8)
+
+
+def _add(store, session, content):
+    store.add_long_term(MemoryEntry(session_id=session, role="user", content=content, tags=["t"]))
+
+
+def test_search_ranks_by_similarity(storage_dir):
+    store = MemoryStore()
+    _add(store, "s", "apples and pears")
+    _add(store, "s", "the weather is sunny")
+    _add(store, "t", "sunny weather")
+    results = store.search_long_term("sunny weather", limit=2)
+    assert [r["content"] for r in results] == ["sunny weather", "the weather is sunny"]
+    assert results[0]["tags"] == ["t"] and results[0]["session_id"] == "t"
+    assert store.search_long_term("   ") == []
+
+
+def test_pruned_rows_are_masked_then_compacted(storage_dir):
+    store = MemoryStore()
+    for i in range(200):
+        _add(store, "s", f"memory {i}")
+    assert len(store.search_long_term("memory", limit=500)) == 200
+
+    for i in range(200, 300):
+        _add(store, "s", f"memory {i}")
+    # Each insert past 200 pruned the session's oldest row out of the cache.
+    assert store._vec_cache.dead == 100
+
+    results = store.search_long_term("memory", limit=500)
+    assert sorted(int(r["content"].split()[1]) for r in results) == list(range(100, 300))
+    # 100 dead rows out of 300 is past the compaction threshold.
+    assert store._vec_cache.dead == 0
+    assert store._vec_cache.ids.tolist() == sorted(store._vec_cache.ids.tolist())
+    assert len(store._vec_cache.rows) == 200
+
+
+def test_sees_rows_written_and_deleted_by_other_workers(storage_dir):
+    store = MemoryStore()
+    other = MemoryStore()
+    _add(store, "s", "first note")
+    assert [r["content"] for r in store.search_long_term("note")] == ["first note"]
+
+    _add(other, "s", "second note")
+    assert sorted(r["content"] for r in store.search_long_term("note")) == ["first note", "second note"]
+
+    with get_connection() as conn:
+        conn.execute("DELETE FROM memory_long WHERE content = ?", ("first note",))
+    assert [r["content"] for r in store.search_long_term("note")] == ["second note"]
+
+
+def test_embedding_is_read_only_and_normalised():
+    vec = _embed_text("Hello hello world")
+    assert vec.dtype == np.float32 and not vec.flags.writeable
+    assert np.isclose(np.linalg.norm(vec), 1.0)
+    assert not _embed_text("").any()
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pytest
+
+from storage.moderation_log import _iter_lines_reversed
+
+
+@pytest.mark.parametrize("block", [1, 3, 7, 64 * 1024])
+def test_lines_come_back_last_first(tmp_path, block):
+    path = tmp_path / "log.jsonl"
+    lines = [f"line {i} " + "x" * i for i in range(20)]
+    path.write_bytes(("\n".join(lines) + "\n").encode("utf-8"))
+    got = [line for line in _iter_lines_reversed(path, block=block) if line]
+    assert got == [line.encode("utf-8") for line in reversed(lines)]
+
+
+@pytest.mark.parametrize("block", [2, 5, 64 * 1024])
+def test_last_line_without_newline_and_multibyte_text(tmp_path, block):
+    path = tmp_path / "log.jsonl"
+    path.write_bytes("première\n\nzweite ß\ndritte".encode("utf-8"))
+    got = list(_iter_lines_reversed(path, block=block))
+    assert got == ["dritte".encode(), "zweite ß".encode(), b"", "première".encode()]
+
+
+def test_empty_file_yields_nothing(tmp_path):
+    path = tmp_path / "log.jsonl"
+    path.touch()
+    assert list(_iter_lines_reversed(path)) == []
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from tools import search
+from tools.search import SearchManager, SearchResult, _parse_ddg_html, _unwrap_ddg_link
+
+DDG_HTML = """
+<div class="results">
+  <div class="result">
+    <h2><a class="result__a" href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2Fa%3Fq%3D1&amp;rut=abc">
+      First <b>result</b></a></h2>
+    <a class="result__snippet">Snippet one</a>
+  </div>
+  <div class="result result--ad"><span>no link here</span></div>
+  <div class="result">
+    <a class="result__a" href="https://example.org/b">Second</a>
+  </div>
+  <div class="result">
+    <a class="result__a" href="https://example.net/c">Third</a>
+    <a class="result__snippet">Snippet three</a>
+  </div>
+</div>
+"""
+
+PARSERS = ["bs4"]
+if search.HTMLParser is not None:
+    PARSERS.append("selectolax")
+
+
+@pytest.fixture(params=PARSERS)
+def parser(request, monkeypatch):
+    if request.param == "bs4":
+        pytest.importorskip("bs4")
+        monkeypatch.setattr(search, "HTMLParser", None)
+    return request.param
+
+
+def test_unwrap_ddg_link():
+    assert _unwrap_ddg_link("//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2F&rut=x") == "https://example.com/"
+    assert _unwrap_ddg_link("https://example.com/l/") == "https://example.com/l/"
+    assert _unwrap_ddg_link("https://example.com/page?uddg=x") == "https://example.com/page?uddg=x"
+    assert _unwrap_ddg_link("") == ""
+
+
+def test_parse_ddg_html(parser):
+    assert _parse_ddg_html(DDG_HTML, 5) == [
+        {"title": "Firstresult", "url": "https://example.com/a?q=1", "snippet": "Snippet one"},
+        {"title": "Second", "url": "https://example.org/b", "snippet": ""},
+        {"title": "Third", "url": "https://example.net/c", "snippet": "Snippet three"},
+    ]
+
+
+def test_parse_ddg_html_limits_results(parser):
+    assert [row["title"] for row in _parse_ddg_html(DDG_HTML, 2)] == ["Firstresult", "Second"]
+    assert _parse_ddg_html(DDG_HTML, 0) == []
+    assert _parse_ddg_html("<html></html>", 5) == []
+
+
+class _Provider:
+    def __init__(self, name, results=(), *, delay=0.0, error=None, gate=None):
+        self.name = name
+        self.results = [SearchResult(f"{name} {r}", f"https://{name}/{r}", "") for r in results]
+        self.delay = delay
+        self.error = error
+        self.gate = gate
+        self.calls = 0
+
+    def search(self, query, *, max_results=5):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.results
+
+
+def _manager(monkeypatch, primary, fallback, hedge_delay=None):
+    settings = SimpleNamespace(tavily_api_key="key", serpapi_api_key=None, search_hedge_delay=hedge_delay)
+    monkeypatch.setattr(search, "get_settings", lambda: settings)
+    manager = SearchManager()
+    manager.providers = {"auto": primary, "tavily": primary, "duckduckgo": fallback}
+    return manager
+
+
+def test_hedge_delay_is_off_unless_positive(monkeypatch):
+    for value, expected in [(None, None), (0, None), (-1.0, None), (0.5, 0.5)]:
+        assert _manager(monkeypatch, None, None, value).hedge_delay == expected
+
+
+def test_slow_primary_is_awaited_without_hedge_delay(monkeypatch):
+    primary = _Provider("tavily", ["a"], delay=0.2)
+    fallback = _Provider("duckduckgo", ["b"])
+    results = _manager(monkeypatch, primary, fallback).search("q")
+    assert [r.title for r in results] == ["tavily a"]
+    assert fallback.calls == 0
+
+
+@pytest.mark.parametrize(
+    "primary",
+    [
+        _Provider("tavily", error=RuntimeError("boom")),
+        _Provider("tavily", []),
+    ],
+    ids=["failure", "empty"],
+)
+def test_fallback_runs_when_primary_fails_or_is_empty(monkeypatch, primary):
+    fallback = _Provider("duckduckgo", ["b"])
+    results = _manager(monkeypatch, primary, fallback).search("q")
+    assert [r.title for r in results] == ["duckduckgo b"]
+    assert fallback.calls == 1
+
+
+def test_hedge_delay_races_the_fallback(monkeypatch):
+    release = threading.Event()
+    primary = _Provider("tavily", ["a"], gate=release)
+    fallback = _Provider("duckduckgo", ["b"])
+    try:
+        results = _manager(monkeypatch, primary, fallback, hedge_delay=0.05).search("q")
+    finally:
+        release.set()
+    assert [r.title for r in results] == ["duckduckgo b"]
+
+
+def test_fast_primary_wins_with_hedge_delay(monkeypatch):
+    primary = _Provider("tavily", ["a"])
+    fallback = _Provider("duckduckgo", ["b"])
+    results = _manager(monkeypatch, primary, fallback, hedge_delay=1.0).search("q")
+    assert [r.title for r in results] == ["tavily a"]
+    assert fallback.calls == 0
+
+
+def test_no_results_from_either_provider(monkeypatch):
+    primary = _Provider("tavily", error=RuntimeError("boom"))
+    fallback = _Provider("duckduckgo", [])
+    assert _manager(monkeypatch, primary, fallback, hedge_delay=0.05).search("q") == []
+
+
+def test_duckduckgo_only_setup_has_no_fallback(monkeypatch):
+    provider = _Provider("duckduckgo", [])
+    manager = _manager(monkeypatch, provider, provider)
+    manager.providers = {"auto": provider, "duckduckgo": provider}
+    assert manager.search("q") == []
+    assert provider.calls == 1
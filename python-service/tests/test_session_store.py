@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from storage.database import get_connection
+from storage.session_store import SessionRecord, SessionStore
+
+
+def _record(messages):
+    return SessionRecord(
+        id="sess",
+        title="Chat",
+        created_at=1.0,
+        persona_names=["ashley"],
+        messages=messages,
+        settings={"model": "m"},
+    )
+
+
+def _message(role, content, ts):
+    return {"role": role, "content": content, "timestamp": ts}
+
+
+def _stored_rows():
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT id, role, content FROM session_messages WHERE session_id = ? ORDER BY id", ("sess",)
+        ).fetchall()
+
+
+def test_save_and_load_round_trip(storage_dir):
+    store = SessionStore()
+    record = _record([_message("user", "hi", 1.0), {**_message("assistant", "hello", 2.0), "metadata": {"k": 1}}])
+    record.usage = {"prompt_tokens": 3, "completion_tokens": 4, "cost_usd": 0.5}
+    store.save(record)
+
+    loaded = store.load("sess")
+    assert loaded.messages == record.messages
+    assert loaded.usage == {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7, "cost_usd": 0.5}
+    assert loaded.settings == {"model": "m"} and loaded.persona_names == ["ashley"]
+    assert loaded._persisted_count == 2
+
+
+def test_save_appends_only_new_messages(storage_dir):
+    store = SessionStore()
+    record = _record([_message("user", "one", 1.0)])
+    store.save(record)
+    before = _stored_rows()
+
+    record.messages.append(_message("assistant", "two", 2.0))
+    record.messages.append(_message("user", "three", 3.0))
+    store.save(record)
+
+    after = _stored_rows()
+    assert after[:1] == before
+    assert [content for _, _, content in after] == ["one", "two", "three"]
+    # Saving again with nothing new writes nothing.
+    store.save(record)
+    assert _stored_rows() == after
+
+
+def test_loaded_record_appends_after_stored_history(storage_dir):
+    store = SessionStore()
+    store.save(_record([_message("user", "one", 1.0)]))
+    loaded = store.load("sess")
+    loaded.messages.append(_message("assistant", "two", 2.0))
+    store.save(loaded)
+    assert [content for _, _, content in _stored_rows()] == ["one", "two"]
+
+
+def test_replace_rewrites_edited_history(storage_dir):
+    store = SessionStore()
+    record = _record([_message("user", "one", 1.0), _message("assistant", "two", 2.0)])
+    store.save(record)
+
+    record.messages[0] = _message("user", "edited", 1.0)
+    store.save(record, replace=True)
+    assert [content for _, _, content in _stored_rows()] == ["edited", "two"]
+
+
+def test_shortened_history_is_rewritten(storage_dir):
+    store = SessionStore()
+    record = _record([_message("user", "one", 1.0), _message("assistant", "two", 2.0)])
+    store.save(record)
+
+    del record.messages[1:]
+    store.save(record)
+    assert [content for _, _, content in _stored_rows()] == ["one"]
+
+
+def test_failed_save_rolls_back(storage_dir):
+    store = SessionStore()
+    record = _record([_message("user", "one", 1.0)])
+    store.save(record)
+
+    record.messages.append({"role": "user", "content": object(), "timestamp": 2.0})
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.save(record)
+    assert [content for _, _, content in _stored_rows()] == ["one"]
+    assert record._persisted_count == 1
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from tools import tokenizer
+
+
+class _WordEncoder:
+    """Offline stand-in for a tiktoken encoding: one token per word and its leading space."""
+
+    def __init__(self) -> None:
+        self._ids = {}
+        self._words = []
+
+    def _id(self, word: str) -> int:
+        if word not in self._ids:
+            self._ids[word] = len(self._words)
+            self._words.append(word)
+        return self._ids[word]
+
+    def encode_ordinary(self, text: str):
+        return [self._id(word) for word in re.findall(r"\s*\S+|\s+", text)]
+
+    encode = encode_ordinary
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+    def decode(self, tokens) -> str:
+        return "".join(self._words[token] for token in tokens)
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    fake = _WordEncoder()
+    monkeypatch.setattr(tokenizer, "_load_encoder", lambda model: fake)
+    monkeypatch.setattr(tokenizer, "_shared_encoders", {})
+    monkeypatch.setattr(tokenizer, "_thread_encoders", type(tokenizer._thread_encoders)())
+    tokenizer._length_cache.clear()
+    tokenizer._encoded.cache_clear()
+    yield fake
+    tokenizer._length_cache.clear()
+    tokenizer._encoded.cache_clear()
+
+
+def _reference_truncate(messages, encoder, max_prompt_tokens):
+    # The original per-message loop that safe_truncate_messages must keep matching.
+    total_tokens = 0
+    truncated = []
+    for message in reversed(messages):
+        content = message.get("content", "")
+        message_tokens = len(encoder.encode(content)) + 3
+        if total_tokens + message_tokens > max_prompt_tokens:
+            remaining = max_prompt_tokens - total_tokens - 3
+            if remaining > 0:
+                truncated_content = encoder.decode(encoder.encode(content)[-remaining:])
+                truncated.append({**message, "content": truncated_content})
+                total_tokens += remaining + 3
+            break
+        truncated.append(message)
+        total_tokens += message_tokens
+    truncated.reverse()
+    return truncated
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are a helpful assistant who answers briefly."},
+    {"role": "user", "content": "Hallo, wie geht's? Ich möchte über Käse sprechen."},
+    {"role": "assistant", "content": ""},
+    {"role": "user"},
+    {"role": "assistant", "content": "Sure - " + " ".join(f"word{i}" for i in range(40))},
+    {"role": "user", "content": "And one more question about the weather today?"},
+]
+
+
+@pytest.mark.parametrize("budget", range(0, 120, 3))
+def test_matches_reference_for_every_budget(encoder, budget):
+    expected = _reference_truncate(MESSAGES, encoder, budget)
+    assert tokenizer.safe_truncate_messages(MESSAGES, "test-model", budget) == expected
+    # A second pass goes through the memoised lengths and must agree too.
+    assert tokenizer.safe_truncate_messages(MESSAGES, "test-model", budget) == expected
+
+
+def test_everything_fits_returns_a_copy(encoder):
+    result = tokenizer.safe_truncate_messages(MESSAGES, "test-model", 10_000)
+    assert result == MESSAGES
+    assert result is not MESSAGES
+
+
+def test_fits_in_tokens(encoder):
+    text = "one two three four five"
+    assert tokenizer.fits_in_tokens(text, "test-model", 5)
+    assert not tokenizer.fits_in_tokens(text, "test-model", 4)
+
+
+def test_warmup_skips_models_that_fail_to_load(encoder, monkeypatch):
+    failing = next(iter(tokenizer._MODEL_COSTS))
+
+    def load(model):
+        if model == failing:
+            raise OSError("no cached BPE table")
+        return encoder
+
+    monkeypatch.setattr(tokenizer, "_load_encoder", load)
+    tokenizer._warm_encoders()
+    assert set(tokenizer._shared_encoders) == set(tokenizer._MODEL_COSTS) - {failing}
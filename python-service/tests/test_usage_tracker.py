@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+
+from storage.usage_tracker import UsageTracker
+
+
+def _record(tracker, prompt, completion, cost):
+    tracker.update(session_id="s", model="m", prompt_tokens=prompt, completion_tokens=completion, cost_usd=cost)
+
+
+def test_updates_accumulate_across_trackers(storage_dir):
+    first = UsageTracker(legacy_file=storage_dir / "missing.json")
+    second = UsageTracker(legacy_file=storage_dir / "missing.json")
+    _record(first, 10, 2, 0.25)
+    _record(second, 5, 1, 0.5)
+    _record(first, 1, 1, 0.25)
+    assert first.get_month_usage() == "Prompt: 16 | Completion: 4 | Cost: $1.0000"
+    assert second.get_month_usage("1999-01") == "Prompt: 0 | Completion: 0 | Cost: $0.0000"
+
+
+def test_legacy_ledger_is_imported_once(storage_dir):
+    legacy = storage_dir / "usage.json"
+    legacy.write_text(
+        json.dumps({"2024-05": {"prompt_tokens": 7, "completion_tokens": 3, "cost_usd": 1.5}, "bad": 1}),
+        encoding="utf-8",
+    )
+    tracker = UsageTracker(legacy_file=legacy)
+    assert tracker.get_month_usage("2024-05") == "Prompt: 7 | Completion: 3 | Cost: $1.5000"
+    # A second start (or another worker) must not add the file's totals again.
+    UsageTracker(legacy_file=legacy)
+    assert tracker.get_month_usage("2024-05") == "Prompt: 7 | Completion: 3 | Cost: $1.5000"
+
+
+def test_unreadable_legacy_ledger_is_ignored(storage_dir, caplog):
+    legacy = storage_dir / "usage.json"
+    legacy.write_text("{not json", encoding="utf-8")
+    tracker = UsageTracker(legacy_file=legacy)
+    assert tracker.get_month_usage() == "Prompt: 0 | Completion: 0 | Cost: $0.0000"
+    assert "Unable to read legacy usage file" in caplog.text
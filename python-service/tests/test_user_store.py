@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import json
+
+from storage.user_store import UserRecord, UserStore
+
+
+def test_create_and_get(storage_dir):
+    store = UserStore(legacy_file=storage_dir / "missing.json")
+    assert store.get("a@example.com") is None
+    assert store.create("a@example.com", "$2b$hash", role="admin")
+    assert store.get("a@example.com") == UserRecord("a@example.com", "$2b$hash", "admin")
+
+
+def test_create_rejects_duplicate_email(storage_dir):
+    store = UserStore(legacy_file=storage_dir / "missing.json")
+    assert store.create("a@example.com", "$2b$first")
+    assert not store.create("a@example.com", "$2b$second")
+    assert store.get("a@example.com").password == "$2b$first"
+
+
+def test_legacy_import_skips_invalid_entries_and_keeps_existing_rows(storage_dir):
+    legacy = storage_dir / "users.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "old@example.com": {"password": "$2b$old", "role": "admin"},
+                "plain@example.com": {"password": "$2b$plain"},
+                "nopass@example.com": {"role": "user"},
+                "broken@example.com": "not-a-dict",
+            }
+        ),
+        encoding="utf-8",
+    )
+    UserStore(legacy_file=legacy)
+    legacy.write_text(json.dumps({"old@example.com": {"password": "$2b$changed"}}), encoding="utf-8")
+    store = UserStore(legacy_file=legacy)
+
+    assert store.get("old@example.com") == UserRecord("old@example.com", "$2b$old", "admin")
+    assert store.get("plain@example.com") == UserRecord("plain@example.com", "$2b$plain", "user")
+    assert store.get("nopass@example.com") is None
+    assert store.get("broken@example.com") is None
+
+
+def test_unreadable_legacy_file_is_ignored(storage_dir, caplog):
+    legacy = storage_dir / "users.json"
+    legacy.write_text("{not json", encoding="utf-8")
+    store = UserStore(legacy_file=legacy)
+    assert store.get("anyone@example.com") is None
+    assert "Unable to read legacy users file" in caplog.text
@@ -4,10 +4,12 @@ import contextlib
 import io
 import math
 import multiprocessing as mp
+import re
 import statistics
 import textwrap
 import traceback
 from dataclasses import dataclass
+from multiprocessing.connection import wait as wait_ready
 from typing import Any, Dict, Optional
 
 SAFE_BUILTINS = {
@@ -31,6 +33,10 @@ SAFE_GLOBALS = {
     "statistics": statistics,
 }
 
+PROHIBITED_KEYWORDS = ("import os", "import sys", "open(", "__import__", "subprocess", "socket")
+# One case-insensitive pass over the source instead of lowercasing it and scanning per keyword.
+_PROHIBITED_RE = re.compile("|".join(re.escape(keyword) for keyword in PROHIBITED_KEYWORDS), re.IGNORECASE)
+
 
 @dataclass
 class CodeExecutionResult:
@@ -41,7 +47,7 @@ class CodeExecutionResult:
     globals_snapshot: Dict[str, Any]
 
 
-def _worker(code: str, input_data: Optional[str], queue: mp.Queue) -> None:
+def _worker(code: str, input_data: Optional[str]) -> Dict[str, Any]:
     stdout_buffer = io.StringIO()
     stderr_buffer = io.StringIO()
     globals_dict: Dict[str, Any] = dict(SAFE_GLOBALS)
@@ -51,23 +57,27 @@ def _worker(code: str, input_data: Optional[str], queue: mp.Queue) -> None:
     try:
         with contextlib.redirect_stdout(stdout_buffer), contextlib.redirect_stderr(stderr_buffer):
             exec(code, globals_dict, locals_dict)
-        queue.put(
-            {
-                "stdout": stdout_buffer.getvalue(),
-                "stderr": stderr_buffer.getvalue(),
-                "error": None,
-                "globals": {k: v for k, v in globals_dict.items() if k not in SAFE_GLOBALS},
-            }
-        )
+        return {
+            "stdout": stdout_buffer.getvalue(),
+            "stderr": stderr_buffer.getvalue(),
+            "error": None,
+            "globals": {k: v for k, v in globals_dict.items() if k not in SAFE_GLOBALS},
+        }
     except Exception as exc:
-        queue.put(
-            {
-                "stdout": stdout_buffer.getvalue(),
-                "stderr": stderr_buffer.getvalue() + traceback.format_exc(),
-                "error": str(exc),
-                "globals": {k: v for k, v in globals_dict.items() if k not in SAFE_GLOBALS},
-            }
-        )
+        return {
+            "stdout": stdout_buffer.getvalue(),
+            "stderr": stderr_buffer.getvalue() + traceback.format_exc(),
+            "error": str(exc),
+            "globals": {k: v for k, v in globals_dict.items() if k not in SAFE_GLOBALS},
+        }
+
+
+def _run_child(code: str, input_data: Optional[str], conn) -> None:
+    # An unpicklable result makes send() raise; the parent then sees EOF and reports "unknown".
+    try:
+        conn.send(_worker(code, input_data))
+    finally:
+        conn.close()
 
 
 def execute(
@@ -77,23 +87,32 @@ def execute(
     input_data: Optional[str] = None,
     allow_unsafe: bool = False,
 ) -> CodeExecutionResult:
-    if not allow_unsafe:
-        prohibited_keywords = {"import os", "import sys", "open(", "__import__", "subprocess", "socket"}
-        lowered = code.lower()
-        for keyword in prohibited_keywords:
-            if keyword in lowered:
-                return CodeExecutionResult(
-                    stdout="",
-                    stderr="Execution blocked by safety policy",
-                    error="unsafe_code",
-                    timeout=False,
-                    globals_snapshot={},
-                )
-    queue: mp.Queue = mp.Queue()
-    proc = mp.Process(target=_worker, args=(code, input_data, queue))
+    if not allow_unsafe and _PROHIBITED_RE.search(code):
+        return CodeExecutionResult(
+            stdout="",
+            stderr="Execution blocked by safety policy",
+            error="unsafe_code",
+            timeout=False,
+            globals_snapshot={},
+        )
+    # A fresh process per snippet, so nothing one snippet does to its globals,
+    # builtins or modules can leak into the next caller's code.
+    reader, writer = mp.Pipe(duplex=False)
+    proc = mp.Process(target=_run_child, args=(code, input_data, writer), daemon=True)
     proc.start()
-    proc.join(timeout)
-    if proc.is_alive():
+    writer.close()
+    payload: Optional[Dict[str, Any]] = None
+    ready: list = []
+    try:
+        # Wakes as soon as a result arrives or the child exits, whichever is first.
+        ready = wait_ready([reader, proc.sentinel], timeout)
+        if reader in ready:
+            payload = reader.recv()
+    except (EOFError, OSError):
+        payload = None
+    finally:
+        reader.close()
+    if not ready:
         proc.terminate()
         proc.join()
         return CodeExecutionResult(
@@ -103,7 +122,8 @@ def execute(
             timeout=True,
             globals_snapshot={},
         )
-    if queue.empty():
+    proc.join()
+    if payload is None:
         return CodeExecutionResult(
             stdout="",
             stderr="Unknown execution error",
@@ -111,7 +131,6 @@ def execute(
             timeout=False,
             globals_snapshot={},
         )
-    payload = queue.get()
     return CodeExecutionResult(
         stdout=payload.get("stdout", ""),
         stderr=payload.get("stderr", ""),
@@ -2,15 +2,28 @@ from __future__ import annotations
 
 import base64
 import io
+import threading
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
 from typing import Optional
 
 import pandas as pd
 
-try:  # optional dependency; only needed for image rendering
-    import matplotlib.pyplot as plt  # type: ignore
+try:  # optional dependency; only needed for the fast path on large tables
+    from PIL import Image, ImageDraw, ImageFont  # type: ignore
 except ImportError:  # pragma: no cover - optional dependency missing
-    plt = None
+    Image = None
+
+# Tables with more rows than this are drawn directly with Pillow; matplotlib's
+# table artist lays out every cell in Python and gets slow on long frames.
+PIL_MIN_ROWS = 50
+_CELL_PAD = 8
+
+# One Figure reused for every render (cleared and resized each time), so the
+# per-call figure/canvas setup is paid once; the lock serialises renders.
+_figure = None
+_figure_lock = threading.Lock()
 
 
 def dataframe_to_html(df: pd.DataFrame, *, max_rows: int = 100) -> str:
@@ -18,34 +31,86 @@ def dataframe_to_html(df: pd.DataFrame, *, max_rows: int = 100) -> str:
     return display_df.to_html(classes="dataframe", border=0)
 
 
-def dataframe_to_image(df: pd.DataFrame, *, title: Optional[str] = None) -> bytes:
-    if plt is None:
-        raise RuntimeError("matplotlib is required for dataframe_to_image")
-    fig, ax = plt.subplots(figsize=(10, 0.4 * len(df.index) + 1))
-    ax.axis("off")
-    table = ax.table(cellText=df.values, colLabels=df.columns, loc="center")
-    table.auto_set_font_size(False)
-    table.set_fontsize(8)
-    table.scale(1, 1.2)
+def dataframe_to_image(df: pd.DataFrame, *, title: Optional[str] = None, dpi: int = 200) -> bytes:
+    global _figure
+    if Image is not None and len(df.index) > PIL_MIN_ROWS:
+        return _render_table_pil(df, title)
+    with _figure_lock:
+        if _figure is None:
+            _figure = _new_figure()
+        fig = _figure
+        fig.clear()
+        fig.set_size_inches(10, 0.4 * len(df.index) + 1)
+        ax = fig.add_subplot()
+        ax.axis("off")
+        table = ax.table(cellText=df.values, colLabels=df.columns, loc="center")
+        table.auto_set_font_size(False)
+        table.set_fontsize(8)
+        table.scale(1, 1.2)
+        if title:
+            ax.set_title(title)
+        buf = io.BytesIO()
+        fig.tight_layout()
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def _new_figure():
+    # Imported on first use: matplotlib is slow to import and optional, and the
+    # Pillow path for large tables works without it.
+    try:
+        from matplotlib.figure import Figure  # type: ignore
+    except ImportError as exc:  # pragma: no cover - optional dependency missing
+        raise RuntimeError("matplotlib is required for dataframe_to_image") from exc
+    return Figure()
+
+
+@lru_cache(maxsize=1)
+def _table_font():
+    try:
+        return ImageFont.truetype("DejaVuSansMono.ttf", 14)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _render_table_pil(df: pd.DataFrame, title: Optional[str]) -> bytes:
+    font = _table_font()
+    header = [str(column) for column in df.columns]
+    rows = df.astype(str).values.tolist()
+    col_widths = [
+        int(max(font.getlength(text) for text in column)) + 2 * _CELL_PAD
+        for column in zip(header, *rows)
+    ]
+    offsets = list(accumulate([0] + col_widths[:-1]))
+    row_height = font.getbbox("Ay")[3] + _CELL_PAD
+    title_height = row_height if title else 0
+    width = max(sum(col_widths), 1)
+    height = title_height + row_height * (len(rows) + 1)
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
     if title:
-        ax.set_title(title)
+        draw.text((_CELL_PAD, _CELL_PAD // 2), title, fill="black", font=font)
+    draw.rectangle([0, title_height, width, title_height + row_height], fill="#e8e8e8")
+    y = title_height
+    for row in [header, *rows]:
+        for x, text in zip(offsets, row):
+            draw.text((x + _CELL_PAD, y + _CELL_PAD // 2), text, fill="black", font=font)
+        y += row_height
+        draw.line([(0, y - 1), (width, y - 1)], fill="#cccccc")
+
     buf = io.BytesIO()
-    plt.tight_layout()
-    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf.read()
+    image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
 
 
 def dataframe_to_data_uri(df: pd.DataFrame, *, title: Optional[str] = None) -> str:
-    image_bytes = dataframe_to_image(df, title=title)
-    b64 = base64.b64encode(image_bytes).decode("utf-8")
-    return f"data:image/png;base64,{b64}"
+    # Inline previews don't need print resolution; save_dataframe_image keeps 200 dpi.
+    image_bytes = dataframe_to_image(df, title=title, dpi=100)
+    return (b"data:image/png;base64," + base64.b64encode(image_bytes)).decode("ascii")
 
 
 def save_dataframe_image(df: pd.DataFrame, path: Path, *, title: Optional[str] = None) -> Path:
-    if plt is None:
-        raise RuntimeError("matplotlib is required for save_dataframe_image")
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_bytes(dataframe_to_image(df, title=title))
     return path
@@ -1,17 +1,39 @@
 from __future__ import annotations
 
+import io
 import json
-from dataclasses import dataclass
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
 
 import fitz  # PyMuPDF
 import numpy as np
 import pandas as pd
 
 from app.config import get_settings
+from storage.files import atomic_write_bytes
 from tools.openai_client import create_embeddings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional runtime dependency
+    orjson = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+def _json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _json_dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
 
 @dataclass
 class DocumentChunk:
@@ -20,18 +42,36 @@ class DocumentChunk:
     metadata: Dict[str, str]
     embedding: Optional[List[float]] = None
 
+    def to_serializable(self) -> Dict[str, Any]:
+        """Plain fields for the session JSON; embeddings live in the session's .npy file."""
+        return {"chunk_id": self.chunk_id, "text": self.text, "metadata": self.metadata}
+
 
 def _chunk_text(text: str, chunk_size: int = 800, overlap: int = 200) -> List[str]:
     words = text.split()
-    chunks: List[str] = []
-    start = 0
-    while start < len(words):
-        end = min(len(words), start + chunk_size)
-        chunks.append(" ".join(words[start:end]))
-        if end == len(words):
-            break
-        start = max(0, end - overlap)
-    return chunks
+    if not words:
+        return []
+    # Chunk starts are fixed up front: every ``step`` words until a chunk reaches the end.
+    step = chunk_size - overlap
+    return [
+        " ".join(words[start : start + chunk_size])
+        for start in range(0, max(len(words) - overlap, 1), step)
+    ]
+
+
+def _chunk_words(words: Iterable[str], chunk_size: int = 800, overlap: int = 200) -> Iterator[str]:
+    """Streaming ``_chunk_text``: same chunks, but only one window of words is held at a time."""
+    window: List[str] = []
+    fresh = 0  # words in ``window`` not yet part of an emitted chunk
+    for word in words:
+        window.append(word)
+        fresh += 1
+        if len(window) == chunk_size:
+            yield " ".join(window)
+            window = window[chunk_size - overlap :]
+            fresh = 0
+    if fresh:
+        yield " ".join(window)
 
 
 def _read_pdf(path: Path) -> str:
@@ -41,6 +81,12 @@ def _read_pdf(path: Path) -> str:
     return "\n".join(texts)
 
 
+def _iter_pdf_words(path: Path) -> Iterator[str]:
+    with fitz.open(path) as doc:
+        for page in doc:
+            yield from page.get_text().split()
+
+
 def _read_csv(path: Path, max_rows: int = 500) -> str:
     df = pd.read_csv(path).head(max_rows)
     return df.to_markdown()
@@ -69,38 +115,152 @@ FILE_READERS = {
     ".yml": _read_code,
 }
 
+# Readers that can stream a file's words instead of returning its full text.
+WORD_READERS = {
+    ".pdf": _iter_pdf_words,
+}
+
+
+@dataclass
+class _SessionIndex:
+    """A parsed session: its documents plus one L2-normalised float32 row per chunk."""
+
+    mtime: Optional[int]
+    docs: Dict[str, List[DocumentChunk]]
+    vectors: Dict[str, np.ndarray]
+    chunks: List[DocumentChunk] = field(init=False)
+    matrix: np.ndarray = field(init=False)
+
+    def __post_init__(self) -> None:
+        # ``matrix`` rows line up with ``chunks``: documents in order, chunks in order.
+        # A document without vectors (see _load_vectors) is listed but not searched.
+        searchable = [doc_id for doc_id in self.docs if len(self.vectors.get(doc_id, ()))]
+        self.chunks = [chunk for doc_id in searchable for chunk in self.docs[doc_id]]
+        parts = [self.vectors[doc_id] for doc_id in searchable]
+        matrix = np.concatenate(parts) if parts else np.empty((0, 0), dtype=np.float32)
+        # float32 and C-contiguous, so ``matrix @ query`` is a single BLAS sgemv
+        # (a no-op conversion for matrices built or saved here).
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+def _normalise_rows(embeddings: Union[np.ndarray, List[List[float]]]) -> np.ndarray:
+    if len(embeddings) == 0:
+        return np.empty((0, 0), dtype=np.float32)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+@lru_cache(maxsize=1024)
+def _query_vector(query: str, model: str) -> np.ndarray:
+    """Embed a question once per process; repeated questions skip the API round-trip."""
+    vector = _normalise_rows(create_embeddings([query], model=model))[0]
+    vector.setflags(write=False)
+    return vector
+
 
 class FileQAManager:
     def __init__(self, storage_dir: Path) -> None:
         self.storage_dir = storage_dir
         self.storage_dir.mkdir(parents=True, exist_ok=True)
-        self._session_cache: Dict[str, Dict[str, List[DocumentChunk]]] = {}
+        # session_id -> parsed session, tagged with the mtime_ns of its JSON file (None
+        # if unsaved); a changed mtime means another writer touched it and it is reloaded.
+        self._session_cache: Dict[str, _SessionIndex] = {}
 
     def _session_path(self, session_id: str) -> Path:
         return self.storage_dir / f"{session_id}.json"
 
-    def _load_session(self, session_id: str) -> Dict[str, List[DocumentChunk]]:
-        if session_id in self._session_cache:
-            return self._session_cache[session_id]
+    def _vectors_path(self, session_id: str) -> Path:
+        return self.storage_dir / f"{session_id}.vectors.npz"
+
+    def _legacy_vectors_path(self, session_id: str) -> Path:
+        return self.storage_dir / f"{session_id}.npy"
+
+    def _load_session(self, session_id: str) -> _SessionIndex:
         path = self._session_path(session_id)
-        if not path.exists():
-            self._session_cache[session_id] = {}
-            return self._session_cache[session_id]
-        raw = json.loads(path.read_text(encoding="utf-8"))
+        try:
+            mtime: Optional[int] = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        cached = self._session_cache.get(session_id)
+        if cached is not None and cached.mtime == mtime:
+            return cached
         docs: Dict[str, List[DocumentChunk]] = {}
-        for doc_id, chunks in raw.items():
-            docs[doc_id] = [DocumentChunk(**chunk) for chunk in chunks]
-        self._session_cache[session_id] = docs
-        return docs
-
-    def _save_session(self, session_id: str) -> None:
-        docs = self._session_cache.get(session_id, {})
+        vectors: Dict[str, np.ndarray] = {}
+        if mtime is not None:
+            raw = _json_loads(path.read_bytes())
+            for doc_id, chunks in raw.items():
+                docs[doc_id] = [DocumentChunk(**chunk) for chunk in chunks]
+            vectors = self._load_vectors(session_id, docs)
+        index = _SessionIndex(mtime, docs, vectors)
+        self._session_cache[session_id] = index
+        return index
+
+    def _load_vectors(self, session_id: str, docs: Dict[str, List[DocumentChunk]]) -> Dict[str, np.ndarray]:
+        stored = self._read_vectors(session_id, docs)
+        vectors: Dict[str, np.ndarray] = {}
+        for doc_id, chunks in docs.items():
+            if chunks and chunks[0].embedding is not None:
+                # Older session files kept each chunk's embedding inline in the JSON.
+                vectors[doc_id] = _normalise_rows([chunk.embedding for chunk in chunks])
+                for chunk in chunks:
+                    chunk.embedding = None
+            elif doc_id in stored and len(stored[doc_id]) == len(chunks):
+                vectors[doc_id] = stored[doc_id]
+            else:
+                # The two files disagree (e.g. a crash between their writes). Re-embedding
+                # would cost money and hide the problem; re-ingesting the file fixes it.
+                logger.warning(
+                    "Session %s: %s has %d chunks but %d stored vectors; excluded from search",
+                    session_id,
+                    doc_id,
+                    len(chunks),
+                    len(stored.get(doc_id, ())),
+                )
+                vectors[doc_id] = _normalise_rows([])
+        return vectors
+
+    def _read_vectors(self, session_id: str, docs: Dict[str, List[DocumentChunk]]) -> Dict[str, np.ndarray]:
+        """Stored vectors per document: each document's row count is kept beside the matrix."""
+        try:
+            with np.load(self._vectors_path(session_id)) as stored:
+                doc_ids, counts, matrix = stored["doc_ids"].tolist(), stored["counts"], stored["matrix"]
+        except FileNotFoundError:
+            # A bare .npy from before the counts were stored: only usable if it matches exactly.
+            try:
+                matrix = np.load(self._legacy_vectors_path(session_id))
+            except FileNotFoundError:
+                return {}
+            doc_ids = list(docs)
+            counts = [len(chunks) for chunks in docs.values()]
+            if len(matrix) != sum(counts):
+                return {}
+        offsets = list(accumulate(counts))[:-1]
+        return dict(zip(doc_ids, np.split(matrix, offsets)))
+
+    def _save_session(
+        self, session_id: str, docs: Dict[str, List[DocumentChunk]], vectors: Dict[str, np.ndarray]
+    ) -> None:
+        index = _SessionIndex(None, docs, vectors)
+        # Vectors first: the JSON file's mtime is what marks the session as changed.
+        # Per-document row counts let a load pair rows with documents even if the
+        # JSON write below never happens.
+        doc_ids = [doc_id for doc_id in docs if len(vectors.get(doc_id, ()))]
+        buf = io.BytesIO()
+        np.savez(
+            buf,
+            matrix=index.matrix,
+            doc_ids=np.array(doc_ids, dtype=str),
+            counts=np.array([len(vectors[doc_id]) for doc_id in doc_ids], dtype=np.int64),
+        )
+        atomic_write_bytes(self._vectors_path(session_id), buf.getvalue())
+        self._legacy_vectors_path(session_id).unlink(missing_ok=True)
         path = self._session_path(session_id)
-        serializable = {
-            doc_id: [chunk.__dict__ for chunk in chunks]
-            for doc_id, chunks in docs.items()
-        }
-        path.write_text(json.dumps(serializable, ensure_ascii=False, indent=2), encoding="utf-8")
+        serializable = {doc_id: [chunk.to_serializable() for chunk in chunks] for doc_id, chunks in docs.items()}
+        atomic_write_bytes(path, _json_dumps(serializable))
+        index.mtime = path.stat().st_mtime_ns
+        self._session_cache[session_id] = index
 
     def ingest_file(self, session_id: str, file_path: Path) -> Dict[str, any]:
         file_path = Path(file_path)
@@ -108,8 +268,12 @@ class FileQAManager:
         reader = FILE_READERS.get(suffix)
         if reader is None:
             raise ValueError(f"Unsupported file type: {suffix}")
-        text = reader(file_path)
-        chunks_text = _chunk_text(text)
+        word_reader = WORD_READERS.get(suffix)
+        if word_reader is not None:
+            # Chunk page by page; the whole document is never joined into one string.
+            chunks_text = list(_chunk_words(word_reader(file_path)))
+        else:
+            chunks_text = _chunk_text(reader(file_path))
         chunk_ids = [f"{file_path.stem}_chunk_{idx}" for idx in range(len(chunks_text))]
         embeddings = create_embeddings(chunks_text)
         chunk_objects = [
@@ -121,46 +285,47 @@ class FileQAManager:
                     "source_path": str(file_path),
                     "chunk_index": str(idx),
                 },
-                embedding=embedding,
             )
-            for idx, (chunk_id, chunk_text, embedding) in enumerate(zip(chunk_ids, chunks_text, embeddings))
+            for idx, (chunk_id, chunk_text, _) in enumerate(zip(chunk_ids, chunks_text, embeddings))
         ]
-        docs = self._load_session(session_id)
-        docs[file_path.name] = chunk_objects
-        self._session_cache[session_id] = docs
-        self._save_session(session_id)
+        index = self._load_session(session_id)
+        docs = {**index.docs, file_path.name: chunk_objects}
+        vectors = {**index.vectors, file_path.name: _normalise_rows(embeddings[: len(chunk_objects)])}
+        self._save_session(session_id, docs, vectors)
         return {
             "file_name": file_path.name,
             "chunks": len(chunk_objects),
         }
 
     def list_documents(self, session_id: str) -> List[str]:
-        docs = self._load_session(session_id)
+        docs = self._load_session(session_id).docs
         return sorted(docs.keys())
 
     def document_stats(self, session_id: str) -> Dict[str, int]:
-        docs = self._load_session(session_id)
+        docs = self._load_session(session_id).docs
         return {name: len(chunks) for name, chunks in docs.items()}
 
     def drop_session(self, session_id: str) -> None:
         self._session_cache.pop(session_id, None)
-        path = self._session_path(session_id)
-        if path.exists():
-            path.unlink()
+        for path in (
+            self._session_path(session_id),
+            self._vectors_path(session_id),
+            self._legacy_vectors_path(session_id),
+        ):
+            path.unlink(missing_ok=True)
 
     def query(self, session_id: str, query: str, top_k: int = 4) -> List[DocumentChunk]:
-        docs = self._load_session(session_id)
-        if not docs:
+        index = self._load_session(session_id)
+        if not index.chunks:
             return []
-        all_chunks: List[DocumentChunk] = [chunk for chunks in docs.values() for chunk in chunks]
-        chunks_with_embeddings = [chunk for chunk in all_chunks if chunk.embedding is not None]
-        if not chunks_with_embeddings:
+        similarities = index.matrix @ _query_vector(query, get_settings().embeddings_model)
+        k = min(top_k, similarities.shape[0])
+        if k <= 0:
             return []
-        query_embedding = create_embeddings([query])[0]
-        matrix = np.array([chunk.embedding for chunk in chunks_with_embeddings])
-        similarities = matrix @ np.array(query_embedding)
-        idxs = np.argsort(similarities)[::-1][:top_k]
-        selected: List[DocumentChunk] = [chunks_with_embeddings[int(i)] for i in idxs]
+        # Partition out the k best in O(N), then order just those.
+        part = np.argpartition(similarities, -k)[-k:]
+        idxs = part[np.argsort(similarities[part])[::-1]]
+        selected: List[DocumentChunk] = [index.chunks[int(i)] for i in idxs]
         return selected
 
     def build_context(self, session_id: str, query: str, top_k: int = 4) -> str:
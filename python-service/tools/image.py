@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
+import itertools
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -9,6 +11,16 @@ from tools.openai_client import edit_image as _edit_image
 from tools.openai_client import generate_image as _generate_image
 
 
+# time_ns() keeps names in creation order; the counter breaks ties between calls in
+# the same tick, so two images can never share a name within a process.
+_COUNTER = itertools.count()
+
+
+def _image_filename(prefix: str) -> str:
+    return f"{prefix}_{time.time_ns()}_{next(_COUNTER)}.png"
+
+
+@lru_cache(maxsize=1)
 def _images_dir() -> Path:
     settings = get_settings()
     directory = settings.assets_dir / "generated"
@@ -19,7 +31,7 @@ def _images_dir() -> Path:
 def generate_image(prompt: str, *, model: Optional[str] = None, size: str = "1024x1024") -> str:
     """Generate image and return path as string"""
     image_bytes = _generate_image(prompt, model=model, size=size)
-    filename = f"gen_{datetime.utcnow().strftime('%Y%m%d_%H%M%S%f')}.png"
+    filename = _image_filename("gen")
     path = _images_dir() / filename
     path.write_bytes(image_bytes)
     return str(path)
@@ -38,7 +50,7 @@ def edit_image(
     image_bytes = base_path_obj.read_bytes()
     mask_bytes = Path(mask_path).read_bytes() if mask_path else None
     edited_bytes = _edit_image(image_bytes=image_bytes, mask_bytes=mask_bytes, prompt=prompt, model=model, size=size)
-    filename = f"edit_{datetime.utcnow().strftime('%Y%m%d_%H%M%S%f')}.png"
+    filename = _image_filename("edit")
     path = _images_dir() / filename
     path.write_bytes(edited_bytes)
     return str(path)
@@ -3,25 +3,123 @@ Internet Access Manager for Ashley AI
 Provides safe, rate-limited internet access with multiple fallback methods
 """
 
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import re
+import threading
 import time
-import hashlib
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Tuple, Union
 from datetime import datetime, timedelta
 import logging
-from bs4 import BeautifulSoup
-try:
-    import wikipedia
-except ImportError:  # pragma: no cover - optional runtime dependency
-    wikipedia = None  # type: ignore[assignment]
+from functools import lru_cache
+from itertools import islice
 from urllib.parse import quote_plus, urljoin, urlparse
 from dataclasses import dataclass
 import os
 
+from app.config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional runtime dependency
+    orjson = None  # type: ignore[assignment]
+try:
+    from lxml import etree as lxml_etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - optional runtime dependency
+    lxml_etree = None  # type: ignore[assignment]
+    lxml_html = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Runs the independent search services of comprehensive_search side by side.
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-search")
+# Fetches the pages of one Wikipedia search in parallel. Separate from
+# _SEARCH_EXECUTOR, whose workers wait on these fetches.
+_WIKIPEDIA_EXECUTOR = ThreadPoolExecutor(max_workers=3, thread_name_prefix="wikipedia")
+
+
+_WS_RE = re.compile(r"\s+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+# URLs that _get_free_news treats as news sources; "ap" only as a whole word,
+# so hosts like "japantoday" or paths like "/apps/" don't count.
+_NEWS_HOST_RE = re.compile(r"news|bbc|cnn|reuters|\bap\b", re.IGNORECASE)
+
+# Page elements whose text never belongs in get_webpage_content's output.
+_SKIPPED_TAGS = frozenset({"script", "style", "nav", "footer", "aside"})
+
+
+class _PageTextCollector:
+    """lxml parser target that keeps a page's text, minus _SKIPPED_TAGS subtrees"""
+    
+    def __init__(self):
+        self.parts: List[str] = []
+        self.chars = 0  # non-whitespace characters collected so far
+        self._skip_depth = 0
+    
+    def start(self, tag, attrib):
+        if self._skip_depth or tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+    
+    def end(self, tag):
+        if self._skip_depth:
+            self._skip_depth -= 1
+    
+    def data(self, text):
+        if not self._skip_depth:
+            self.parts.append(text)
+            self.chars += sum(map(len, text.split()))
+    
+    def close(self) -> str:
+        return ''.join(self.parts)
+
+
+def _class_xpath(tag: str, css_class: str) -> str:
+    """XPath step matching ``tag`` elements that carry ``css_class`` as one of their classes"""
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+
+if lxml_etree is not None:
+    # Compiled once; used by _scrape_duckduckgo_html.
+    _DDG_RESULT_XPATH = lxml_etree.XPath("(//" + _class_xpath("div", "result") + ")[position() <= $limit]")
+    _DDG_TITLE_XPATH = lxml_etree.XPath(".//" + _class_xpath("a", "result__a") + "[1]")
+    _DDG_SNIPPET_XPATH = lxml_etree.XPath(".//" + _class_xpath("a", "result__snippet") + "[1]")
+
+
+# bs4 and wikipedia pull in a lot of modules and only the scraping/search
+# paths need them, so they are imported on first use.
+@lru_cache(maxsize=1)
+def _beautiful_soup():
+    from bs4 import BeautifulSoup
+    return BeautifulSoup
+
+
+@lru_cache(maxsize=1)
+def _wikipedia():
+    """The wikipedia package, or None if it is not installed"""
+    try:
+        import wikipedia
+    except ImportError:  # pragma: no cover - optional runtime dependency
+        return None
+    return wikipedia
+
+
+def _json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _json_dumps_indented(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+@dataclass(slots=True)
 class SearchResult:
     """Represents a search result"""
     title: str
@@ -30,7 +128,7 @@ class SearchResult:
     source: str
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True)
 class APIQuota:
     """Tracks API usage and quotas"""
     service: str
@@ -42,17 +140,33 @@ class APIQuota:
 class UsageTracker:
     """Tracks API usage with automatic reset and protection"""
     
+    # Usage writes are at most this many seconds apart: a count recorded sooner
+    # after the last write arms a timer that writes it (and any that follow).
+    FLUSH_INTERVAL = 0.5
+    # Quotas only roll over on day/month boundaries; checking for that more
+    # often than once a minute is wasted work.
+    RESET_CHECK_INTERVAL = 60.0
+    
     def __init__(self, storage_file: str = "api_usage.json"):
         self.storage_file = storage_file
         self.quotas: Dict[str, APIQuota] = {}
+        # What save_usage writes, kept in step with ``quotas`` field by field
+        # so a save doesn't rebuild every service's dict.
+        self._serialized: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._last_reset_check = float('-inf')
         self.load_usage()
+        atexit.register(self.flush)
     
     def load_usage(self):
         """Load usage data from storage"""
         try:
             if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.storage_file, 'rb') as f:
+                    data = _json_loads(f.read())
                     
                 for service, quota_data in data.items():
                     self.quotas[service] = APIQuota(
@@ -65,6 +179,17 @@ class UsageTracker:
         except Exception as e:
             logger.error(f"Error loading usage data: {e}")
             self._initialize_default_quotas()
+        self._serialized = {service: self._serialize_quota(quota) for service, quota in self.quotas.items()}
+    
+    @staticmethod
+    def _serialize_quota(quota: APIQuota) -> Dict[str, Any]:
+        return {
+            'service': quota.service,
+            'limit_type': quota.limit_type,
+            'limit': quota.limit,
+            'used': quota.used,
+            'reset_time': quota.reset_time.isoformat()
+        }
     
     def _initialize_default_quotas(self):
         """Initialize default quota limits"""
@@ -81,36 +206,53 @@ class UsageTracker:
     def save_usage(self):
         """Save usage data to storage"""
         try:
-            data = {}
-            for service, quota in self.quotas.items():
-                data[service] = {
-                    'service': quota.service,
-                    'limit_type': quota.limit_type,
-                    'limit': quota.limit,
-                    'used': quota.used,
-                    'reset_time': quota.reset_time.isoformat()
-                }
-            
-            with open(self.storage_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            # Write beside the target and swap it in, so a crash mid-write
+            # never leaves a truncated usage file.
+            tmp_file = f"{self.storage_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps_indented(self._serialized))
+            os.replace(tmp_file, self.storage_file)
+            self._dirty = False
+            self._last_flush = time.time()
         except Exception as e:
             logger.error(f"Error saving usage data: {e}")
     
+    def flush(self):
+        """Write pending usage counts, if any"""
+        with self._lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._dirty:
+            self.save_usage()
+    
     def check_and_reset_quotas(self):
         """Check and reset quotas if needed"""
+        now_ts = time.monotonic()
+        if now_ts - self._last_reset_check < self.RESET_CHECK_INTERVAL:
+            return
+        self._last_reset_check = now_ts
         now = datetime.now()
         
-        for service, quota in self.quotas.items():
-            if now >= quota.reset_time:
-                quota.used = 0
-                
-                if quota.limit_type == 'daily':
-                    quota.reset_time = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-                elif quota.limit_type == 'monthly':
-                    next_month = now.replace(day=1) + timedelta(days=32)
-                    quota.reset_time = next_month.replace(day=1)
-                
-                logger.info(f"Reset quota for {service}")
+        with self._lock:
+            for service, quota in self.quotas.items():
+                if now >= quota.reset_time:
+                    quota.used = 0
+                    
+                    if quota.limit_type == 'daily':
+                        quota.reset_time = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+                    elif quota.limit_type == 'monthly':
+                        next_month = now.replace(day=1) + timedelta(days=32)
+                        quota.reset_time = next_month.replace(day=1)
+                    
+                    serialized = self._serialized[service]
+                    serialized['used'] = 0
+                    serialized['reset_time'] = quota.reset_time.isoformat()
+                    self._dirty = True
+                    logger.info(f"Reset quota for {service}")
     
     def can_use_service(self, service: str) -> bool:
         """Check if service can be used (under quota)"""
@@ -124,13 +266,25 @@ class UsageTracker:
     
     def record_usage(self, service: str):
         """Record usage for a service"""
-        if service in self.quotas:
-            self.quotas[service].used += 1
-            self.save_usage()
+        if service not in self.quotas:
+            return
+        with self._lock:
+            quota = self.quotas[service]
+            quota.used += 1
+            self._serialized[service]['used'] = quota.used
+            self._dirty = True
+            wait = self.FLUSH_INTERVAL - (time.time() - self._last_flush)
+            if wait <= 0:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
     
     def get_usage_report(self) -> Dict[str, Any]:
         """Get current usage report"""
         self.check_and_reset_quotas()
+        self.flush()
         
         report = {
             'timestamp': datetime.now().isoformat(),
@@ -157,14 +311,40 @@ class InternetAccessManager:
         self.config_file = config_file
         self.usage_tracker = UsageTracker()
         self.session = requests.Session()
+        # One pool sized for the concurrent searches, keeping connections (and
+        # TLS sessions) alive per host; transient 5xx answers are retried.
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=[500, 502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.load_config()
+        # Seconds the paid searches get before the free ones are started alongside
+        # them; unset means the free ones only run once the paid ones fall short.
+        delay = get_settings().search_hedge_delay
+        self.hedge_delay: Optional[float] = delay if delay is not None and delay > 0 else None
         
-        # Cache for search results
-        self.cache: Dict[str, Any] = {}
+        # Cache for search results: least recently used first, bounded in size,
+        # with expired entries swept out every cache_prune_interval seconds.
+        self.cache: OrderedDict[Tuple[str, str], Any] = OrderedDict()
         self.cache_ttl = 3600  # 1 hour cache
+        self.cache_max_size = 1000
+        self.cache_prune_interval = 60
+        self._last_prune = time.time()
+        self._cache_lock = threading.Lock()
+        # url -> (ETag, Last-Modified, max_length, text) of the last fetch that
+        # sent validators; lets get_webpage_content revalidate instead of re-download.
+        self._page_cache: OrderedDict[str, Tuple[Optional[str], Optional[str], int, str]] = OrderedDict()
     
     def load_config(self):
         """Load configuration for internet access"""
@@ -183,50 +363,72 @@ class InternetAccessManager:
         
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
+                with open(self.config_file, 'rb') as f:
+                    self.config = _json_loads(f.read())
             else:
                 self.config = default_config
                 self.save_config()
         except Exception as e:
             logger.error(f"Error loading config: {e}")
             self.config = default_config
+        
+        # Settings read on every request, resolved once here.
+        self._max_results = int(self.config.get("max_results", 5))
+        self._timeout = float(self.config.get("timeout", 10))
+        self._cache_enabled = bool(self.config.get("cache_enabled", True))
     
     def save_config(self):
         """Save configuration"""
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
+            with open(self.config_file, 'wb') as f:
+                f.write(_json_dumps_indented(self.config))
         except Exception as e:
             logger.error(f"Error saving config: {e}")
     
-    def _get_cache_key(self, query: str, search_type: str) -> str:
+    def _get_cache_key(self, query: str, search_type: str) -> Tuple[str, str]:
         """Generate cache key for query"""
-        return hashlib.md5(f"{search_type}:{query}".encode()).hexdigest()
+        # The cache is in-process only, so the plain tuple is a fine dict key.
+        return (search_type, query)
     
     def _is_cache_valid(self, timestamp: float) -> bool:
         """Check if cache entry is still valid"""
         return time.time() - timestamp < self.cache_ttl
     
-    def _cache_result(self, key: str, result: Any):
+    def _cache_result(self, key: Tuple[str, str], result: Any):
         """Cache a search result"""
-        if self.config.get("cache_enabled", True):
-            self.cache[key] = {
-                'result': result,
-                'timestamp': time.time()
-            }
+        if self._cache_enabled:
+            now = time.time()
+            with self._cache_lock:
+                if now - self._last_prune > self.cache_prune_interval:
+                    self._prune_cache(now)
+                self.cache[key] = {
+                    'result': result,
+                    'timestamp': now
+                }
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.cache_max_size:
+                    self.cache.popitem(last=False)
+    
+    def _prune_cache(self, now: float):
+        """Drop every expired entry (caller holds _cache_lock)"""
+        expired = [key for key, cached in self.cache.items() if now - cached['timestamp'] >= self.cache_ttl]
+        for key in expired:
+            del self.cache[key]
+        self._last_prune = now
     
-    def _get_cached_result(self, key: str) -> Optional[Any]:
+    def _get_cached_result(self, key: Tuple[str, str]) -> Optional[Any]:
         """Get cached result if valid"""
-        if not self.config.get("cache_enabled", True):
+        if not self._cache_enabled:
             return None
             
-        if key in self.cache:
-            cached = self.cache[key]
-            if self._is_cache_valid(cached['timestamp']):
-                return cached['result']
-            else:
-                del self.cache[key]
+        with self._cache_lock:
+            cached = self.cache.get(key)
+            if cached is not None:
+                if self._is_cache_valid(cached['timestamp']):
+                    self.cache.move_to_end(key)
+                    return cached['result']
+                else:
+                    del self.cache[key]
         return None
     
     def search_google(self, query: str) -> List[SearchResult]:
@@ -246,14 +448,15 @@ class InternetAccessManager:
                 'q': query,
                 'key': api_key,
                 'cx': search_engine_id,
-                'num': self.config.get("max_results", 5)
+                'num': self._max_results
             }
             
-            response = self.session.get(url, params=params, timeout=self.config["timeout"])
+            response = self.session.get(url, params=params, timeout=self._timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             results = []
+            now = datetime.now()
             
             for item in data.get('items', []):
                 results.append(SearchResult(
@@ -261,7 +464,7 @@ class InternetAccessManager:
                     url=item.get('link', ''),
                     snippet=item.get('snippet', ''),
                     source='google',
-                    timestamp=datetime.now()
+                    timestamp=now
                 ))
             
             self.usage_tracker.record_usage('google_search')
@@ -286,15 +489,16 @@ class InternetAccessManager:
             headers = {"Ocp-Apim-Subscription-Key": api_key}
             params = {
                 "q": query,
-                "count": self.config.get("max_results", 5)
+                "count": self._max_results
             }
             
             response = self.session.get(url, headers=headers, params=params, 
-                                     timeout=self.config["timeout"])
+                                     timeout=self._timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             results = []
+            now = datetime.now()
             
             for item in data.get('webPages', {}).get('value', []):
                 results.append(SearchResult(
@@ -302,7 +506,7 @@ class InternetAccessManager:
                     url=item.get('url', ''),
                     snippet=item.get('snippet', ''),
                     source='bing',
-                    timestamp=datetime.now()
+                    timestamp=now
                 ))
             
             self.usage_tracker.record_usage('bing_search')
@@ -325,11 +529,12 @@ class InternetAccessManager:
                 'skip_disambig': '1'
             }
             
-            response = self.session.get(url, params=params, timeout=self.config["timeout"])
+            response = self.session.get(url, params=params, timeout=self._timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             results = []
+            now = datetime.now()
             
             # Get instant answer
             if data.get('Abstract'):
@@ -338,21 +543,24 @@ class InternetAccessManager:
                     url=data.get('AbstractURL', ''),
                     snippet=data.get('Abstract', ''),
                     source='duckduckgo',
-                    timestamp=datetime.now()
+                    timestamp=now
                 ))
             
-            # Get related topics
-            for topic in data.get('RelatedTopics', []):
-                if isinstance(topic, dict) and 'Text' in topic:
-                    results.append(SearchResult(
-                        title=topic.get('Text', '')[:100],
-                        url=topic.get('FirstURL', ''),
-                        snippet=topic.get('Text', ''),
-                        source='duckduckgo',
-                        timestamp=datetime.now()
-                    ))
+            # Get related topics, stopping once enough results are in
+            topics = (
+                topic for topic in data.get('RelatedTopics', [])
+                if isinstance(topic, dict) and 'Text' in topic
+            )
+            for topic in islice(topics, max(self._max_results - len(results), 0)):
+                results.append(SearchResult(
+                    title=topic.get('Text', '')[:100],
+                    url=topic.get('FirstURL', ''),
+                    snippet=topic.get('Text', ''),
+                    source='duckduckgo',
+                    timestamp=now
+                ))
             
-            return results[:self.config.get("max_results", 5)]
+            return results[:self._max_results]
             
         except Exception as e:
             logger.error(f"DuckDuckGo search error: {e}")
@@ -363,13 +571,33 @@ class InternetAccessManager:
         """Fallback: Scrape DuckDuckGo HTML results"""
         try:
             url = f"https://duckduckgo.com/html/?q={quote_plus(query)}"
-            response = self.session.get(url, timeout=self.config["timeout"])
+            response = self.session.get(url, timeout=self._timeout)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            max_results = self._max_results
             results = []
+            now = datetime.now()
             
-            for result in soup.find_all('div', class_='result')[:self.config.get("max_results", 5)]:
+            if lxml_html is not None:
+                tree = lxml_html.fromstring(response.content)
+                for result in _DDG_RESULT_XPATH(tree, limit=max_results):
+                    title_elems = _DDG_TITLE_XPATH(result)
+                    snippet_elems = _DDG_SNIPPET_XPATH(result)
+                    
+                    if title_elems:
+                        results.append(SearchResult(
+                            title=title_elems[0].text_content().strip(),
+                            url=title_elems[0].get('href', ''),
+                            snippet=snippet_elems[0].text_content().strip() if snippet_elems else '',
+                            source='duckduckgo_html',
+                            timestamp=now
+                        ))
+                return results
+            
+            soup = _beautiful_soup()(response.text, 'html.parser')
+            
+            # limit= stops the tree walk at the last result we keep (0 would mean "no limit")
+            for result in soup.find_all('div', class_='result', limit=max_results)[:max_results]:
                 title_elem = result.find('a', class_='result__a')
                 snippet_elem = result.find('a', class_='result__snippet')
                 
@@ -379,7 +607,7 @@ class InternetAccessManager:
                         url=title_elem.get('href', ''),
                         snippet=snippet_elem.get_text().strip() if snippet_elem else '',
                         source='duckduckgo_html',
-                        timestamp=datetime.now()
+                        timestamp=now
                     ))
             
             return results
@@ -390,50 +618,54 @@ class InternetAccessManager:
     
     def search_wikipedia(self, query: str) -> List[SearchResult]:
         """Search Wikipedia (completely free)"""
+        wikipedia = _wikipedia()
         if wikipedia is None:
             logger.debug("Wikipedia dependency not installed; skipping wikipedia search.")
             return []
         try:
             # Search for pages
             search_results = wikipedia.search(query, results=3)
-            results = []
+            now = datetime.now()
             
-            for title in search_results:
-                try:
-                    summary = wikipedia.summary(title, sentences=2)
-                    page = wikipedia.page(title)
-                    
-                    results.append(SearchResult(
-                        title=title,
-                        url=page.url,
-                        snippet=summary,
-                        source='wikipedia',
-                        timestamp=datetime.now()
-                    ))
-                except wikipedia.exceptions.DisambiguationError as e:
-                    # Handle disambiguation
-                    if e.options:
-                        try:
-                            summary = wikipedia.summary(e.options[0], sentences=2)
-                            page = wikipedia.page(e.options[0])
-                            results.append(SearchResult(
-                                title=e.options[0],
-                                url=page.url,
-                                snippet=summary,
-                                source='wikipedia',
-                                timestamp=datetime.now()
-                            ))
-                        except Exception:
-                            continue
-                except Exception:
-                    continue
+            # One page fetch per title, all at once; map keeps the search's ranking.
+            fetched = _WIKIPEDIA_EXECUTOR.map(lambda title: self._try_wikipedia_result(title, now), search_results)
+            results = [result for result in fetched if result is not None]
             
-            return results[:self.config.get("max_results", 5)]
+            return results[:self._max_results]
             
         except Exception as e:
             logger.error(f"Wikipedia search error: {e}")
             return []
     
+    def _try_wikipedia_result(self, title: str, now: datetime) -> Optional[SearchResult]:
+        """Fetch one search hit, following a disambiguation page to its first option"""
+        wikipedia = _wikipedia()
+        try:
+            return self._wikipedia_result(title, now)
+        except wikipedia.exceptions.DisambiguationError as e:
+            # Handle disambiguation
+            if e.options:
+                try:
+                    return self._wikipedia_result(e.options[0], now)
+                except Exception:
+                    return None
+        except Exception:
+            return None
+        return None
+    
+    @staticmethod
+    def _wikipedia_result(title: str, now: datetime) -> SearchResult:
+        """Build a result from one page object, which serves both the URL and the summary"""
+        page = _wikipedia().WikipediaPage(title)
+        summary = ' '.join(_SENTENCE_END_RE.split(page.summary, maxsplit=2)[:2])
+        return SearchResult(
+            title=title,
+            url=page.url,
+            snippet=summary,
+            source='wikipedia',
+            timestamp=now
+        )
+    
     def get_news(self, query: str = None, category: str = None) -> List[SearchResult]:
         """Get news articles"""
         api_key = self.config["api_keys"]["news_api_key"]
@@ -449,7 +681,7 @@ class InternetAccessManager:
             url = "https://newsapi.org/v2/everything" if query else "https://newsapi.org/v2/top-headlines"
             params = {
                 'apiKey': api_key,
-                'pageSize': self.config.get("max_results", 5),
+                'pageSize': self._max_results,
                 'language': 'en'
             }
             
@@ -458,11 +690,12 @@ class InternetAccessManager:
             if category:
                 params['category'] = category
             
-            response = self.session.get(url, params=params, timeout=self.config["timeout"])
+            response = self.session.get(url, params=params, timeout=self._timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = _json_loads(response.content)
             results = []
+            now = datetime.now()
             
             for article in data.get('articles', []):
                 results.append(SearchResult(
@@ -470,7 +703,7 @@ class InternetAccessManager:
                     url=article.get('url', ''),
                     snippet=article.get('description', ''),
                     source='news_api',
-                    timestamp=datetime.now()
+                    timestamp=now
                 ))
             
             self.usage_tracker.record_usage('news_api')
@@ -493,11 +726,11 @@ class InternetAccessManager:
         try:
             ddg_results = self.search_duckduckgo_free(news_query)
             for result in ddg_results:
-                if 'news' in result.url.lower() or any(word in result.url.lower() for word in ['bbc', 'cnn', 'reuters', 'ap']):
+                if _NEWS_HOST_RE.search(result.url):
                     result.source = 'free_news'
                     results.append(result)
             
-            return results[:self.config.get("max_results", 5)]
+            return results[:self._max_results]
             
         except Exception as e:
             logger.error(f"Free news search error: {e}")
@@ -506,38 +739,81 @@ class InternetAccessManager:
     def get_webpage_content(self, url: str, max_length: int = 2000) -> str:
         """Fetch and extract text content from a webpage"""
         try:
-            response = self.session.get(url, timeout=self.config["timeout"])
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            headers = {}
+            with self._cache_lock:
+                cached_page = self._page_cache.get(url)
+            # A cached text cut shorter than this call wants can't stand in for the page.
+            if cached_page is not None and cached_page[2] >= max_length:
+                etag, last_modified = cached_page[0], cached_page[1]
+                if etag:
+                    headers['If-None-Match'] = etag
+                if last_modified:
+                    headers['If-Modified-Since'] = last_modified
+            else:
+                cached_page = None
             
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "aside"]):
-                script.decompose()
+            with self.session.get(url, headers=headers, timeout=self._timeout, stream=True) as response:
+                response.raise_for_status()
+                
+                if response.status_code == 304 and cached_page is not None:
+                    return cached_page[3][:max_length]
+                
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                
+                if lxml_etree is not None:
+                    text = self._stream_page_text(response, max_length)
+                else:
+                    soup = _beautiful_soup()(response.text, 'html.parser')
+                    
+                    # Remove script and style elements
+                    for script in soup(list(_SKIPPED_TAGS)):
+                        script.decompose()
+                    
+                    # Get text content
+                    text = soup.get_text()
             
-            # Get text content
-            text = soup.get_text()
+            # Clean up text: collapse every whitespace run to a single space
+            text = _WS_RE.sub(' ', text).strip()[:max_length]
             
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            if etag or last_modified:
+                with self._cache_lock:
+                    self._page_cache[url] = (etag, last_modified, max_length, text)
+                    self._page_cache.move_to_end(url)
+                    while len(self._page_cache) > self.cache_max_size:
+                        self._page_cache.popitem(last=False)
             
-            return text[:max_length]
+            return text
             
         except Exception as e:
             logger.error(f"Error fetching webpage content: {e}")
             return f"Error fetching content from {url}"
     
+    @staticmethod
+    def _stream_page_text(response: requests.Response, max_length: int) -> str:
+        """Parse a page as it downloads, stopping once max_length characters of text are in"""
+        collector = _PageTextCollector()
+        # Only trust a declared charset; otherwise let lxml read the page's <meta>.
+        content_type = response.headers.get('Content-Type', '').lower()
+        encoding = response.encoding if 'charset' in content_type else None
+        parser = lxml_etree.HTMLParser(target=collector, encoding=encoding)
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            parser.feed(chunk)
+            if collector.chars >= max_length:
+                break
+        return parser.close()
+    
     def comprehensive_search(self, query: str) -> Dict[str, Any]:
         """
         Perform comprehensive search using all available methods with fallbacks
         """
-        cache_key = self._get_cache_key(query, 'comprehensive')
-        cached_result = self._get_cached_result(cache_key)
-        if cached_result:
-            logger.info(f"Returning cached result for: {query}")
-            return cached_result
+        cache_key = None
+        if self._cache_enabled:
+            cache_key = self._get_cache_key(query, 'comprehensive')
+            cached_result = self._get_cached_result(cache_key)
+            if cached_result:
+                logger.info(f"Returning cached result for: {query}")
+                return cached_result
         
         search_result = {
             'query': query,
@@ -547,37 +823,43 @@ class InternetAccessManager:
             'total_results': 0
         }
         
-        # Try search services in order of preference
-        search_methods = [
-            ('google', self.search_google),
-            ('bing', self.search_bing),
-            ('duckduckgo', self.search_duckduckgo_free),
-        ]
-        if wikipedia is not None:
-            search_methods.append(('wikipedia', self.search_wikipedia))
+        # Paid services run one after another in their own task so a good
+        # Google answer still spares the Bing quota. The free services start once
+        # the paid ones fall short or, with SEARCH_HEDGE_DELAY set, once they have
+        # taken that long, instead of being hit on every query.
+        premium = _SEARCH_EXECUTOR.submit(self._run_premium_searches, query)
+        free_methods = [('duckduckgo', self.search_duckduckgo_free)]
+        if _wikipedia() is not None:
+            free_methods.append(('wikipedia', self.search_wikipedia))
+        free: List[Tuple[str, Future]] = []
         
-        for service_name, search_method in search_methods:
-            try:
-                results = search_method(query)
+        def start_free_searches():
+            free.extend(
+                (service_name, _SEARCH_EXECUTOR.submit(search_method, query))
+                for service_name, search_method in free_methods
+            )
+        
+        if not wait([premium], timeout=self.hedge_delay).done:
+            start_free_searches()
+        premium_results, premium_done = premium.result()
+        for service_name, results in premium_results:
+            self._add_service_results(search_result, service_name, results)
+        
+        # If we get good results from premium services, we can stop
+        if premium_done:
+            for _, future in free:
+                future.cancel()
+        else:
+            if not free:
+                start_free_searches()
+            for service_name, future in free:
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.warning(f"Search method {service_name} failed: {e}")
+                    continue
                 if results:
-                    search_result['results'][service_name] = [
-                        {
-                            'title': r.title,
-                            'url': r.url,
-                            'snippet': r.snippet,
-                            'source': r.source
-                        } for r in results
-                    ]
-                    search_result['sources_used'].append(service_name)
-                    search_result['total_results'] += len(results)
-                    
-                    # If we get good results from premium services, we can stop
-                    if service_name in ['google', 'bing'] and len(results) >= 3:
-                        break
-                        
-            except Exception as e:
-                logger.warning(f"Search method {service_name} failed: {e}")
-                continue
+                    self._add_service_results(search_result, service_name, results)
         
         # If no results from search engines, ensure we have something
         if search_result['total_results'] == 0:
@@ -591,10 +873,40 @@ class InternetAccessManager:
             search_result['total_results'] = 1
         
         # Cache the result
-        self._cache_result(cache_key, search_result)
+        if cache_key is not None:
+            self._cache_result(cache_key, search_result)
         
         return search_result
     
+    def _run_premium_searches(self, query: str) -> Tuple[List[Tuple[str, List[SearchResult]]], bool]:
+        """Try the paid search APIs in order; report whether one gave enough results"""
+        collected = []
+        for service_name, search_method in (('google', self.search_google), ('bing', self.search_bing)):
+            try:
+                results = search_method(query)
+            except Exception as e:
+                logger.warning(f"Search method {service_name} failed: {e}")
+                continue
+            if results:
+                collected.append((service_name, results))
+                if len(results) >= 3:
+                    return collected, True
+        return collected, False
+    
+    @staticmethod
+    def _add_service_results(search_result: Dict[str, Any], service_name: str, results: List[SearchResult]):
+        """Append one service's results to a comprehensive_search result"""
+        search_result['results'][service_name] = [
+            {
+                'title': r.title,
+                'url': r.url,
+                'snippet': r.snippet,
+                'source': r.source
+            } for r in results
+        ]
+        search_result['sources_used'].append(service_name)
+        search_result['total_results'] += len(results)
+    
     def get_current_time_info(self) -> Dict[str, str]:
         """Get current time and date information"""
         now = datetime.now()
@@ -610,25 +922,27 @@ class InternetAccessManager:
         if not search_results.get('results'):
             return "No search results available."
         
-        formatted = f"Search Results for '{search_results['query']}':\n\n"
+        parts = [f"Search Results for '{search_results['query']}':\n\n"]
         
         result_count = 0
         for source, results in search_results['results'].items():
             if source == 'fallback':
                 continue
                 
-            formatted += f"=== {source.upper()} RESULTS ===\n"
-            for i, result in enumerate(results, 1):
-                formatted += f"{result_count + 1}. {result['title']}\n"
-                formatted += f"   URL: {result['url']}\n"
-                formatted += f"   Summary: {result['snippet']}\n\n"
+            parts.append(f"=== {source.upper()} RESULTS ===\n")
+            for result in results:
                 result_count += 1
+                parts.append(
+                    f"{result_count}. {result['title']}\n"
+                    f"   URL: {result['url']}\n"
+                    f"   Summary: {result['snippet']}\n\n"
+                )
         
         time_info = self.get_current_time_info()
-        formatted += f"Search performed at: {time_info['current_time']}\n"
-        formatted += f"Sources used: {', '.join(search_results['sources_used'])}\n"
+        parts.append(f"Search performed at: {time_info['current_time']}\n")
+        parts.append(f"Sources used: {', '.join(search_results['sources_used'])}\n")
         
-        return formatted
+        return ''.join(parts)
     
     def get_usage_status(self) -> Dict[str, Any]:
         """Get current usage status and limits"""
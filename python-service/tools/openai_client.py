@@ -1,29 +1,63 @@
 from __future__ import annotations
 
-import base64
+import binascii
+import io
+import threading
+import time
 from contextlib import contextmanager
 from dataclasses import dataclass
-from io import BytesIO
+from pathlib import Path
 from typing import Dict, Generator, Iterable, List, Optional
 
-from openai import OpenAI
+import httpx
+import numpy as np
+from openai import DefaultHttpxClient, OpenAI
 
 from app.config import get_settings
+from storage.embedding_cache import get_embedding_cache
 from tools.tokenizer import TokenCount
 
+try:
+    import pybase64
+except ImportError:  # pragma: no cover - optional runtime dependency
+    pybase64 = None  # type: ignore[assignment]
+
 
 _client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+
+# One client for the process (it is thread-safe), with a connection pool sized
+# for concurrent embedding/moderation/chat calls rather than httpx's defaults.
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
 
 
 def get_client() -> OpenAI:
     global _client
     if _client is None:
-        settings = get_settings()
-        api_key = settings.require_openai_key()
-        _client = OpenAI(api_key=api_key, organization=settings.openai_organization)
+        with _client_lock:
+            if _client is None:
+                settings = get_settings()
+                api_key = settings.require_openai_key()
+                _client = OpenAI(
+                    api_key=api_key,
+                    organization=settings.openai_organization,
+                    http_client=DefaultHttpxClient(limits=_HTTP_LIMITS),
+                )
     return _client
 
 
+def _b64encode(data: bytes) -> str:
+    if pybase64 is not None:
+        return pybase64.b64encode(data).decode("ascii")
+    return binascii.b2a_base64(data, newline=False).decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    if pybase64 is not None:
+        return pybase64.b64decode(data)
+    return binascii.a2b_base64(data)
+
+
 @dataclass
 class StreamChunk:
     text: str
@@ -49,6 +83,21 @@ def _usage_to_dict(usage: Optional[object]) -> Dict[str, int]:
         return {}
     if isinstance(usage, dict):
         return usage
+    # Read the counters straight off the SDK object rather than paying for a full
+    # pydantic model_dump(). Responses usage names them input/output_tokens.
+    prompt = getattr(usage, "prompt_tokens", None)
+    if prompt is None:
+        prompt = getattr(usage, "input_tokens", None)
+    completion = getattr(usage, "completion_tokens", None)
+    if completion is None:
+        completion = getattr(usage, "output_tokens", None)
+    if prompt is not None and completion is not None:
+        total = getattr(usage, "total_tokens", None)
+        return {
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": total if total is not None else prompt + completion,
+        }
     if hasattr(usage, "model_dump"):
         return usage.model_dump()
     # Fallback for objects with attributes
@@ -60,6 +109,11 @@ def _usage_to_dict(usage: Optional[object]) -> Dict[str, int]:
     return result
 
 
+_DELTA_EVENT = "response.output_text.delta"
+_FLUSH_SECONDS = 0.02
+_FLUSH_CHARS = 64
+
+
 def stream_response(
     *,
     input_messages: List[Dict],
@@ -74,9 +128,9 @@ def stream_response(
     kwargs: Dict = {
         "model": model,
         "input": input_messages,
-        "temperature": temperature,
+        "temperature": round(temperature, 4),
         "max_output_tokens": max_output_tokens,
-        "top_p": top_p,
+        "top_p": round(top_p, 4),
     }
     # The Responses API (v1) currently ignores presence/frequency penalties; we retain
     # the parameters for backwards compatibility but avoid sending unsupported args.
@@ -84,16 +138,32 @@ def stream_response(
         kwargs["tools"] = tools
 
     with _response_stream(**kwargs) as stream:
-        full_text: List[str] = []
+        full_text = io.StringIO()
+        # Deltas are coalesced: the first goes out at once (first-token latency),
+        # later ones are batched until _FLUSH_SECONDS pass or _FLUSH_CHARS pile up.
+        pending: List[str] = []
+        pending_chars = 0
+        last_flush: Optional[float] = None
         for event in stream:
             if event.type == "response.output_text.delta":
-                delta = event.delta or ""
-                full_text.append(delta)
-                yield StreamChunk(text=delta, event_type=event.type)
+                delta = event.delta
+                if not delta:
+                    continue
+                full_text.write(delta)
+                pending.append(delta)
+                pending_chars += len(delta)
+                now = time.monotonic()
+                if last_flush is None or pending_chars >= _FLUSH_CHARS or now - last_flush >= _FLUSH_SECONDS:
+                    yield StreamChunk(text="".join(pending), event_type=_DELTA_EVENT)
+                    pending.clear()
+                    pending_chars = 0
+                    last_flush = now
             elif event.type == "response.completed":
                 break
             elif event.type == "response.error":
                 raise RuntimeError(event.error.get("message", "Unknown OpenAI stream error"))
+        if pending:
+            yield StreamChunk(text="".join(pending), event_type=_DELTA_EVENT)
         final = stream.get_final_response()
     usage = _usage_to_dict(final.usage)
     token_count = TokenCount(
@@ -101,7 +171,7 @@ def stream_response(
         completion_tokens=usage.get("completion_tokens", 0),
     )
     return StreamResult(
-        text="".join(full_text),
+        text=full_text.getvalue(),
         usage=token_count,
         response_id=final.id,
     )
@@ -111,6 +181,15 @@ def create_moderation(text: str) -> Dict:
     client = get_client()
     response = client.moderations.create(model="omni-moderation-latest", input=text)
     result = response.results[0]
+    categories = getattr(result, "categories", None)
+    category_scores = getattr(result, "category_scores", None)
+    if hasattr(categories, "model_dump") and hasattr(category_scores, "model_dump"):
+        # Only the fields the moderation policy reads, not the whole result model.
+        return {
+            "flagged": result.flagged,
+            "categories": categories.model_dump(),
+            "category_scores": category_scores.model_dump(),
+        }
     if hasattr(result, "model_dump"):
         return result.model_dump()
     if isinstance(result, dict):
@@ -134,8 +213,7 @@ def generate_image(prompt: str, model: Optional[str] = None, size: str = "1024x1
         prompt=prompt,
         size=size,
     )
-    b64 = response.data[0].b64_json
-    return base64.b64decode(b64)
+    return _b64decode(response.data[0].b64_json)
 
 
 def edit_image(
@@ -147,12 +225,11 @@ def edit_image(
 ) -> bytes:
     settings = get_settings()
     client = get_client()
-    image_file = BytesIO(image_bytes)
-    image_file.name = "image.png"
+    # (filename, content, mime) tuples are uploaded as-is, without a BytesIO copy.
+    image_file = ("image.png", image_bytes, "image/png")
     mask_file = None
     if mask_bytes:
-        mask_file = BytesIO(mask_bytes)
-        mask_file.name = "mask.png"
+        mask_file = ("mask.png", mask_bytes, "image/png")
     response = client.images.edit(
         model=model or settings.dalle_model,
         image=image_file,
@@ -160,20 +237,25 @@ def edit_image(
         prompt=prompt,
         size=size,
     )
-    return base64.b64decode(response.data[0].b64_json)
+    return _b64decode(response.data[0].b64_json)
+
+
+_RIFF_MAGIC = 0x52494646  # b"RIFF"
+_ID3_MAGIC = 0x494433  # b"ID3"
+_MP3_SYNC_WORDS = frozenset({0xFFFB, 0xFFF3, 0xFFF2})
 
 
 def transcribe_audio(audio_bytes: bytes, model: Optional[str] = None) -> str:
     settings = get_settings()
     client = get_client()
-    audio_file = BytesIO(audio_bytes)
-    header = audio_bytes[:4]
-    if header.startswith(b"RIFF"):
-        audio_file.name = "audio.wav"
-    elif header[:3] == b"ID3" or header[:2] in {b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"}:
-        audio_file.name = "audio.mp3"
+    # The first four bytes as one big-endian int: "RIFF", an "ID3" tag or an MPEG sync word.
+    head = int.from_bytes(audio_bytes[:4].ljust(4, b"\0"), "big")
+    if head == _RIFF_MAGIC:
+        audio_file = ("audio.wav", audio_bytes, "audio/wav")
+    elif head >> 8 == _ID3_MAGIC or head >> 16 in _MP3_SYNC_WORDS:
+        audio_file = ("audio.mp3", audio_bytes, "audio/mpeg")
     else:
-        audio_file.name = "audio.wav"
+        audio_file = ("audio.wav", audio_bytes, "audio/wav")
     transcript = client.audio.transcriptions.create(
         model=model or settings.whisper_model,
         file=audio_file,
@@ -197,14 +279,56 @@ def synthesize_speech(
     return response.read()
 
 
-def create_embeddings(texts: Iterable[str], model: Optional[str] = None) -> List[List[float]]:
-    client = get_client()
+def synthesize_speech_to_file(
+    text: str,
+    target_path: Path,
+    voice: Optional[str] = None,
+    speed: float = 1.0,
+) -> None:
+    """Like ``synthesize_speech``, but the audio is streamed straight into ``target_path``."""
     settings = get_settings()
-    response = client.embeddings.create(
-        model=model or settings.embeddings_model,
-        input=list(texts),
-    )
-    return [item.embedding for item in response.data]
+    client = get_client()
+    with client.audio.speech.with_streaming_response.create(
+        model="gpt-4o-mini-tts",
+        voice=voice or settings.tts_voice_default,
+        input=text,
+        speed=speed,
+    ) as response:
+        response.stream_to_file(target_path)
+
+
+# Inputs sent per embeddings request (the API accepts up to 2048).
+_EMBEDDINGS_BATCH = 1000
+
+
+def _embedding_blob(embedding) -> bytes:
+    # Base64 payloads are already little-endian float32; older SDKs may hand back floats.
+    if isinstance(embedding, str):
+        return _b64decode(embedding)
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def create_embeddings(texts: Iterable[str], model: Optional[str] = None) -> np.ndarray:
+    """Embed ``texts`` as one read-only (N, D) float32 matrix, rows in input order."""
+    model = model or get_settings().embeddings_model
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    def embed_batch(batch: List[str]) -> List[bytes]:
+        client = get_client()
+        blobs: List[bytes] = []
+        for start in range(0, len(batch), _EMBEDDINGS_BATCH):
+            response = client.embeddings.create(
+                model=model,
+                input=batch[start : start + _EMBEDDINGS_BATCH],
+                encoding_format="base64",
+            )
+            blobs.extend(_embedding_blob(item.embedding) for item in response.data)
+        return blobs
+
+    # Only texts this model hasn't embedded before reach the API.
+    return get_embedding_cache().get_or_compute_many(texts, model, embed_batch)
 
 
 def vision_response(
@@ -218,8 +342,7 @@ def vision_response(
     client = get_client()
     content = [{"type": "input_text", "text": prompt}]
     if image_bytes is not None:
-        b64 = base64.b64encode(image_bytes).decode("utf-8")
-        content.append({"type": "input_image", "image_base64": b64})
+        content.append({"type": "input_image", "image_base64": _b64encode(image_bytes)})
     elif image_url:
         content.append({"type": "input_image", "image_url": image_url})
     response = client.responses.create(
@@ -245,9 +368,9 @@ def complete_response(
     kwargs: Dict = {
         "model": model,
         "input": input_messages,
-        "temperature": temperature,
+        "temperature": round(temperature, 4),
         "max_output_tokens": max_output_tokens,
-        "top_p": top_p,
+        "top_p": round(top_p, 4),
     }
     # Presence/frequency penalties are not yet supported by the Responses API.
     if tools:
@@ -273,6 +396,7 @@ __all__ = [
     "edit_image",
     "transcribe_audio",
     "synthesize_speech",
+    "synthesize_speech_to_file",
     "create_embeddings",
     "vision_response",
 ]
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
 import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.config import get_settings
 
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # pragma: no cover - optional runtime dependency
+    HTMLParser = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
 
 @dataclass
 class SearchResult:
@@ -18,8 +31,41 @@ class SearchResult:
     snippet: str
 
 
+def _build_session() -> requests.Session:
+    """Keep-alive session with a small connection pool and retries on transient failures."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
 class SearchProvider:
     name: str = "base"
+    # Keys holding (title, url, snippet) in this provider's result rows.
+    result_fields: Tuple[str, str, str] = ("title", "url", "snippet")
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # One itemgetter per provider instead of three ``dict.get`` calls per row;
+        # rows are laid over the blank defaults so missing keys still read as "".
+        cls._field_defaults = dict.fromkeys(cls.result_fields, "")
+        cls._get_fields = staticmethod(itemgetter(*cls.result_fields))
+
+    def __init__(self) -> None:
+        self._session = _build_session()
+
+    def _parse_results(self, items: Iterable[Dict[str, Any]]) -> List[SearchResult]:
+        defaults, get_fields = self._field_defaults, self._get_fields
+        return [SearchResult(*get_fields({**defaults, **item})) for item in items]
 
     def search(self, query: str, *, max_results: int = 5) -> List[SearchResult]:
         raise NotImplementedError
@@ -28,9 +74,12 @@ class SearchProvider:
 class TavilyProvider(SearchProvider):
     name = "tavily"
     endpoint = "https://api.tavily.com/search"
+    result_fields = ("title", "url", "content")
 
     def __init__(self, api_key: str) -> None:
+        super().__init__()
         self.api_key = api_key
+        self._session.headers.update({"Content-Type": "application/json", "X-API-Key": api_key})
 
     def search(self, query: str, *, max_results: int = 5) -> List[SearchResult]:
         payload = {
@@ -38,27 +87,19 @@ class TavilyProvider(SearchProvider):
             "search_depth": "advanced",
             "max_results": max_results,
         }
-        headers = {"Content-Type": "application/json", "X-API-Key": self.api_key}
-        response = requests.post(self.endpoint, json=payload, headers=headers, timeout=15)
+        response = self._session.post(self.endpoint, json=payload, timeout=15)
         response.raise_for_status()
         data = response.json()
-        results = []
-        for item in data.get("results", [])[:max_results]:
-            results.append(
-                SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("url", ""),
-                    snippet=item.get("content", ""),
-                )
-            )
-        return results
+        return self._parse_results(data.get("results", ())[:max_results])
 
 
 class SerpAPIProvider(SearchProvider):
     name = "serpapi"
     endpoint = "https://serpapi.com/search.json"
+    result_fields = ("title", "link", "snippet")
 
     def __init__(self, api_key: str) -> None:
+        super().__init__()
         self.api_key = api_key
 
     def search(self, query: str, *, max_results: int = 5) -> List[SearchResult]:
@@ -67,47 +108,85 @@ class SerpAPIProvider(SearchProvider):
             "api_key": self.api_key,
             "num": max_results,
         }
-        response = requests.get(self.endpoint, params=params, timeout=15)
+        response = self._session.get(self.endpoint, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
-        results = []
-        for item in data.get("organic_results", [])[:max_results]:
-            results.append(
-                SearchResult(
-                    title=item.get("title", ""),
-                    url=item.get("link", ""),
-                    snippet=item.get("snippet", ""),
-                )
+        return self._parse_results(data.get("organic_results", ())[:max_results])
+
+
+@lru_cache(maxsize=1)
+def _beautiful_soup():
+    # Only needed when selectolax is missing, so bs4 is imported on first use.
+    from bs4 import BeautifulSoup
+    return BeautifulSoup
+
+
+def _unwrap_ddg_link(href: str) -> str:
+    """Result links go through DuckDuckGo's ``/l/?uddg=<target>`` redirect; return the target."""
+    parts = urlsplit(href)
+    if parts.path == "/l/":
+        target = parse_qs(parts.query).get("uddg")
+        if target:
+            return target[0]
+    return href
+
+
+def _parse_ddg_html(html: str, max_results: int) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    if max_results <= 0:
+        return rows
+    if HTMLParser is not None:
+        for node in HTMLParser(html).css(".result"):
+            link = node.css_first(".result__a")
+            if link is None:
+                continue
+            snippet = node.css_first(".result__snippet")
+            rows.append(
+                {
+                    "title": link.text(strip=True),
+                    "url": _unwrap_ddg_link(link.attributes.get("href") or ""),
+                    "snippet": snippet.text(strip=True) if snippet is not None else "",
+                }
             )
-        return results
+            if len(rows) == max_results:
+                break
+        return rows
+    for node in _beautiful_soup()(html, "html.parser").select(".result"):
+        link = node.select_one(".result__a")
+        if link is None:
+            continue
+        snippet = node.select_one(".result__snippet")
+        rows.append(
+            {
+                "title": link.get_text(strip=True),
+                "url": _unwrap_ddg_link(link.get("href", "")),
+                "snippet": snippet.get_text(strip=True) if snippet is not None else "",
+            }
+        )
+        if len(rows) == max_results:
+            break
+    return rows
 
 
 class DuckDuckGoProvider(SearchProvider):
     name = "duckduckgo"
-    endpoint = "https://duckduckgo.com/"
+    # The HTML endpoint returns real results; /ac/ only gave autocomplete phrases
+    # with no url or snippet. Parsed with selectolax when installed, else bs4.
+    endpoint = "https://html.duckduckgo.com/html/"
 
     def search(self, query: str, *, max_results: int = 5) -> List[SearchResult]:
-        params = {"q": query, "format": "json", "t": "Ashley"}
-        response = requests.get(f"{self.endpoint}ac/", params=params, timeout=10)
+        response = self._session.get(self.endpoint, params={"q": query}, timeout=10)
         if response.status_code != 200:
             logger.warning("DuckDuckGo search failed: %s", response.text[:200])
             return []
-        data = response.json()
-        results = []
-        for item in data[:max_results]:
-            results.append(
-                SearchResult(
-                    title=item.get("phrase", ""),
-                    url=item.get("url", ""),
-                    snippet=item.get("snippet", ""),
-                )
-            )
-        return results
+        return self._parse_results(_parse_ddg_html(response.text, max_results))
 
 
 class SearchManager:
     def __init__(self) -> None:
         settings = get_settings()
+        delay = settings.search_hedge_delay
+        self.hedge_delay: Optional[float] = delay if delay is not None and delay > 0 else None
         self.providers: Dict[str, SearchProvider] = {}
         if settings.tavily_api_key:
             self.providers["auto"] = TavilyProvider(settings.tavily_api_key)
@@ -119,20 +198,47 @@ class SearchManager:
             provider = DuckDuckGoProvider()
             self.providers["auto"] = provider
             self.providers[provider.name] = provider
+        # Keyless fallback for when the configured provider fails or is slow.
+        self.providers.setdefault("duckduckgo", DuckDuckGoProvider())
 
     def get_provider(self, name: str) -> SearchProvider:
         return self.providers.get(name, self.providers["auto"])
 
     def search(self, query: str, provider_name: str = "auto", max_results: int = 5) -> List[SearchResult]:
         provider = self.get_provider(provider_name)
-        try:
-            return provider.search(query, max_results=max_results)
-        except Exception as exc:
-            logger.warning("Search provider %s failed: %s", provider.name, exc)
-            fallback = self.providers.get("duckduckgo")
-            if fallback and fallback is not provider:
-                return fallback.search(query, max_results=max_results)
-            return []
+        fallback = self.providers.get("duckduckgo")
+        if fallback is provider:
+            fallback = None
+        # The fallback starts once the primary fails or comes back empty, or, with
+        # SEARCH_HEDGE_DELAY set, once the primary has taken that long; the first
+        # non-empty answer wins, preferring the primary when both are in.
+        hedge_delay = self.hedge_delay if fallback is not None else None
+        futures = [_SEARCH_EXECUTOR.submit(provider.search, query, max_results=max_results)]
+        owners = {futures[0]: provider}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=hedge_delay,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in (f for f in futures if f in done):
+                try:
+                    results = future.result()
+                except Exception as exc:
+                    logger.warning("Search provider %s failed: %s", owners[future].name, exc)
+                    continue
+                if results:
+                    for other in pending:
+                        other.cancel()
+                    return results
+            if fallback is not None:
+                backup = _SEARCH_EXECUTOR.submit(fallback.search, query, max_results=max_results)
+                futures.append(backup)
+                owners[backup] = fallback
+                pending.add(backup)
+                fallback = hedge_delay = None
+        return []
 
 
 _manager: Optional[SearchManager] = None
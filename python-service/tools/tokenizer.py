@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import math
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from functools import lru_cache
-from typing import List, Sequence
+from typing import Dict, List, Sequence, Tuple
 
 import tiktoken
 
@@ -14,6 +16,12 @@ _MODEL_COSTS = {
     "gpt-3.5-turbo": {"prompt": 1.0, "completion": 2.0},
 }
 
+# (prompt, completion) dollars per single token, derived once from _MODEL_COSTS.
+_COST_PER_TOKEN = {
+    model: (cost["prompt"] / 1_000_000, cost["completion"] / 1_000_000) for model, cost in _MODEL_COSTS.items()
+}
+_DEFAULT_COST_PER_TOKEN = _COST_PER_TOKEN["gpt-4o-mini"]
+
 
 @dataclass
 class TokenCount:
@@ -25,35 +33,93 @@ class TokenCount:
         return self.prompt_tokens + self.completion_tokens
 
     def cost_usd(self, model: str) -> float:
-        cost_info = _MODEL_COSTS.get(model, _MODEL_COSTS.get("gpt-4o-mini"))
-        prompt_cost_per_m = cost_info["prompt"]
-        completion_cost_per_m = cost_info["completion"]
-        return (
-            (self.prompt_tokens / 1_000_000) * prompt_cost_per_m
-            + (self.completion_tokens / 1_000_000) * completion_cost_per_m
-        )
+        prompt_cost, completion_cost = _COST_PER_TOKEN.get(model, _DEFAULT_COST_PER_TOKEN)
+        return self.prompt_tokens * prompt_cost + self.completion_tokens * completion_cost
 
 
-@lru_cache(maxsize=32)
-def get_encoder(model: str) -> tiktoken.Encoding:
+def _load_encoder(model: str) -> tiktoken.Encoding:
     try:
         return tiktoken.encoding_for_model(model)
     except KeyError:
         return tiktoken.get_encoding("cl100k_base")
 
 
+# Encoders are thread-safe; each thread keeps its own model -> encoder map so
+# lookups never contend, filled from the process-wide one on first use.
+_thread_encoders = threading.local()
+_shared_encoders: Dict[str, tiktoken.Encoding] = {}
+
+
+def get_encoder(model: str) -> tiktoken.Encoding:
+    encoders = getattr(_thread_encoders, "encoders", None)
+    if encoders is None:
+        encoders = _thread_encoders.encoders = {}
+    encoder = encoders.get(model)
+    if encoder is None:
+        encoder = _shared_encoders.get(model)
+        if encoder is None:
+            encoder = _shared_encoders.setdefault(model, _load_encoder(model))
+        encoders[model] = encoder
+    return encoder
+
+
+# Chat histories are re-counted every turn; message contents repeat, so their
+# token counts (and, for the one message being cut, its tokens) are memoised.
+_LENGTH_CACHE_SIZE = 8192
+_length_cache: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+_length_lock = threading.Lock()
+
+
+def _token_lengths(model: str, contents: Sequence[str]) -> List[int]:
+    """Token counts for ``contents``; uncached ones are encoded in a single batch call."""
+    lengths: List[int] = []
+    missing: List[str] = []
+    with _length_lock:
+        for content in contents:
+            length = _length_cache.get((model, content))
+            if length is None:
+                missing.append(content)
+            else:
+                _length_cache.move_to_end((model, content))
+            lengths.append(length)
+    if not missing:
+        return lengths
+    unique = list(dict.fromkeys(missing))
+    encoded = get_encoder(model).encode_ordinary_batch(unique)
+    computed = {content: len(tokens) for content, tokens in zip(unique, encoded)}
+    with _length_lock:
+        for content, length in computed.items():
+            _length_cache[(model, content)] = length
+        while len(_length_cache) > _LENGTH_CACHE_SIZE:
+            _length_cache.popitem(last=False)
+    return [computed[content] if length is None else length for content, length in zip(contents, lengths)]
+
+
+@lru_cache(maxsize=64)
+def _encoded(model: str, content: str) -> tuple:
+    return tuple(get_encoder(model).encode_ordinary(content))
+
+
 def count_tokens(text: str, model: str) -> int:
     encoder = get_encoder(model)
     return len(encoder.encode(text))
 
 
+def _byte_len(text: str) -> int:
+    # Every BPE token covers at least one UTF-8 byte, so this bounds the token count.
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def fits_in_tokens(text: str, model: str, limit: int) -> bool:
+    """Whether ``text`` is at most ``limit`` tokens; short texts are answered without encoding."""
+    if _byte_len(text) <= limit:
+        return True
+    return _token_lengths(model, [text])[0] <= limit
+
+
 def count_message_tokens(messages: Sequence[dict], model: str) -> int:
-    encoder = get_encoder(model)
-    total = 0
-    for message in messages:
-        content = message.get("content", "")
-        total += len(encoder.encode(content)) + 3
-    return total + 3
+    lengths = _token_lengths(model, [message.get("content", "") for message in messages])
+    return sum(lengths) + 3 * len(lengths) + 3
 
 
 def truncate_text(text: str, model: str, max_tokens: int) -> str:
@@ -70,35 +136,58 @@ def safe_truncate_messages(
     model: str,
     max_prompt_tokens: int,
 ) -> List[dict]:
-    encoder = get_encoder(model)
+    contents = [message.get("content", "") for message in messages]
+    # Nothing to cut if even the byte-count upper bound fits the budget.
+    if sum(map(_byte_len, contents)) + 3 * len(contents) <= max_prompt_tokens:
+        return list(messages)
+    lengths = _token_lengths(model, contents)
+    # walk back from the newest message to find where the kept tail starts,
+    # so the most recent context stays intact
+    start = len(messages)
     total_tokens = 0
-    truncated: List[dict] = []
-    # iterate backwards to keep the most recent context intact
-    for message in reversed(messages):
-        content = message.get("content", "")
-        message_tokens = len(encoder.encode(content)) + 3
-        if total_tokens + message_tokens > max_prompt_tokens:
-            remaining = max_prompt_tokens - total_tokens - 3
-            if remaining > 0:
-                truncated_content = encoder.decode(encoder.encode(content)[-remaining:])
-                truncated.append({**message, "content": truncated_content})
-                total_tokens += remaining + 3
-            break
-        truncated.append(message)
-        total_tokens += message_tokens
-    truncated.reverse()
-    return truncated
+    while start > 0 and total_tokens + lengths[start - 1] + 3 <= max_prompt_tokens:
+        start -= 1
+        total_tokens += lengths[start] + 3
+    kept = messages[start:]
+    if start > 0:
+        # the first message that didn't fit keeps as many of its last tokens as remain
+        remaining = max_prompt_tokens - total_tokens - 3
+        if remaining > 0:
+            message = messages[start - 1]
+            tokens = _encoded(model, message.get("content", ""))[-remaining:]
+            kept.insert(0, {**message, "content": get_encoder(model).decode(list(tokens))})
+    return kept
 
 
 def tokens_to_chars(token_count: int, avg_chars_per_token: float = 3.6) -> int:
     return math.ceil(token_count * avg_chars_per_token)
 
 
+def _warm_encoders() -> None:
+    for model in _MODEL_COSTS:
+        if model not in _shared_encoders:
+            try:
+                _shared_encoders.setdefault(model, _load_encoder(model))
+            except Exception:  # e.g. offline with no cached table; the first real call retries
+                continue
+
+
+def start_encoder_warmup() -> None:
+    """Load the BPE table of every priced model in a background thread.
+
+    Loading one takes tens of milliseconds of file I/O and parsing; the app
+    lifespan calls this so the first request doesn't pay for it.
+    """
+    threading.Thread(target=_warm_encoders, name="tiktoken-warmup", daemon=True).start()
+
+
 __all__ = [
     "TokenCount",
     "count_tokens",
     "count_message_tokens",
+    "fits_in_tokens",
     "truncate_text",
     "safe_truncate_messages",
     "tokens_to_chars",
+    "start_encoder_warmup",
 ]
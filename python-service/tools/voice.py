@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import os
+import tempfile
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from app.config import get_settings
 from tools.openai_client import synthesize_speech as _synthesize_speech
+from tools.openai_client import synthesize_speech_to_file as _synthesize_speech_to_file
 from tools.openai_client import transcribe_audio as _transcribe_audio
 
 AVAILABLE_VOICES: List[str] = [
@@ -15,6 +19,7 @@ AVAILABLE_VOICES: List[str] = [
     "vivid",
     "luna",
 ]
+_AVAILABLE_SET = frozenset(AVAILABLE_VOICES)
 
 
 def transcribe(audio_path: str, *, model: Optional[str] = None) -> str:
@@ -45,16 +50,30 @@ def synthesize_to_file(text: str, voice: str = "alloy", *, target_path: Optional
         filename = f"tts_{datetime.utcnow().strftime('%Y%m%d_%H%M%S%f')}.mp3"
         target_path = audio_dir / filename
     
-    audio = synthesize(text, voice=voice, speed=speed)
-    target_path.write_bytes(audio)
+    target_path = Path(target_path)
+    # Streamed to disk as it arrives; the whole clip is never held in memory. It goes to
+    # a temporary file beside the target first, so a failed stream never leaves a
+    # truncated clip behind.
+    fd, tmp_name = tempfile.mkstemp(dir=target_path.parent, prefix=f".{target_path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        os.chmod(tmp_name, 0o644)
+        _synthesize_speech_to_file(text, Path(tmp_name), voice=voice or settings.tts_voice_default, speed=speed)
+        os.replace(tmp_name, target_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
     return str(target_path)
 
 
+@lru_cache(maxsize=4)
+def _voices_for(default_voice: str) -> Tuple[str, ...]:
+    return tuple(sorted(_AVAILABLE_SET | {default_voice}))
+
+
 def list_voices() -> List[str]:
     settings = get_settings()
-    default_voice = settings.tts_voice_default
-    voices = sorted(set(AVAILABLE_VOICES + [default_voice]))
-    return voices
+    return list(_voices_for(settings.tts_voice_default))
 
 
 __all__ = ["transcribe", "transcribe_file", "synthesize", "synthesize_to_file", "list_voices"]